@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""Benchmarks for loading, saving and building each view, on generated data.
+
+    python benchmark.py                                # 1k, 10k and 100k tasks
+    python benchmark.py --sizes 1000,10000 --out before.json
+    python benchmark.py --compare before.json          # exits with 1 on a regression
+
+For each size a ``todo_data.json`` file is generated with tasks spread over
+a few hundred categories, dates around today, a mix of statuses and a plan
+for today. Each operation is run ``--repeat`` times and its fastest and
+median times are reported; ``--out`` saves them as JSON so a later run can
+be compared against them with ``--compare``, which flags every operation
+whose median got more than ``--threshold`` slower.
+
+Without a display the views are timed through the work they ask of the
+core (the queries, counts and timeline layout they are built from), so the
+numbers can be taken on any machine. With ``--gui`` (which needs a display,
+e.g. under ``xvfb-run``) the TodoApp methods themselves are timed, widgets
+and all.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from todo_core import commands, queries
+from todo_core.columns import TaskColumns
+from todo_core.dates import DATE_FORMAT
+from todo_core.models import PRIORITIES, new_category, new_task
+from todo_core.search import SearchIndex
+from todo_core.storage import open_storage
+from todo_core.store import TodoStore
+from todo_core.task_query import TaskQuery
+from todo_core.today import META_PREFIX
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_CATEGORIES = 300
+DEFAULT_THRESHOLD = 0.25
+NOISE_FLOOR = 0.001  # seconds; smaller changes are never reported as regressions
+
+# What a timeline screen shows at the default zoom
+VISIBLE_ROWS = 30
+VISIBLE_DAYS = 310
+PX_PER_DAY = 4
+
+WORDS = (
+    'review', 'update', 'plan', 'draft', 'report', 'budget', 'meeting', 'client', 'design',
+    'release', 'test', 'deploy', 'invoice', 'contract', 'website', 'backup', 'server',
+    'migration', 'training', 'interview', 'hiring', 'roadmap', 'feedback', 'survey',
+    'presentation', 'workshop', 'audit', 'security', 'policy', 'schedule', 'vendor',
+    'order', 'shipping', 'inventory', 'marketing', 'campaign', 'newsletter', 'blog',
+    'research', 'prototype', 'sprint', 'retrospective', 'documentation', 'onboarding',
+    'renewal', 'license', 'garden', 'kitchen', 'groceries', 'dentist', 'car', 'insurance',
+    'taxes', 'holiday', 'flights', 'hotel', 'birthday', 'gift', 'repair', 'paint',
+    'quarterly', 'annual', 'weekly', 'monthly', 'final', 'first', 'second', 'new', 'old',
+    'team', 'project', 'customer', 'support', 'ticket', 'bug', 'feature', 'data', 'api',
+)
+STATUS_WEIGHTS = (('Not Started', 30), ('In Progress', 25), ('Completed', 35), ('On Hold', 10))
+COLORS = ('#4CAF50', '#2196F3', '#FF9800', '#9C27B0', '#F44336', '#009688', '#795548', '#607D8B')
+
+# Operations in report order; each is a method of the bench classes below
+OPERATIONS = (
+    'load_data', 'load_in_batches', 'save_data', 'save_task', 'update_categories_display',
+    'expand_category', 'expand_category_cached', 'update_tasks_for_day', 'update_timeline',
+    'filter_and_sort', 'build_search_index', 'search',
+)
+
+
+# ----------------------------------------------------------------------
+# Data
+# ----------------------------------------------------------------------
+def _phrase(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def generate(path, task_count, category_count=DEFAULT_CATEGORIES, seed=0):
+    """Write a data file with ``task_count`` generated tasks and return the plan size.
+
+    The same arguments always give the same tasks, relative to today.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    categories = {str(number): new_category(f"{_phrase(rng, 2).title()} {number}", rng.choice(COLORS))
+                  for number in range(1, category_count + 1)}
+    category_ids = list(categories)
+    # A few big categories and a long tail of small ones
+    category_weights = [1 / rank for rank in range(1, category_count + 1)]
+    statuses, status_weights = zip(*STATUS_WEIGHTS)
+
+    tasks = []
+    for number in range(1, task_count + 1):
+        start = today + timedelta(days=rng.randint(-365, 60))
+        due = start + timedelta(days=rng.randint(1, 90))
+        status = rng.choices(statuses, status_weights)[0]
+        completed = None
+        if status == 'Completed':
+            completed = min(due + timedelta(days=rng.randint(-30, 10)), today)
+            completed = max(completed, start).strftime(DATE_FORMAT)
+        tasks.append(new_task(
+            str(number), _phrase(rng, rng.randint(2, 5)).capitalize(),
+            rng.choices(category_ids, category_weights)[0],
+            start.strftime(DATE_FORMAT), due.strftime(DATE_FORMAT),
+            priority=rng.choice(PRIORITIES),
+            progress=100 if status == 'Completed' else rng.randrange(0, 100, 5),
+            status=status,
+            comments=_phrase(rng, rng.randint(0, 12)),
+            date_completed=completed))
+
+    plan = [task.id for task in rng.sample(tasks, min(len(tasks), max(1, task_count // 100), 100))]
+    storage = open_storage(path)
+    storage.write_snapshot(categories, tasks, {META_PREFIX + today.strftime(DATE_FORMAT): plan})
+    storage.wait()
+    return len(plan)
+
+
+# ----------------------------------------------------------------------
+# Operations
+# ----------------------------------------------------------------------
+class CoreBench:
+    """The work behind each operation, on the headless core.
+
+    ``prepare_<operation>`` methods run untimed before each repetition.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        store = TodoStore(path)
+        store.load()
+        self.use(store)
+
+    def use(self, store):
+        """Run the operations against a loaded store"""
+        self.store = store
+        counts = {cat_id: queries.task_count(self.store, cat_id) for cat_id in self.store.categories}
+        self.category_id = max(counts, key=counts.get)  # the largest category
+        self.store.search_index.index_pending()
+        self.edits = 0
+
+    def close(self):
+        self.store.close()
+
+    def _fresh_results(self):
+        self.store.query_cache.clear()
+
+    def load_data(self):
+        store = TodoStore(self.path)
+        store.load()
+        store.close()
+
+    def load_in_batches(self):
+        store = TodoStore(self.path)
+        for _ in store.load_in_batches():
+            pass
+        store.close()
+
+    def save_data(self):
+        """A full snapshot, as written after loading repairs or archives tasks"""
+        self.store.save()
+
+    def save_task(self):
+        """One edit, appended to the journal"""
+        task = self.store.tasks[self.edits % len(self.store.tasks)]
+        self.edits += 1
+        commands.update_task(self.store, task, progress=(task.progress + 5) % 105)
+
+    def update_categories_display(self):
+        for cat_id in self.store.categories:
+            queries.task_count(self.store, cat_id)
+
+    prepare_expand_category = _fresh_results
+
+    def expand_category(self):
+        TaskQuery(category_id=self.category_id).run(self.store)
+
+    def expand_category_cached(self):
+        """Showing the same category again, with nothing changed"""
+        TaskQuery(category_id=self.category_id).run(self.store)
+
+    prepare_update_tasks_for_day = _fresh_results
+
+    def update_tasks_for_day(self):
+        TaskQuery(today=True).run(self.store)
+
+    prepare_update_timeline = _fresh_results
+
+    def update_timeline(self):
+        """Lay out every task, then find the bars of one screen"""
+        columns = TaskColumns(TaskQuery().run(self.store))
+        days = columns.day_range()
+        if days:
+            first_day = days[0]
+            list(columns.bars(0, VISIBLE_ROWS, first_day, first_day + VISIBLE_DAYS,
+                              first_day, PX_PER_DAY))
+
+    prepare_filter_and_sort = _fresh_results
+
+    def filter_and_sort(self):
+        TaskQuery(status=('Not Started', 'In Progress'), sort=('due_date', '-priority')).run(self.store)
+
+    def build_search_index(self):
+        SearchIndex(self.store.tasks).index_pending()
+
+    def search(self):
+        for text in ('rev', 'client meet', 'sec pol', 'release final team'):
+            queries.search_tasks(self.store, text)
+
+
+class GuiBench(CoreBench):
+    """Times the TodoApp view methods themselves; needs a display"""
+
+    def __init__(self, path):
+        import tkinter as tk
+        from main import TodoApp
+
+        self.path = path
+        self.root = tk.Tk()
+        self.app = TodoApp(self.root, data_path=path, archive_after=0)
+        while self.app.loader is not None:
+            self.root.update()
+        self.use(self.app.store)
+
+    def close(self):
+        self.store.close()
+        self.root.destroy()
+
+    def _show(self, tab_name):
+        if self.app.current_tab.get() != tab_name:
+            self.app.switch_tab(tab_name)
+            self.root.update()
+
+    def save_data(self):
+        self.store.save()
+        self.store.flush()
+
+    def save_task(self):
+        super().save_task()
+        self.store.flush()
+
+    def prepare_update_categories_display(self):
+        self._show('Main')
+
+    def update_categories_display(self):
+        self.app.update_categories_display()
+        self.root.update_idletasks()
+
+    def prepare_expand_category(self):
+        self._show('Main')
+        self._fresh_results()
+
+    def expand_category(self):
+        self.app.expand_category(self.category_id)
+        self.root.update_idletasks()
+
+    prepare_expand_category_cached = prepare_update_categories_display
+    expand_category_cached = expand_category
+
+    def prepare_update_tasks_for_day(self):
+        self._show('Tasks for the Day')
+        self._fresh_results()
+
+    def update_tasks_for_day(self):
+        self.app.update_tasks_for_day()
+        self.root.update_idletasks()
+
+    def prepare_update_timeline(self):
+        self._show('Timeline')
+        self._fresh_results()
+
+    def update_timeline(self):
+        self.app.update_timeline()
+        self.root.update_idletasks()
+
+
+def measure(bench, operation, repeat):
+    """Run an operation ``repeat`` times; return its fastest and median time in seconds"""
+    prepare = getattr(bench, 'prepare_' + operation, None)
+    run = getattr(bench, operation)
+    times = []
+    for _ in range(repeat):
+        if prepare is not None:
+            prepare()
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return {'min': min(times), 'median': statistics.median(times)}
+
+
+def run_benchmarks(sizes, repeat=5, category_count=DEFAULT_CATEGORIES, data_dir=None,
+                   gui=False, out=sys.stdout):
+    """Generate the data files, time every operation and return the report dict"""
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'mode': 'gui' if gui else 'core',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__ if np is not None else None,
+        'repeat': repeat,
+        'categories': category_count,
+        'results': {},
+    }
+    directory = data_dir or tempfile.mkdtemp(prefix='todo-benchmark-')
+    os.makedirs(directory, exist_ok=True)
+    bench_class = GuiBench if gui else CoreBench
+    try:
+        for size in sizes:
+            path = os.path.join(directory, f'todo_data_{size}.json')
+            for leftover in (path + '.journal', os.path.splitext(path)[0] + '.archive.json'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            print(f"{size:,} tasks: generating...", file=out, flush=True)
+            generate(path, size, category_count)
+            bench = bench_class(path)
+            results = report['results'][str(size)] = {}
+            try:
+                for operation in OPERATIONS:
+                    print(f"{size:,} tasks: {operation}", file=out, flush=True)
+                    results[operation] = measure(bench, operation, repeat)
+            finally:
+                bench.close()
+    finally:
+        if data_dir is None:
+            shutil.rmtree(directory, ignore_errors=True)
+    return report
+
+
+# ----------------------------------------------------------------------
+# Report
+# ----------------------------------------------------------------------
+def format_time(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 0.01:
+        return f"{seconds * 1000:.1f} ms"
+    return f"{seconds * 1000:.2f} ms"
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return {(size, operation): (baseline median, median)} for every slowed-down operation"""
+    regressions = {}
+    for size, results in report['results'].items():
+        for operation, timing in results.items():
+            before = baseline['results'].get(size, {}).get(operation)
+            if before is None:
+                continue
+            slower = timing['median'] - before['median']
+            if timing['median'] > before['median'] * (1 + threshold) and slower > NOISE_FLOOR:
+                regressions[size, operation] = (before['median'], timing['median'])
+    return regressions
+
+
+def print_report(report, baseline=None, regressions=(), out=sys.stdout):
+    """Print the median times as a table, with the change from the baseline if given"""
+    sizes = list(report['results'])
+    width = 24 if baseline else 12
+    print(f"\n{'median':<28}" + ''.join(f"{int(size):>{width},}" for size in sizes), file=out)
+    for operation in OPERATIONS:
+        cells = []
+        for size in sizes:
+            timing = report['results'][size].get(operation)
+            if timing is None:
+                cells.append(f"{'-':>{width}}")
+                continue
+            cell = format_time(timing['median'])
+            before = (baseline or {}).get('results', {}).get(size, {}).get(operation)
+            if before:
+                change = timing['median'] / before['median'] - 1 if before['median'] else 0
+                mark = '!' if (size, operation) in regressions else ' '
+                cell += f" ({change:+5.0%}){mark}"
+            cells.append(f"{cell:>{width}}")
+        print(f"{operation:<28}" + ''.join(cells), file=out)
+
+    if baseline is not None:
+        differences = [key for key in ('mode', 'python', 'numpy', 'repeat', 'categories')
+                       if baseline.get(key) != report.get(key)]
+        if differences:
+            print(f"\nNote: the baseline differs in {', '.join(differences)}", file=out)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s), marked '!' "
+                  f"(median more than {100 * (report['threshold']):.0f}% slower)", file=out)
+        else:
+            print("\nNo regressions", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time loading, saving and the views on generated data")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated task counts (default 1000,10000,100000)")
+    parser.add_argument('--categories', type=int, default=DEFAULT_CATEGORIES,
+                        help=f"categories per data file (default {DEFAULT_CATEGORIES})")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per operation (default 5)")
+    parser.add_argument('--out', help="save the report as JSON to this file")
+    parser.add_argument('--compare', metavar='REPORT', help="compare with a report saved by --out")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slow-down that counts as a regression (default 0.25 = 25%%)")
+    parser.add_argument('--data-dir', help="keep the generated data files in this directory")
+    parser.add_argument('--gui', action='store_true',
+                        help="time the TodoApp views themselves (needs a display)")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    except ValueError:
+        raise SystemExit(f"--sizes must be comma-separated numbers (got '{args.sizes}')")
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    report = run_benchmarks(sizes, args.repeat, args.categories, args.data_dir, args.gui)
+    report['threshold'] = args.threshold
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    regressions = compare(report, baseline, args.threshold) if baseline else {}
+    print_report(report, baseline, regressions)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
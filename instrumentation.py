@@ -0,0 +1,114 @@
+"""Tracing of the views (see todo_core.trace).
+
+Methods that rebuild or redraw part of the window are wrapped with
+traced(). While tracing is on, each call is recorded as a span with the
+number of widgets it created and destroyed and the number of items left
+on the canvases, which tells widget churn apart from canvas drawing.
+The widgets are only counted around the outermost traced call (a nested
+call's changes are part of its caller's counts), and the counting is
+left out of the recorded time, so it does not inflate the spans it
+measures. TraceOverlay shows the totals per method in a corner of the
+window (F12 hides and shows it).
+"""
+
+import functools
+import time
+import tkinter as tk
+
+from todo_core import trace
+
+OVERLAY_REFRESH = 500  # ms between overlay updates
+OVERLAY_ROWS = 12
+
+_root = None  # window whose widgets traced() counts; set by TraceOverlay
+_depth = 0    # traced calls in progress
+
+
+def census(root):
+    """Return the path names of every widget under ``root`` and the number of canvas items"""
+    names = set()
+    items = 0
+    stack = [root]
+    while stack:
+        for child in stack.pop().children.values():
+            names.add(str(child))
+            if isinstance(child, tk.Canvas):
+                items += len(child.find_all())
+            stack.append(child)
+    return names, items
+
+
+def traced(method):
+    """Record each call of a view method as a span while tracing is on"""
+    name = method.__qualname__
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        global _depth
+        tracer = trace.active()
+        if tracer is None:
+            return method(*args, **kwargs)
+        root = _root if _depth == 0 else None
+        before = census(root) if root is not None else None
+        _depth += 1
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            finished = time.perf_counter()
+            _depth -= 1
+            counts = {}
+            if root is not None:
+                after = census(root)
+                counts = {'widgets_created': len(after[0] - before[0]),
+                          'widgets_destroyed': len(before[0] - after[0]),
+                          'widgets': len(after[0]),
+                          'canvas_items': after[1],
+                          'canvas_items_added': after[1] - before[1]}
+            tracer.record(name, started, finished, 'view', counts)
+
+    return wrapper
+
+
+class TraceOverlay:
+    """Per-method totals of the trace, drawn over the bottom right of the window"""
+
+    def __init__(self, root, tracer):
+        global _root
+        _root = root
+        self.root = root
+        self.tracer = tracer
+        self.visible = True
+        self._job = None  # pending refresh
+        self.label = tk.Label(root, font=('Courier', 9), justify='left', anchor='nw',
+                              bg='#202020', fg='#e0e0e0', padx=8, pady=6)
+        self.label.place(relx=1.0, rely=1.0, x=-10, y=-10, anchor='se')
+        root.bind('<F12>', lambda e: self.toggle())
+        self.refresh()
+
+    def toggle(self):
+        self.visible = not self.visible
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        if self.visible:
+            self.label.place(relx=1.0, rely=1.0, x=-10, y=-10, anchor='se')
+            self.refresh()
+        else:
+            self.label.place_forget()
+
+    def refresh(self):
+        """Show the spans that took the most time so far; reschedules itself"""
+        self._job = None
+        if not self.visible:
+            return
+        lines = [f"{'span':<34}{'calls':>6}{'avg ms':>9}{'max ms':>9}"
+                 f"{'+wid':>6}{'-wid':>6}{'items':>7}"]
+        for name, calls, total, slowest, last in self.tracer.summary()[:OVERLAY_ROWS]:
+            lines.append(f"{name[-33:]:<34}{calls:>6}{total / calls * 1000:>9.1f}{slowest * 1000:>9.1f}"
+                         f"{last.get('widgets_created', ''):>6}{last.get('widgets_destroyed', ''):>6}"
+                         f"{last.get('canvas_items', ''):>7}")
+        lines.append(f"trace: {self.tracer.path}  (F12 hides)")
+        self.label.configure(text='\n'.join(lines))
+        self.label.lift()
+        self._job = self.root.after(OVERLAY_REFRESH, self.refresh)
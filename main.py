@@ -1,88 +1,287 @@
+import time
+
+STARTED = time.perf_counter()  # for measuring time to first paint
+
 import tkinter as tk
 from tkinter import ttk, messagebox, colorchooser
-try:
-    from tkcalendar import DateEntry
-except ImportError:
-    # Fallback if tkcalendar is not available
-    DateEntry = None
-from datetime import datetime, timedelta
-import json
+from datetime import date, datetime, timedelta
+import argparse
 import os
-try:
-    from PIL import Image, ImageTk
-except ImportError:
-    # Fallback if PIL is not available
-    Image = None
-    ImageTk = None
 
-import math
+from todo_core import DataLockedError, StorageError, commands, events, queries, trace
+from todo_core.commands import CommandError
+from todo_core.dates import DATE_FORMAT
+from todo_core.models import PRIORITIES, STATUSES
+from todo_core.store import TodoStore
+from todo_core.task_query import TaskQuery
+from instrumentation import TraceOverlay, traced
+from styles import Theme, create_fonts, font, lighten_color
+from timeline import GanttChart
+from widgets import CategoryTile, VirtualTaskList
+
+_date_entry_class = False  # not imported yet
+
+FIRST_PAINT_TARGET = 0.5    # seconds from start until the Main tab is drawn
+SEARCH_DELAY = 150          # ms to wait after a keystroke before searching
+SEARCH_LIMIT = 200          # most search results shown
+SEARCH_INDEX_BATCH = 2000   # tasks indexed for search per idle step
+
+# Filter bar choices: label -> TaskQuery filters (the due date ones depend on the day)
+STATUS_FILTERS = {'All statuses': None, 'Open': ('Not Started', 'In Progress', 'On Hold'),
+                  **{status: status for status in STATUSES}}
+PRIORITY_FILTERS = {'All priorities': None, **{priority: priority for priority in PRIORITIES}}
+DUE_FILTERS = {
+    'Any due date': lambda today: {},
+    'Overdue': lambda today: {'overdue': True},
+    'Due today': lambda today: {'due_from': today.isoformat(), 'due_to': today.isoformat()},
+    'Due within 7 days': lambda today: {'due_from': today.isoformat(),
+                                        'due_to': (today + timedelta(days=7)).isoformat()},
+    'Due within 30 days': lambda today: {'due_from': today.isoformat(),
+                                         'due_to': (today + timedelta(days=30)).isoformat()},
+}
+PROGRESS_FILTERS = {
+    'Any progress': {},
+    'Not begun (0%)': {'max_progress': 0},
+    'Under way (1-99%)': {'min_progress': 1, 'max_progress': 99},
+    'Finished (100%)': {'min_progress': 100},
+}
+# Sort orders: label -> TaskQuery sort keys
+SORT_ORDERS = {
+    'Saved order': (),
+    'Due date': ('due_date', 'priority'),
+    'Priority': ('priority', 'due_date'),
+    'Progress': ('-progress', 'due_date'),
+    'Start date': ('start_date', 'due_date'),
+    'Name': ('name',),
+}
+
+
+def date_entry_class():
+    """Return tkcalendar's DateEntry, or None if it is not installed.
+
+    tkcalendar is slow to import, so it is loaded by the first dialog
+    that needs it rather than at startup.
+    """
+    global _date_entry_class
+    if _date_entry_class is False:
+        try:
+            from tkcalendar import DateEntry
+        except ImportError:
+            # Fallback if tkcalendar is not available
+            DateEntry = None
+        _date_entry_class = DateEntry
+    return _date_entry_class
 
 class TodoApp:
-    def __init__(self, root):
+    def __init__(self, root, data_path='todo_data.json', defer_completed=False, archive_after=90):
         self.root = root
         self.root.title("To-Do List Application")
         self.root.geometry("1400x900")  # Increased window size
-        self.root.configure(bg='#f0f0f0')
+        create_fonts(self.root)
+        
+        # Colors: widgets are registered by role and recolored when the palette changes
+        self.theme = Theme(self.root)
+        self.theme.register(self.root, 'window')
         
-        # Data storage
-        self.categories = {}
-        self.tasks = []
+        # Data storage; the store saves on a worker thread and moves tasks
+        # completed more than archive_after days ago to the archive
+        self.store = TodoStore(data_path, background=True, archive_after=archive_after)
         self.dark_mode = False
         
-        # Load data
-        self.load_data()
+        # Load data a batch at a time once the window is up
+        self.defer_completed = defer_completed
+        self.loader = self.store.load_in_batches(defer_completed=defer_completed)
+        
+        # View state: views patch their own widgets on each change, and tabs
+        # that are hidden when a change happens are rebuilt when next shown
+        self.current_category_id = None  # category expanded on the Main tab
+        self.category_tiles = {}         # category id -> its tile on the grid
+        self.tile_pool = []              # tiles kept for reuse when the grid is rebuilt
+        self.main_list = None            # task list reused by the expanded category and the search results
+        self.category_list = None        # task list of the expanded category
+        self.search_text = None          # search whose results the Main tab shows
+        self.search_list = None          # task list of the search results
+        self.search_job = None           # search scheduled while typing
+        self.today_list = None           # task list of Tasks for the Day
+        self.view_query = TaskQuery()    # filters and sort order chosen in the filter bar
+        self.dirty_tabs = set()
+        self.store.changes.subscribe(self.on_data_changed)
         
         # Create UI
         self.create_header()
+        self.create_filter_bar()
         self.create_main_content()
         
         # Apply initial theme
         self.apply_theme()
         
-    def load_data(self):
-        """Load data from JSON file if it exists"""
-        if os.path.exists('todo_data.json'):
-            try:
-                with open('todo_data.json', 'r') as f:
-                    data = json.load(f)
-                    self.categories = data.get('categories', {})
-                    self.tasks = data.get('tasks', [])
-            except:
-                self.categories = {}
-                self.tasks = []
+        # With tracing on, show what the views cost as they run
+        tracer = trace.active()
+        self.trace_overlay = TraceOverlay(self.root, tracer) if tracer is not None else None
+        
+        # Write pending changes before the window closes
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.update_save_indicator()
+        self.root.after_idle(self.load_next_batch)
+    
+    # The store replaces its containers when it (re)loads, so always go through it
+    @property
+    def categories(self):
+        return self.store.categories
+    
+    @property
+    def tasks(self):
+        return self.store.tasks
+    
+    @property
+    def task_index(self):
+        return self.store.task_index
+    
+    @property
+    def category_index(self):
+        return self.store.category_index
+    
+    @property
+    def today_tasks(self):
+        """Ids of the tasks planned for today"""
+        return self.store.today
+    
+    @traced
+    def load_next_batch(self):
+        """Load the next batch of tasks from the storage backend (JSON snapshot + journal, or SQLite).
+        
+        Reschedules itself until everything is loaded, showing the Main tab's
+        categories and counts as the tasks come in.
+        """
+        try:
+            next(self.loader, None)
+        except StorageError as error:
+            self.loader = None
+            start_empty = messagebox.askyesno(
+                "Data Error",
+                f"Your saved tasks could not be loaded:\n\n{error}\n\n"
+                "Start with an empty list? The unreadable files will be kept "
+                "next to the data file so they can be recovered by hand.")
+            if not start_empty:
+                raise SystemExit(1)
+            self.store.reset()
+            self.update_all_displays()
+            return
+        
+        if self.store.loading:
+            self.show_loading_progress()
+            self.root.after(1, self.load_next_batch)
+            return
+        
+        self.loader = None
+        self.update_all_displays()
+        self.root.after_idle(self.index_next_search_batch)
+        if self.store.storage.recovery_note:
+            messagebox.showwarning("Data Recovered", self.store.storage.recovery_note)
+    
+    def show_loading_progress(self):
+        """Bring the Main tab up to date with the tasks loaded so far"""
+        if self.current_tab.get() != 'Main':
+            self.dirty_tabs.add('Main')
+        elif self.search_text is not None:
+            return  # searched again once everything is loaded
+        elif self.current_category_id is not None:
+            self.category_list.set_tasks(self.category_tasks(self.current_category_id))
+        elif self.category_tiles.keys() != self.categories.keys():
+            self.update_categories_display()
         else:
-            self.categories = {}
-            self.tasks = []
+            for cat_id, tile in self.category_tiles.items():
+                tile.set_count(queries.task_count(self.store, cat_id))
     
-    def save_data(self):
-        """Save data to JSON file"""
-        data = {
-            'categories': self.categories,
-            'tasks': self.tasks
-        }
-        with open('todo_data.json', 'w') as f:
-            json.dump(data, f, indent=2)
+    def show_history(self, category_id=None):
+        """Load the completed tasks left on disk or archived (for one category, or all) and show them"""
+        if self.store.loading:
+            messagebox.showinfo("Loading", "Tasks are still loading; please try again in a moment.")
+            return
+        self.store.load_deferred(category_id=category_id)
+        self.store.load_archived(category_id)
+        self.update_all_displays()
+        self.root.after_idle(self.index_next_search_batch)
+    
+    def index_next_search_batch(self):
+        """Index a batch of task text for search, rescheduling until nothing is queued.
+        
+        Doing this in idle time keeps the first search from having to index
+        every task at once.
+        """
+        if self.store.search_index.index_pending(SEARCH_INDEX_BATCH):
+            self.root.after(1, self.index_next_search_batch)
+    
+    def update_save_indicator(self):
+        """Show whether changes are still waiting to be written (polled)"""
+        error = self.store.saves.error
+        pending = self.store.saves.pending
+        if self.store.loading:
+            self.save_status_label.configure(text=f"Loading {len(self.tasks):,} tasks…",
+                                             fg=self.theme.palette['faint'])
+        elif error is not None:
+            self.save_status_label.configure(text="⚠ Not saved", fg='#f44336')
+        elif pending:
+            self.save_status_label.configure(text=f"Saving {pending} change{'s' if pending != 1 else ''}…",
+                                             fg=self.theme.palette['faint'])
+        else:
+            self.save_status_label.configure(text="")
+        self.root.after(250, self.update_save_indicator)
+    
+    def on_close(self):
+        """Flush pending writes, then close the window"""
+        if not self.store.flush(timeout=10):
+            quit_anyway = messagebox.askyesno(
+                "Unsaved Changes",
+                f"Some changes could not be saved:\n\n{self.store.saves.error or 'Saving is taking too long.'}\n\n"
+                "Quit anyway?")
+            if not quit_anyway:
+                return
+            # Don't wait for the same writes all over again
+            self.store.close(timeout=0)
+        else:
+            self.store.close()
+        self.root.destroy()
     
     def create_header(self):
         """Create the header with logo placeholder, navigation, and buttons"""
-        self.header = tk.Frame(self.root, height=80, bg='#ffffff')
+        self.header = self.theme.register(tk.Frame(self.root, height=80), 'header')
         self.header.pack(fill='x', padx=10, pady=5)
         self.header.pack_propagate(False)
         
         # Logo placeholder (left)
-        self.logo_frame = tk.Frame(self.header, bg='#e0e0e0', width=60, height=60)
+        self.logo_frame = self.theme.register(tk.Frame(self.header, width=60, height=60), 'logo')
         self.logo_frame.place(x=10, y=10)
         self.logo_frame.pack_propagate(False)
         
-        logo_label = tk.Label(self.logo_frame, text="LOGO", bg='#e0e0e0', fg='#666666')
+        logo_label = self.theme.register(tk.Label(self.logo_frame, text="LOGO"), 'logo_text')
         logo_label.pack(expand=True)
         
         # Dark/Light mode button (left of logo)
         self.theme_btn = tk.Button(self.header, text="🌙", font=('Arial', 16), 
-                                 command=self.toggle_theme, bg='#ffffff', bd=0,
+                                 command=self.toggle_theme, bd=0,
                                  cursor='hand2')  # Add cursor pointer
+        self.theme.register(self.theme_btn, 'header_button')
         self.theme_btn.place(x=80, y=20)
         
+        # Search box (right of the theme button); results show on the Main tab
+        self.search_label = tk.Label(self.header, text="🔍", font=('Arial', 12))
+        self.theme.register(self.search_label, 'header_text')
+        self.search_label.place(x=130, y=26)
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(self.header, textvariable=self.search_var, font=('Arial', 11),
+                                     width=28, relief='solid', bd=1)
+        self.theme.register(self.search_entry, 'entry')
+        self.search_entry.place(x=160, y=28)
+        self.search_entry.bind('<KeyRelease>', self.schedule_search)
+        self.search_entry.bind('<Return>', lambda e: self.run_search())
+        self.search_entry.bind('<Escape>', lambda e: self.clear_search())
+        
+        # Pending writes indicator (left of the Add New button)
+        self.save_status_label = tk.Label(self.header, text="", font=('Arial', 9))
+        self.theme.register(self.save_status_label, 'header')
+        self.save_status_label.place(relx=1.0, x=-140, y=32, anchor='ne')
+        
         # Add New button (right)
         self.add_btn = tk.Button(self.header, text="+ Add New", font=('Arial', 12, 'bold'),
                                command=self.show_add_dialog, bg='#4CAF50', fg='white',
@@ -90,7 +289,7 @@ class TodoApp:
         self.add_btn.place(relx=1.0, x=-120, y=20)
         
         # Tab navigation (center)
-        self.tab_frame = tk.Frame(self.header, bg='#ffffff')
+        self.tab_frame = self.theme.register(tk.Frame(self.header), 'header')
         self.tab_frame.place(relx=0.5, rely=0.5, anchor='center')
         
         self.tabs = ['Main', 'Tasks for the Day', 'Timeline']
@@ -99,28 +298,74 @@ class TodoApp:
         for tab in self.tabs:
             btn = tk.Button(self.tab_frame, text=tab, font=('Arial', 11),
                           command=lambda t=tab: self.switch_tab(t),
-                          bg='#ffffff', bd=0, padx=15, pady=8, cursor='hand2')
+                          bd=0, padx=15, pady=8, cursor='hand2')
+            self.theme.register(btn, 'header_button')
             btn.pack(side='left', padx=5)
     
+    def create_filter_bar(self):
+        """Create the filters and sort order shared by the task lists and the timeline"""
+        self.filter_bar = self.theme.register(tk.Frame(self.root), 'window')
+        self.filter_bar.pack(fill='x', padx=20)
+        
+        self.filter_vars = {}
+        for name, label, choices in (('status', "Show:", STATUS_FILTERS),
+                                     ('priority', None, PRIORITY_FILTERS),
+                                     ('due', None, DUE_FILTERS),
+                                     ('progress', None, PROGRESS_FILTERS),
+                                     ('sort', "Sort by:", SORT_ORDERS)):
+            if label:
+                label_widget = tk.Label(self.filter_bar, text=label, font=('Arial', 10))
+                self.theme.register(label_widget, 'text')
+                label_widget.pack(side='left', padx=(0 if name == 'status' else 15, 5))
+            var = tk.StringVar(value=next(iter(choices)))
+            combo = ttk.Combobox(self.filter_bar, textvariable=var, values=list(choices),
+                                 font=('Arial', 10), state='readonly', width=18)
+            combo.pack(side='left', padx=(0, 5))
+            combo.bind('<<ComboboxSelected>>', lambda e: self.apply_filters())
+            self.filter_vars[name] = var
+        
+        clear_btn = tk.Button(self.filter_bar, text="Clear Filters", font=('Arial', 10),
+                            command=self.clear_filters, bg='#2196F3', fg='white',
+                            bd=0, padx=10, cursor='hand2')
+        clear_btn.pack(side='left', padx=(15, 0))
+    
+    def apply_filters(self):
+        """Show the tasks picked in the filter bar, in its sort order, in every view"""
+        choice = {name: var.get() for name, var in self.filter_vars.items()}
+        filters = {'status': STATUS_FILTERS[choice['status']],
+                   'priority': PRIORITY_FILTERS[choice['priority']]}
+        filters.update(DUE_FILTERS[choice['due']](date.today()))
+        filters.update(PROGRESS_FILTERS[choice['progress']])
+        self.view_query = TaskQuery(SORT_ORDERS[choice['sort']], **filters)
+        self.update_all_displays()
+    
+    def clear_filters(self):
+        """Show every task again, in saved order"""
+        for name, choices in (('status', STATUS_FILTERS), ('priority', PRIORITY_FILTERS),
+                              ('due', DUE_FILTERS), ('progress', PROGRESS_FILTERS),
+                              ('sort', SORT_ORDERS)):
+            self.filter_vars[name].set(next(iter(choices)))
+        self.apply_filters()
+    
     def create_main_content(self):
         """Create the main content area"""
-        self.main_frame = tk.Frame(self.root, bg='#f0f0f0')
+        self.main_frame = self.theme.register(tk.Frame(self.root), 'window')
         self.main_frame.pack(fill='both', expand=True, padx=10, pady=5)
         
         # Create tab content frames
         self.tab_content = {}
         
         # Main tab
-        self.tab_content['Main'] = tk.Frame(self.main_frame, bg='#f0f0f0')
+        self.tab_content['Main'] = self.theme.register(tk.Frame(self.main_frame), 'window')
         self.create_main_tab()
         
-        # Tasks for the Day tab
-        self.tab_content['Tasks for the Day'] = tk.Frame(self.main_frame, bg='#f0f0f0')
-        self.create_tasks_for_day_tab()
-        
-        # Timeline tab
-        self.tab_content['Timeline'] = tk.Frame(self.main_frame, bg='#f0f0f0')
-        self.create_timeline_tab()
+        # Tasks for the Day and Timeline tabs are built the first time they are shown
+        self.tab_content['Tasks for the Day'] = self.theme.register(tk.Frame(self.main_frame), 'window')
+        self.tab_content['Timeline'] = self.theme.register(tk.Frame(self.main_frame), 'window')
+        self.unbuilt_tabs = {
+            'Tasks for the Day': self.create_tasks_for_day_tab,
+            'Timeline': self.create_timeline_tab,
+        }
         
         # Show main tab initially
         self.show_tab('Main')
@@ -128,7 +373,7 @@ class TodoApp:
     def create_main_tab(self):
         """Create the main tab with category grid"""
         # Categories container
-        self.categories_frame = tk.Frame(self.tab_content['Main'], bg='#f0f0f0')
+        self.categories_frame = self.theme.register(tk.Frame(self.tab_content['Main']), 'window')
         self.categories_frame.pack(fill='both', expand=True, padx=20, pady=20)
         
         self.update_categories_display()
@@ -137,113 +382,145 @@ class TodoApp:
         """Create the tasks for the day tab"""
         # Title
         title_label = tk.Label(self.tab_content['Tasks for the Day'], 
-                             text="Tasks for Today", font=('Arial', 20, 'bold'),
-                             bg='#f0f0f0', fg='#333333')
+                             text="Tasks for Today", font=font('title'))
+        self.theme.register(title_label, 'text')
         title_label.pack(pady=20)
         
-        # Tasks list
-        self.tasks_for_day_frame = tk.Frame(self.tab_content['Tasks for the Day'], bg='#f0f0f0')
+        # Tasks list; its widgets are built once and updated in place
+        self.tasks_for_day_frame = self.theme.register(tk.Frame(self.tab_content['Tasks for the Day']),
+                                                       'window')
         self.tasks_for_day_frame.pack(fill='both', expand=True, padx=20)
         
+        # Shown while nothing is planned
+        self.today_empty_label = tk.Label(self.tasks_for_day_frame, 
+                                        text="No tasks added for today. Use the 'Add to Today' button on tasks to add them here!",
+                                        font=font('notice'))
+        self.theme.register(self.today_empty_label, 'muted_text')
+        
+        # Title with count
+        self.today_title_frame = self.theme.register(tk.Frame(self.tasks_for_day_frame), 'window')
+        self.today_title_label = tk.Label(self.today_title_frame, font=font('title'))
+        self.theme.register(self.today_title_label, 'text')
+        self.today_title_label.pack(side='left')
+        
+        # Clear all button
+        clear_btn = tk.Button(self.today_title_frame, text="Clear All", font=font('button'),
+                            command=self.clear_today_tasks, bg='#f44336', fg='white',
+                            bd=0, padx=15, pady=5, cursor='hand2')
+        clear_btn.pack(side='right')
+        
+        # Virtual task list: only the rows on screen are built
+        self.today_list = VirtualTaskList(self.tasks_for_day_frame, self, bg=None,
+                                          empty_text="None of today's tasks match the filters.")
+        self.today_empty = None  # whether the empty message is showing (None before the first update)
+        
         self.update_tasks_for_day()
     
     def create_timeline_tab(self):
         """Create the timeline tab with Gantt chart"""
-        # Title
-        title_label = tk.Label(self.tab_content['Timeline'], 
-                             text="Project Timeline", font=('Arial', 20, 'bold'),
-                             bg='#f0f0f0', fg='#333333')
-        title_label.pack(pady=20)
+        # Title with zoom controls
+        title_frame = self.theme.register(tk.Frame(self.tab_content['Timeline']), 'window')
+        title_frame.pack(fill='x', padx=20, pady=20)
+        
+        title_label = tk.Label(title_frame, text="Project Timeline", font=('Arial', 20, 'bold'))
+        self.theme.register(title_label, 'text')
+        title_label.pack(side='left', expand=True)
+        
+        zoom_in_btn = tk.Button(title_frame, text="+", font=('Arial', 12, 'bold'),
+                              command=lambda: self.timeline.zoom_in(), bg='#2196F3', fg='white',
+                              bd=0, padx=10, cursor='hand2')
+        zoom_in_btn.pack(side='right', padx=(5, 0))
+        zoom_out_btn = tk.Button(title_frame, text="−", font=('Arial', 12, 'bold'),
+                               command=lambda: self.timeline.zoom_out(), bg='#2196F3', fg='white',
+                               bd=0, padx=10, cursor='hand2')
+        zoom_out_btn.pack(side='right')
+        history_btn = tk.Button(title_frame, text="Show History", font=('Arial', 10),
+                              command=self.show_history, bg='#2196F3', fg='white',
+                              bd=0, padx=10, cursor='hand2')
+        history_btn.pack(side='right', padx=(0, 10))
         
         # Timeline container with fixed height
-        timeline_container = tk.Frame(self.tab_content['Timeline'], bg='#f0f0f0', height=500)
+        timeline_container = self.theme.register(tk.Frame(self.tab_content['Timeline'], height=500),
+                                                 'window')
         timeline_container.pack(fill='x', padx=20, pady=10)
         timeline_container.pack_propagate(False)
         
-        # Timeline canvas with scrollbars
-        self.timeline_canvas = tk.Canvas(timeline_container, bg='white', 
-                                       relief='solid', bd=1, height=400)
-        
-        # Horizontal scrollbar for timeline
-        h_scrollbar = ttk.Scrollbar(timeline_container, orient="horizontal", command=self.timeline_canvas.xview)
-        
-        # Vertical scrollbar for tasks
-        v_scrollbar = ttk.Scrollbar(timeline_container, orient="vertical", command=self.timeline_canvas.yview)
-        
-        # Configure canvas scrolling
-        self.timeline_canvas.configure(xscrollcommand=h_scrollbar.set, yscrollcommand=v_scrollbar.set)
-        
-        # Pack scrollbars and canvas
-        h_scrollbar.pack(side='bottom', fill='x')
-        v_scrollbar.pack(side='right', fill='y')
-        self.timeline_canvas.pack(side='left', fill='both', expand=True)
-        
-        self.update_timeline()
+        # Gantt chart with scrollbars; it only draws what is on screen
+        self.timeline = GanttChart(timeline_container, self.theme)
+        self.timeline.set_tasks(self.timeline_tasks(), fit=True)
     
+    @traced
     def update_categories_display(self):
         """Update the categories grid display"""
         # Clear current category tracking
-        if hasattr(self, 'current_category_id'):
-            delattr(self, 'current_category_id')
-        
-        # Clear existing widgets
-        for widget in self.categories_frame.winfo_children():
-            widget.destroy()
+        self.current_category_id = None
+        self.category_list = None
+        self.category_tiles = {}
+        self.search_text = None
+        self.search_list = None
+        self.clear_main_tab()
         
         if not self.categories:
             # Show empty state
             empty_label = tk.Label(self.categories_frame, 
                                  text="No categories yet. Click 'Add New' to create one!",
-                                 font=('Arial', 14), bg='#f0f0f0', fg='#666666')
+                                 font=font('notice'))
+            self.theme.register(empty_label, 'muted_text')
             empty_label.pack(expand=True)
             return
         
-        # Create grid
-        row = 0
-        col = 0
+        # Grid of tiles, reusing the ones built for an earlier grid
         max_cols = 4
+        while len(self.tile_pool) < len(self.categories):
+            self.tile_pool.append(CategoryTile(self.categories_frame, self.expand_category))
         
-        for cat_id, category in self.categories.items():
-            # Category rectangle
-            cat_frame = tk.Frame(self.categories_frame, bg=category['color'], 
-                               relief='solid', bd=1, padx=20, pady=15)
-            cat_frame.grid(row=row, column=col, padx=10, pady=10, sticky='ew')
-            
-            # Category name
-            name_label = tk.Label(cat_frame, text=category['name'], 
-                                font=('Arial', 14, 'bold'), bg=category['color'],
-                                fg='white')
-            name_label.pack()
-            
-            # Task count
-            task_count = len([t for t in self.tasks if t['category_id'] == cat_id])
-            count_label = tk.Label(cat_frame, text=f"{task_count} tasks", 
-                                 font=('Arial', 10), bg=category['color'], fg='white')
-            count_label.pack()
-            
-            # Bind click event
-            cat_frame.bind('<Button-1>', lambda e, cid=cat_id: self.expand_category(cid))
-            name_label.bind('<Button-1>', lambda e, cid=cat_id: self.expand_category(cid))
-            count_label.bind('<Button-1>', lambda e, cid=cat_id: self.expand_category(cid))
-            
-            # Update grid position
-            col += 1
-            if col >= max_cols:
-                col = 0
-                row += 1
+        for index, (cat_id, category) in enumerate(self.categories.items()):
+            tile = self.tile_pool[index]
+            tile.show(cat_id, category, queries.task_count(self.store, cat_id))
+            tile.frame.grid(row=index // max_cols, column=index % max_cols, padx=10, pady=10, sticky='ew')
+            self.category_tiles[cat_id] = tile
         
         # Configure grid weights
         for i in range(max_cols):
             self.categories_frame.columnconfigure(i, weight=1)
     
+    def clear_main_tab(self):
+        """Take the grid, category or search results off the Main tab.
+        
+        Pooled tiles and the shared task list are only hidden, to be reused
+        by the next view; everything else is destroyed.
+        """
+        pooled = {str(tile.frame) for tile in self.tile_pool}
+        if self.main_list is not None:
+            pooled.add(str(self.main_list.container))
+        for widget in self.categories_frame.winfo_children():
+            if str(widget) not in pooled:
+                widget.destroy()
+            elif widget.winfo_manager() == 'grid':
+                widget.grid_forget()
+            else:
+                widget.pack_forget()
+    
+    def show_main_list(self, bg, empty_text):
+        """Show the Main tab's shared task list below the view's header and return it
+
+        A ``bg`` of None follows the theme.
+        """
+        if self.main_list is None:
+            self.main_list = VirtualTaskList(self.categories_frame, self, bg=bg, empty_text=empty_text)
+        else:
+            self.main_list.reset(bg, empty_text)
+        self.main_list.pack(fill='both', expand=True)
+        return self.main_list
+    
+    @traced
     def expand_category(self, category_id):
         """Expand a category to show its tasks"""
         # Store current category for navigation
         self.current_category_id = category_id
-        
-        # Clear existing widgets
-        for widget in self.categories_frame.winfo_children():
-            widget.destroy()
+        self.search_text = None
+        self.search_list = None
+        self.clear_main_tab()
         
         category = self.categories[category_id]
         
@@ -253,412 +530,181 @@ class TodoApp:
         header_frame.pack(fill='x', pady=(0, 10))
         
         # Back button
-        back_btn = tk.Button(header_frame, text="← Back", font=('Arial', 10),
+        back_btn = tk.Button(header_frame, text="← Back", font=font('button'),
                            command=self.update_categories_display, bg=category['color'],
                            fg='white', bd=0, cursor='hand2')
         back_btn.pack(side='left')
         
         # Category name
         name_label = tk.Label(header_frame, text=category['name'], 
-                            font=('Arial', 16, 'bold'), bg=category['color'], fg='white')
+                            font=font('heading'), bg=category['color'], fg='white')
         name_label.pack(side='left', padx=20)
         
         # Edit category button (only shown when expanded)
-        edit_btn = tk.Button(header_frame, text="Edit Category", font=('Arial', 10),
+        edit_btn = tk.Button(header_frame, text="Edit Category", font=font('button'),
                            command=lambda: self.edit_category(category_id), bg=category['color'],
                            fg='white', bd=1, relief='solid', padx=10, pady=2, cursor='hand2')
         edit_btn.pack(side='right')
         
-        # Tasks container with scrollbar
-        tasks_container = tk.Frame(self.categories_frame, bg=self.lighten_color(category['color']))
-        tasks_container.pack(fill='both', expand=True)
-        
-        # Create canvas for scrollable tasks
-        canvas = tk.Canvas(tasks_container, bg=self.lighten_color(category['color']), highlightthickness=0)
-        scrollbar = ttk.Scrollbar(tasks_container, orient="vertical", command=canvas.yview)
-        scrollable_tasks_frame = tk.Frame(canvas, bg=self.lighten_color(category['color']))
-        
-        scrollable_tasks_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_tasks_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Pack canvas and scrollbar
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Bind mouse wheel to canvas
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
-        
-        # Get tasks for this category
-        category_tasks = [t for t in self.tasks if t['category_id'] == category_id]
-        
-        if not category_tasks:
-            empty_label = tk.Label(scrollable_tasks_frame, text="No tasks in this category yet.",
-                                 font=('Arial', 12), bg=self.lighten_color(category['color']))
-            empty_label.pack(pady=50)
-        else:
-            # Create task list
-            for task in category_tasks:
-                self.create_task_widget(scrollable_tasks_frame, task, category['color'])
+        # Completed tasks left on disk or archived are only read on request
+        history = queries.history_count(self.store, category_id)
+        if history:
+            history_btn = tk.Button(header_frame, text=f"Show History ({history})", font=font('button'),
+                                  command=lambda: self.show_history(category_id), bg=category['color'],
+                                  fg='white', bd=1, relief='solid', padx=10, pady=2, cursor='hand2')
+            history_btn.pack(side='right', padx=(0, 10))
+        
+        # Virtual task list: only the rows on screen are built
+        empty_text = "No tasks in this category yet." if self.view_query.plain else "No tasks match the filters."
+        self.category_list = self.show_main_list(lighten_color(category['color']), empty_text)
+        self.category_list.set_tasks(self.category_tasks(category_id))
     
-    def create_task_widget(self, parent, task, category_color):
-        """Create a widget for displaying a task"""
-        # Choose background color based on status
-        status_colors = {
-            'Not Started': '#ffebee',  # Light red
-            'In Progress': '#fff8e1',  # Light yellow
-            'Completed': '#e8f5e8',    # Light green
-            'On Hold': '#f3e5ab'       # Light yellow-brown
-        }
-        bg_color = status_colors.get(task['status'], 'white')
-        
-        task_frame = tk.Frame(parent, bg=bg_color, relief='solid', bd=1, padx=15, pady=10)
-        task_frame.pack(fill='x', pady=5, padx=10)
-        
-        # Task header
-        header_frame = tk.Frame(task_frame, bg=bg_color)
-        header_frame.pack(fill='x')
-        
-        # Task name
-        name_label = tk.Label(header_frame, text=task['name'], font=('Arial', 12, 'bold'),
-                            bg=bg_color, fg='#333333')
-        name_label.pack(side='left')
-        
-        # Priority with updated colors
-        priority_colors = {'High': '#ff4444', 'Medium': '#ffaa00', 'Low': '#ffdd00'}  # Low is now yellow
-        priority_label = tk.Label(header_frame, text=task['priority'], 
-                                font=('Arial', 10), bg=priority_colors.get(task['priority'], '#cccccc'),
-                                fg='white', padx=8, pady=2, relief='solid', bd=1)
-        priority_label.pack(side='right', padx=(5, 0))
-        
-        # Status box
-        status_box_colors = {
-            'Not Started': '#ff4444',
-            'In Progress': '#ffaa00', 
-            'Completed': '#44aa44',
-            'On Hold': '#8B4513'  # Brown
-        }
-        status_label = tk.Label(header_frame, text=task['status'], 
-                              font=('Arial', 10), bg=status_box_colors.get(task['status'], '#cccccc'),
-                              fg='white', padx=8, pady=2, relief='solid', bd=1)
-        status_label.pack(side='right', padx=(5, 0))
-        
-        # Progress box with color gradient
-        progress = task['progress']
-        if progress <= 25:
-            progress_color = '#ff4444'  # Red
-        elif progress <= 50:
-            progress_color = '#ff8800'  # Orange
-        elif progress <= 75:
-            progress_color = '#ffaa00'  # Yellow
-        else:
-            progress_color = '#44aa44'  # Green
-            
-        progress_label = tk.Label(header_frame, text=f"{progress}%", 
-                                font=('Arial', 10), bg=progress_color,
-                                fg='white', padx=8, pady=2, relief='solid', bd=1)
-        progress_label.pack(side='right', padx=(5, 0))
-        
-        # Task details
-        details_frame = tk.Frame(task_frame, bg=bg_color)
-        details_frame.pack(fill='x', pady=(5, 0))
+    def category_tasks(self, category_id):
+        """Return the tasks of a category that pass the filters, in the chosen order"""
+        return self.view_query.where(category_id=category_id).run(self.store)
+    
+    def schedule_search(self, event=None):
+        """Search a moment after typing stops, so every keystroke does not search"""
+        if event is not None and event.keysym in ('Return', 'Escape'):
+            return
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DELAY, self.run_search)
+    
+    def run_search(self):
+        """Show the results for the search box on the Main tab (or the categories if it is empty)"""
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+            self.search_job = None
+        text = self.search_var.get().strip()
+        if not text:
+            if self.search_text is not None:
+                self.update_categories_display()
+            return
+        if self.current_tab.get() != 'Main':
+            self.switch_tab('Main')
+        if self.search_list is not None:
+            # Already showing results: just refill the list
+            if text != self.search_text:
+                self.search_text = text
+                self.update_search_results()
+            return
+        self.show_search_results(text)
+    
+    def clear_search(self):
+        """Empty the search box and go back to the categories"""
+        self.search_var.set('')
+        self.run_search()
+    
+    @traced
+    def show_search_results(self, text):
+        """Show the tasks matching a search, best match first"""
+        self.current_category_id = None
+        self.category_list = None
+        self.category_tiles = {}
+        self.search_text = text
+        self.clear_main_tab()
+        
+        header_frame = tk.Frame(self.categories_frame, relief='solid', bd=1, padx=20, pady=15)
+        self.theme.register(header_frame, 'header')
+        header_frame.pack(fill='x', pady=(0, 10))
         
-        # Dates
-        dates_text = f"Start: {task['start_date']} | Due: {task['due_date']}"
-        if task.get('date_completed'):
-            dates_text += f" | Completed: {task['date_completed']}"
+        back_btn = tk.Button(header_frame, text="← Back", font=font('button'),
+                           command=self.clear_search, bd=0, cursor='hand2')
+        self.theme.register(back_btn, 'header_button')
+        back_btn.pack(side='left')
         
-        dates_label = tk.Label(details_frame, text=dates_text, font=('Arial', 9),
-                             bg=bg_color, fg='#666666')
-        dates_label.pack(side='left')
+        self.search_title_label = tk.Label(header_frame, font=font('heading'))
+        self.theme.register(self.search_title_label, 'header_text')
+        self.search_title_label.pack(side='left', padx=20)
         
-        # Comments
-        if task.get('comments'):
-            comment_label = tk.Label(task_frame, text=f"Comments: {task['comments']}", 
-                                   font=('Arial', 9), bg=bg_color, fg='#666666',
-                                   wraplength=600, justify='left')  # Increased wraplength
-            comment_label.pack(anchor='w', pady=(5, 0))
-        
-        # Buttons frame
-        buttons_frame = tk.Frame(task_frame, bg=bg_color)
-        buttons_frame.pack(anchor='e', pady=(5, 0))
-        
-        # Check if task is in today's list
-        is_in_today = hasattr(self, 'today_tasks') and any(t['id'] == task['id'] for t in self.today_tasks)
-        
-        # Add to Today / Remove from Today button
-        if is_in_today:
-            today_btn = tk.Button(buttons_frame, text="Doing Today", font=('Arial', 9),
-                                command=lambda: self.remove_from_today(task), bg='#87CEEB',  # Light blue
-                                fg='white', bd=0, padx=10, pady=2, cursor='hand2')
+        self.search_list = self.show_main_list(None, "No tasks match your search.")
+        self.update_search_results()
+    
+    @traced
+    def update_search_results(self):
+        """Search again and show the results in the existing list"""
+        results = queries.search_tasks(self.store, self.search_text, SEARCH_LIMIT)
+        if len(results) == SEARCH_LIMIT:
+            title = f"Best {SEARCH_LIMIT} matches for '{self.search_text}'"
         else:
-            today_btn = tk.Button(buttons_frame, text="Add to Today", font=('Arial', 9),
-                                command=lambda: self.add_to_today(task), bg='#2196F3',
-                                fg='white', bd=0, padx=10, pady=2, cursor='hand2')
-        today_btn.pack(side='right', padx=(5, 0))
-        
-        # Complete Task button (only show if not completed)
-        if task['status'] != 'Completed':
-            complete_btn = tk.Button(buttons_frame, text="Complete Task", font=('Arial', 9),
-                                   command=lambda: self.complete_task(task), bg='#4CAF50',
-                                   fg='white', bd=0, padx=10, pady=2, cursor='hand2')
-            complete_btn.pack(side='right', padx=(5, 0))
-        
-        # Edit button
-        edit_btn = tk.Button(buttons_frame, text="Edit", font=('Arial', 9),
-                           command=lambda: self.edit_task(task), bg='#FF9800',
-                           fg='white', bd=0, padx=10, pady=2, cursor='hand2')
-        edit_btn.pack(side='right')
+            title = f"{len(results)} match{'' if len(results) == 1 else 'es'} for '{self.search_text}'"
+        self.search_title_label.configure(text=title)
+        self.search_list.set_tasks(results)
     
     def complete_task(self, task):
         """Complete a task by setting status to completed, progress to 100%, and adding completion date"""
-        task['status'] = 'Completed'
-        task['progress'] = 100
-        task['date_completed'] = datetime.now().strftime('%Y-%m-%d')
-        
-        # Update the task in today's list if it exists there
-        if hasattr(self, 'today_tasks'):
-            for today_task in self.today_tasks:
-                if today_task['id'] == task['id']:
-                    today_task['status'] = 'Completed'
-                    today_task['progress'] = 100
-                    today_task['date_completed'] = datetime.now().strftime('%Y-%m-%d')
-                    break
-        
-        self.save_data()
-        self.update_all_displays()
+        try:
+            commands.complete_task(self.store, task)
+        except CommandError as error:
+            messagebox.showerror("Error", str(error))
+            return
         messagebox.showinfo("Success", f"Task '{task['name']}' marked as completed!")
 
     def remove_from_today(self, task):
         """Remove a task from the 'Tasks for the Day' list"""
-        if hasattr(self, 'today_tasks'):
-            self.today_tasks = [t for t in self.today_tasks if t['id'] != task['id']]
-            self.update_tasks_for_day()
+        try:
+            removed = commands.remove_from_today(self.store, task)
+        except CommandError as error:
+            messagebox.showerror("Error", str(error))
+            return
+        if removed:
             messagebox.showinfo("Success", f"Task '{task['name']}' removed from today's list!")
 
     def add_to_today(self, task):
         """Add a task to the 'Tasks for the Day' list"""
-        # Check if task is already in today's list
-        if not hasattr(self, 'today_tasks'):
-            self.today_tasks = []
-        
-        # Check if task is already added
-        for today_task in self.today_tasks:
-            if today_task['id'] == task['id']:
-                messagebox.showinfo("Info", "This task is already in your today's list!")
-                return
-        
-        # Add task to today's list
-        self.today_tasks.append(task.copy())
+        try:
+            added = commands.add_to_today(self.store, task)
+        except CommandError as error:
+            messagebox.showerror("Error", str(error))
+            return
+        if not added:
+            messagebox.showinfo("Info", "This task is already in your today's list!")
+            return
         messagebox.showinfo("Success", f"Task '{task['name']}' added to today's list!")
-        
-        # Update all displays to reflect the change immediately
-        self.update_all_displays()
     
+    @traced
     def update_tasks_for_day(self):
         """Update the tasks for the day display"""
-        # Clear existing widgets
-        for widget in self.tasks_for_day_frame.winfo_children():
-            widget.destroy()
-        
-        # Check if we have today's tasks
-        if not hasattr(self, 'today_tasks') or not self.today_tasks:
-            empty_label = tk.Label(self.tasks_for_day_frame, 
-                                 text="No tasks added for today. Use the 'Add to Today' button on tasks to add them here!",
-                                 font=('Arial', 14), bg='#f0f0f0', fg='#666666')
-            empty_label.pack(expand=True)
-            return
-        
-        # Title with count
-        title_frame = tk.Frame(self.tasks_for_day_frame, bg='#f0f0f0')
-        title_frame.pack(fill='x', pady=(0, 20))
-        
-        title_label = tk.Label(title_frame, text=f"Tasks for Today ({len(self.today_tasks)} tasks)", 
-                             font=('Arial', 20, 'bold'), bg='#f0f0f0', fg='#333333')
-        title_label.pack(side='left')
-        
-        # Clear all button
-        clear_btn = tk.Button(title_frame, text="Clear All", font=('Arial', 10),
-                            command=self.clear_today_tasks, bg='#f44336', fg='white',
-                            bd=0, padx=15, pady=5, cursor='hand2')
-        clear_btn.pack(side='right')
-        
-        # Create scrollable container for tasks
-        tasks_container = tk.Frame(self.tasks_for_day_frame, bg='#f0f0f0')
-        tasks_container.pack(fill='both', expand=True)
-        
-        # Create canvas for scrollable tasks
-        canvas = tk.Canvas(tasks_container, bg='#f0f0f0', highlightthickness=0)
-        scrollbar = ttk.Scrollbar(tasks_container, orient="vertical", command=canvas.yview)
-        scrollable_tasks_frame = tk.Frame(canvas, bg='#f0f0f0')
-        
-        scrollable_tasks_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_tasks_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Pack canvas and scrollbar
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Bind mouse wheel to canvas
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
+        # Switch between the empty message and the list if that changed
+        empty = not queries.today_tasks(self.store)
+        if empty != self.today_empty:
+            self.today_empty = empty
+            if empty:
+                self.today_title_frame.pack_forget()
+                self.today_list.pack_forget()
+                self.today_empty_label.pack(expand=True)
+            else:
+                self.today_empty_label.pack_forget()
+                self.today_title_frame.pack(fill='x', pady=(0, 20))
+                self.today_list.pack(fill='both', expand=True)
         
-        # Display today's tasks
-        for task in self.today_tasks:
-            category = self.categories.get(task['category_id'], {})
-            self.create_task_widget(scrollable_tasks_frame, task, 
-                                  category.get('color', '#cccccc'))
+        today_tasks = [] if empty else self.today_task_list()
+        self.today_title_label.configure(text=f"Tasks for Today ({len(today_tasks)} tasks)")
+        self.today_list.set_tasks(today_tasks)
+    
+    def today_task_list(self):
+        """Return today's tasks that pass the filters, resolved to the live task records"""
+        return self.view_query.where(today=True).run(self.store)
     
     def clear_today_tasks(self):
         """Clear all tasks from today's list"""
-        if hasattr(self, 'today_tasks') and self.today_tasks:
+        if self.today_tasks:
             result = messagebox.askyesno("Confirm", "Are you sure you want to clear all tasks from today's list?")
             if result:
-                self.today_tasks = []
-                self.update_tasks_for_day()
+                commands.clear_today(self.store)
                 messagebox.showinfo("Success", "All tasks cleared from today's list!")
         else:
             messagebox.showinfo("Info", "No tasks to clear!")
     
+    @traced
     def update_timeline(self):
-        """Update the timeline/Gantt chart with enhanced features"""
-        self.timeline_canvas.delete('all')
-        
-        if not self.tasks:
-            self.timeline_canvas.create_text(400, 200, text="No tasks to display",
-                                          font=('Arial', 14), fill='#666666')
-            return
-        
-        # Calculate timeline dimensions
-        canvas_width = max(800, len(self.tasks) * 200)  # Minimum width
-        canvas_height = 400
-        
-        # Find date range
-        all_dates = []
-        for task in self.tasks:
-            all_dates.extend([task['start_date'], task['due_date']])
-        
-        if all_dates:
-            min_date = min(all_dates)
-            max_date = max(all_dates)
-            
-            # Convert dates to datetime objects
-            min_dt = datetime.strptime(min_date, '%Y-%m-%d')
-            max_dt = datetime.strptime(max_date, '%Y-%m-%d')
-            
-            # Expand to full months
-            start_month = datetime(min_dt.year, min_dt.month, 1)
-            if max_dt.month == 12:
-                end_month = datetime(max_dt.year + 1, 1, 1)
-            else:
-                end_month = datetime(max_dt.year, max_dt.month + 1, 1)
-            
-            # Calculate total days
-            total_days = (end_month - start_month).days
-            
-            # Set canvas scroll region
-            self.timeline_canvas.configure(scrollregion=(0, 0, canvas_width, canvas_height))
-            
-            # Draw timeline
-            margin_left = 150  # Space for task names
-            margin_top = 50    # Space for date headers
-            chart_width = canvas_width - margin_left
-            chart_height = canvas_height - margin_top
-            
-            # Draw horizontal axis (dates)
-            self.draw_date_axis(start_month, end_month, margin_left, margin_top, chart_width)
-            
-            # Draw vertical axis (task names)
-            self.draw_task_axis(margin_left, margin_top, chart_height)
-            
-            # Draw task bars
-            y_spacing = chart_height / (len(self.tasks) + 1)
-            for i, task in enumerate(self.tasks):
-                y = margin_top + (i + 1) * y_spacing
-                
-                # Calculate bar position
-                start_dt = datetime.strptime(task['start_date'], '%Y-%m-%d')
-                end_dt = datetime.strptime(task['due_date'], '%Y-%m-%d')
-                
-                start_x = margin_left + ((start_dt - start_month).days / total_days) * chart_width
-                end_x = margin_left + ((end_dt - start_month).days / total_days) * chart_width
-                
-                # Choose color based on status
-                status_colors = {
-                    'Not Started': '#ff4444',
-                    'In Progress': '#ffaa00',
-                    'Completed': '#44aa44',
-                    'On Hold': '#8B4513'
-                }
-                color = status_colors.get(task['status'], '#cccccc')
-                
-                # Draw task bar
-                self.timeline_canvas.create_rectangle(start_x, y - 10, end_x, y + 10,
-                                                   fill=color, outline='black', width=2)
-                
-                # Add task name on the left (always visible)
-                self.timeline_canvas.create_text(margin_left - 5, y, text=task['name'],
-                                              anchor='e', font=('Arial', 9))
-
-    def draw_date_axis(self, start_month, end_month, margin_left, margin_top, chart_width):
-        """Draw the date axis with months and days"""
-        current_month = start_month
-        x_offset = 0
-        
-        while current_month < end_month:
-            # Get days in current month
-            if current_month.month == 12:
-                next_month = datetime(current_month.year + 1, 1, 1)
-            else:
-                next_month = datetime(current_month.year, current_month.month + 1, 1)
-            
-            days_in_month = (next_month - current_month).days
-            month_width = (days_in_month / (end_month - start_month).days) * chart_width
-            
-            # Draw month header
-            month_name = current_month.strftime('%B %Y')
-            self.timeline_canvas.create_text(margin_left + x_offset + month_width/2, margin_top/2, 
-                                          text=month_name, font=('Arial', 10, 'bold'), anchor='center')
-            
-            # Draw day markers (every 5 days for readability)
-            for day in range(1, days_in_month + 1, 5):
-                day_date = datetime(current_month.year, current_month.month, day)
-                day_x = margin_left + x_offset + ((day_date - start_month).days / (end_month - start_month).days) * chart_width
-                
-                # Draw day marker
-                self.timeline_canvas.create_line(day_x, margin_top - 5, day_x, margin_top + 5, 
-                                              fill='black', width=1)
-                
-                # Draw day number
-                self.timeline_canvas.create_text(day_x, margin_top + 15, text=str(day), 
-                                              font=('Arial', 8), anchor='center')
-            
-            x_offset += month_width
-            current_month = next_month
-        
-        # Draw main axis line
-        self.timeline_canvas.create_line(margin_left, margin_top, margin_left + chart_width, margin_top,
-                                      fill='black', width=2)
-
-    def draw_task_axis(self, margin_left, margin_top, chart_height):
-        """Draw the task axis with task names"""
-        # Draw vertical axis line
-        self.timeline_canvas.create_line(margin_left, margin_top, margin_left, margin_top + chart_height,
-                                      fill='black', width=2)
+        """Update the timeline/Gantt chart"""
+        self.timeline.set_tasks(self.timeline_tasks())
+    
+    def timeline_tasks(self):
+        """Return the tasks that pass the filters, in the chosen order"""
+        return self.view_query.run(self.store)
     
     def show_add_dialog(self):
         """Show dialog to add new category or task"""
@@ -697,6 +743,9 @@ class TodoApp:
                            command=lambda: [dialog.destroy(), self.add_task()],
                            bg='#4CAF50', fg='white', padx=30, pady=15, bd=0, cursor='hand2')
         task_btn.pack(pady=10)
+        
+        # Colors of the current theme
+        self.theme.register_tree(dialog)
     
     def add_category(self):
         """Add a new category"""
@@ -746,19 +795,11 @@ class TodoApp:
         btn_frame.pack(fill='x', pady=(20, 0))
         
         def save_category():
-            name = name_entry.get().strip()
-            if not name:
-                messagebox.showerror("Error", "Please enter a category name")
+            try:
+                commands.add_category(self.store, name_entry.get(), selected_color.get())
+            except CommandError as error:
+                messagebox.showerror("Error", str(error))
                 return
-            
-            cat_id = str(len(self.categories) + 1)
-            self.categories[cat_id] = {
-                'name': name,
-                'color': selected_color.get()
-            }
-            
-            self.save_data()
-            self.update_categories_display()
             dialog.destroy()
             messagebox.showinfo("Success", "Category added successfully!")
         
@@ -769,6 +810,9 @@ class TodoApp:
         cancel_btn = tk.Button(btn_frame, text="Cancel", command=dialog.destroy,
                              bg='#f44336', fg='white', bd=0, padx=20, pady=8)
         cancel_btn.pack(side='right')
+        
+        # Colors of the current theme
+        self.theme.register_tree(dialog, skip=(color_preview,))
     
     def add_task(self):
         """Add a new task"""
@@ -776,6 +820,7 @@ class TodoApp:
             messagebox.showwarning("Warning", "Please create a category first!")
             return
         
+        DateEntry = date_entry_class()
         dialog = tk.Toplevel(self.root)
         dialog.title("Add New Task")
         dialog.geometry("800x900")  # Increased size significantly
@@ -820,6 +865,13 @@ class TodoApp:
         
         canvas.bind_all("<MouseWheel>", _on_mousewheel)
         
+        # Drop the binding with the dialog, so the wheel does not scroll a destroyed canvas
+        def _on_destroy(event):
+            if event.widget is dialog:
+                dialog.unbind_all("<MouseWheel>")
+        
+        dialog.bind("<Destroy>", _on_destroy, add="+")
+        
         # Form
         form_frame = tk.Frame(scrollable_frame, bg='#f0f0f0')
         form_frame.pack(expand=True, padx=20, pady=20)
@@ -833,7 +885,7 @@ class TodoApp:
         tk.Label(form_frame, text="Category:", font=('Arial', 12), bg='#f0f0f0').pack(anchor='w')
         category_var = tk.StringVar()
         category_combo = ttk.Combobox(form_frame, textvariable=category_var, 
-                                    values=[cat['name'] for cat in self.categories.values()],
+                                    values=self.category_index.names,
                                     font=('Arial', 12), state='readonly')
         category_combo.pack(fill='x', pady=(5, 15))
         
@@ -841,7 +893,7 @@ class TodoApp:
         tk.Label(form_frame, text="Priority:", font=('Arial', 12), bg='#f0f0f0').pack(anchor='w')
         priority_var = tk.StringVar(value='Medium')
         priority_combo = ttk.Combobox(form_frame, textvariable=priority_var,
-                                    values=['High', 'Medium', 'Low'], font=('Arial', 12),
+                                    values=list(PRIORITIES), font=('Arial', 12),
                                     state='readonly')
         priority_combo.pack(fill='x', pady=(5, 15))
         
@@ -874,7 +926,7 @@ class TodoApp:
         tk.Label(form_frame, text="Status:", font=('Arial', 12), bg='#f0f0f0').pack(anchor='w')
         status_var = tk.StringVar(value='Not Started')
         status_combo = ttk.Combobox(form_frame, textvariable=status_var,
-                                  values=['Not Started', 'In Progress', 'Completed', 'On Hold'],
+                                  values=list(STATUSES),
                                   font=('Arial', 12), state='readonly')
         status_combo.pack(fill='x', pady=(5, 15))
         
@@ -892,9 +944,10 @@ class TodoApp:
             category_name = category_var.get()
             priority = priority_var.get()
             if DateEntry and hasattr(start_date_entry, 'get_date'):
-                start_date = start_date_entry.get_date().strftime('%Y-%m-%d')
-                due_date = due_date_entry.get_date().strftime('%Y-%m-%d')
+                start_date = start_date_entry.get_date().strftime(DATE_FORMAT)
+                due_date = due_date_entry.get_date().strftime(DATE_FORMAT)
             else:
+                # Plain entries accept any text; the command checks the dates
                 start_date = start_date_entry.get()
                 due_date = due_date_entry.get()
             progress = progress_var.get()
@@ -905,29 +958,13 @@ class TodoApp:
                 messagebox.showerror("Error", "Please fill in all required fields")
                 return
             
-            # Find category ID
-            category_id = None
-            for cat_id, cat in self.categories.items():
-                if cat['name'] == category_name:
-                    category_id = cat_id
-                    break
-            
-            task = {
-                'id': str(len(self.tasks) + 1),
-                'name': name,
-                'category_id': category_id,
-                'priority': priority,
-                'start_date': start_date,
-                'due_date': due_date,
-                'progress': progress,
-                'status': status,
-                'comments': comments,
-                'date_completed': None
-            }
-            
-            self.tasks.append(task)
-            self.save_data()
-            self.update_all_displays()
+            try:
+                commands.add_task(self.store, name, self.category_index.id_for(category_name),
+                                  start_date, due_date, priority=priority, progress=progress,
+                                  status=status, comments=comments)
+            except CommandError as error:
+                messagebox.showerror("Error", str(error))
+                return
             dialog.destroy()
             messagebox.showinfo("Success", "Task added successfully!")
         
@@ -938,9 +975,13 @@ class TodoApp:
         cancel_btn = tk.Button(btn_frame, text="Cancel", command=dialog.destroy,
                              bg='#f44336', fg='white', bd=0, padx=20, pady=8, cursor='hand2')
         cancel_btn.pack(side='right')
+        
+        # Colors of the current theme
+        self.theme.register_tree(dialog)
     
     def edit_task(self, task):
         """Edit an existing task"""
+        DateEntry = date_entry_class()
         dialog = tk.Toplevel(self.root)
         dialog.title("Edit Task")
         dialog.geometry("900x900")  # Increased size significantly
@@ -985,6 +1026,13 @@ class TodoApp:
         
         canvas.bind_all("<MouseWheel>", _on_mousewheel)
         
+        # Drop the binding with the dialog, so the wheel does not scroll a destroyed canvas
+        def _on_destroy(event):
+            if event.widget is dialog:
+                dialog.unbind_all("<MouseWheel>")
+        
+        dialog.bind("<Destroy>", _on_destroy, add="+")
+        
         # Form
         form_frame = tk.Frame(scrollable_frame, bg='#f0f0f0')
         form_frame.pack(expand=True, padx=20, pady=20)
@@ -999,7 +1047,7 @@ class TodoApp:
         tk.Label(form_frame, text="Category:", font=('Arial', 12), bg='#f0f0f0').pack(anchor='w')
         category_var = tk.StringVar()
         category_combo = ttk.Combobox(form_frame, textvariable=category_var, 
-                                    values=[cat['name'] for cat in self.categories.values()],
+                                    values=self.category_index.names,
                                     font=('Arial', 12), state='readonly')
         category_combo.pack(fill='x', pady=(5, 15))
         
@@ -1011,7 +1059,7 @@ class TodoApp:
         tk.Label(form_frame, text="Priority:", font=('Arial', 12), bg='#f0f0f0').pack(anchor='w')
         priority_var = tk.StringVar(value=task['priority'])
         priority_combo = ttk.Combobox(form_frame, textvariable=priority_var,
-                                    values=['High', 'Medium', 'Low'], font=('Arial', 12),
+                                    values=list(PRIORITIES), font=('Arial', 12),
                                     state='readonly')
         priority_combo.pack(fill='x', pady=(5, 15))
         
@@ -1046,7 +1094,7 @@ class TodoApp:
         tk.Label(form_frame, text="Status:", font=('Arial', 12), bg='#f0f0f0').pack(anchor='w')
         status_var = tk.StringVar(value=task['status'])
         status_combo = ttk.Combobox(form_frame, textvariable=status_var,
-                                  values=['Not Started', 'In Progress', 'Completed', 'On Hold'],
+                                  values=list(STATUSES),
                                   font=('Arial', 12), state='readonly')
         status_combo.pack(fill='x', pady=(5, 15))
         
@@ -1073,44 +1121,38 @@ class TodoApp:
         btn_frame.pack(fill='x', pady=(20, 0))
         
         def save_changes():
-            # Update task
-            task['name'] = name_entry.get().strip()
-            task['priority'] = priority_var.get()
             if DateEntry and hasattr(start_date_entry, 'get_date'):
-                task['start_date'] = start_date_entry.get_date().strftime('%Y-%m-%d')
-                task['due_date'] = due_date_entry.get_date().strftime('%Y-%m-%d')
+                start_date = start_date_entry.get_date().strftime(DATE_FORMAT)
+                due_date = due_date_entry.get_date().strftime(DATE_FORMAT)
+                try:
+                    date_completed = completed_date_entry.get_date().strftime(DATE_FORMAT)
+                except Exception:
+                    date_completed = None
             else:
-                task['start_date'] = start_date_entry.get()
-                task['due_date'] = due_date_entry.get()
-            task['progress'] = progress_var.get()
-            task['status'] = status_var.get()
-            task['comments'] = comments_text.get('1.0', 'end-1c').strip()
+                # Plain entries accept any text; the command checks the dates
+                start_date = start_date_entry.get()
+                due_date = due_date_entry.get()
+                date_completed = completed_date_entry.get().strip() or None
             
-            # Update category
-            category_name = category_var.get()
-            for cat_id, cat in self.categories.items():
-                if cat['name'] == category_name:
-                    task['category_id'] = cat_id
-                    break
+            changes = {
+                'name': name_entry.get(),
+                'priority': priority_var.get(),
+                'start_date': start_date,
+                'due_date': due_date,
+                'progress': progress_var.get(),
+                'status': status_var.get(),
+                'comments': comments_text.get('1.0', 'end-1c').strip(),
+                'date_completed': date_completed,
+            }
+            category_id = self.category_index.id_for(category_var.get())
+            if category_id is not None:
+                changes['category_id'] = category_id
             
-            # Update completion date
             try:
-                if DateEntry and hasattr(completed_date_entry, 'get_date'):
-                    task['date_completed'] = completed_date_entry.get_date().strftime('%Y-%m-%d')
-                else:
-                    task['date_completed'] = completed_date_entry.get() or None
-            except:
-                task['date_completed'] = None
-            
-            # Update task in today's list if it exists there
-            if hasattr(self, 'today_tasks'):
-                for today_task in self.today_tasks:
-                    if today_task['id'] == task['id']:
-                        today_task.update(task.copy())
-                        break
-            
-            self.save_data()
-            self.update_all_displays()
+                commands.update_task(self.store, task, **changes)
+            except CommandError as error:
+                messagebox.showerror("Error", str(error))
+                return
             dialog.destroy()
             messagebox.showinfo("Success", "Task updated successfully!")
         
@@ -1121,13 +1163,12 @@ class TodoApp:
         cancel_btn = tk.Button(btn_frame, text="Cancel", command=dialog.destroy,
                              bg='#f44336', fg='white', bd=0, padx=20, pady=8, cursor='hand2')
         cancel_btn.pack(side='right')
+        
+        # Colors of the current theme
+        self.theme.register_tree(dialog)
     
     def switch_tab(self, tab_name):
         """Switch between tabs"""
-        # Store current category state before switching
-        if hasattr(self, 'current_category_id'):
-            self.remembered_category_id = self.current_category_id
-        
         self.current_tab.set(tab_name)
         self.show_tab(tab_name)
     
@@ -1140,11 +1181,23 @@ class TodoApp:
         # Show selected tab
         self.tab_content[tab_name].pack(fill='both', expand=True)
         
-        # Update tab-specific content
+        # Build the tab on first use; afterwards rebuild it only if it
+        # missed changes while hidden
+        if tab_name in self.unbuilt_tabs:
+            self.dirty_tabs.discard(tab_name)
+            self.unbuilt_tabs.pop(tab_name)()
+        elif tab_name in self.dirty_tabs:
+            self.dirty_tabs.discard(tab_name)
+            self.refresh_tab(tab_name)
+    
+    def refresh_tab(self, tab_name):
+        """Rebuild the content of a tab from scratch"""
         if tab_name == 'Main':
-            # Check if we should restore a remembered category
-            if hasattr(self, 'remembered_category_id'):
-                self.expand_category(self.remembered_category_id)
+            # Keep the search results or the expanded category open if there is one
+            if self.search_text is not None:
+                self.show_search_results(self.search_text)
+            elif self.current_category_id in self.categories:
+                self.expand_category(self.current_category_id)
             else:
                 self.update_categories_display()
         elif tab_name == 'Tasks for the Day':
@@ -1152,70 +1205,134 @@ class TodoApp:
         elif tab_name == 'Timeline':
             self.update_timeline()
     
+    @traced
     def update_all_displays(self):
-        """Update all displays after data changes"""
-        # Store current view state
+        """Rebuild the visible tab and mark the hidden ones for a rebuild"""
         current_tab = self.current_tab.get()
-        current_category = getattr(self, 'current_category_id', None)
+        self.dirty_tabs.update(tab for tab in self.tabs
+                               if tab != current_tab and tab not in self.unbuilt_tabs)
+        self.refresh_tab(current_tab)
+    
+    @traced
+    def on_data_changed(self, change):
+        """Patch the visible tab for a change and mark the hidden ones dirty"""
+        patchers = {
+            'Main': self.patch_main_tab,
+            'Tasks for the Day': self.patch_tasks_for_day,
+            'Timeline': self.patch_timeline,
+        }
+        current_tab = self.current_tab.get()
+        for tab_name, patch in patchers.items():
+            if tab_name in self.dirty_tabs or tab_name in self.unbuilt_tabs:
+                continue
+            if tab_name == current_tab:
+                patch(change)
+            elif self.tab_affected(tab_name, change):
+                self.dirty_tabs.add(tab_name)
+    
+    def tab_affected(self, tab_name, change):
+        """Return True if a change shows up on a tab at all"""
+        if tab_name == 'Tasks for the Day':
+            if change.kind == events.TODAY_CHANGED:
+                return True
+            return change.kind == events.TASK_UPDATED and change.task['id'] in self.today_tasks
+        if tab_name == 'Timeline':
+            return change.kind in (events.TASK_ADDED, events.TASK_UPDATED)
+        return True
+    
+    def patch_main_tab(self, change):
+        """Update only the category tiles or task rows touched by a change"""
+        if self.search_text is not None:
+            if change.kind == events.TODAY_CHANGED:
+                # Only the "Doing Today" buttons change
+                self.search_list.refresh_all()
+            elif change.task is not None:
+                # An added or edited task can join, leave or move in the results
+                self.update_search_results()
+            return
         
-        # Update all displays
-        self.update_categories_display()
-        self.update_tasks_for_day()
-        self.update_timeline()
+        if self.current_category_id is None:
+            # Category grid: only task counts and tiles can change
+            if change.kind == events.CATEGORY_CHANGED:
+                self.update_categories_display()
+                return
+            for cat_id in {change.category_id, change.previous_category_id}:
+                tile = self.category_tiles.get(cat_id)
+                if tile is not None:
+                    tile.set_count(queries.task_count(self.store, cat_id))
+            return
         
-        # If we were in a category view, restore it
-        if current_category:
-            self.current_category_id = current_category
-            self.expand_category(current_category)
+        category_id = self.current_category_id
+        if change.kind == events.CATEGORY_CHANGED:
+            if change.category_id == category_id:
+                self.expand_category(category_id)
+            return
+        if change.task is None:
+            # Today's list was cleared: only the "Doing Today" buttons change
+            self.category_list.refresh_all()
+            return
         
-        # Restore tab if needed
-        if current_tab != self.current_tab.get():
-            self.switch_tab(current_tab)
+        task = change.task
+        belongs = task['category_id'] == category_id and task['id'] in self.task_index
+        in_place = self.view_query.plain and change.previous_category_id == category_id
+        if change.kind == events.TASK_UPDATED and belongs and in_place:
+            self.category_list.refresh(task['id'])
+        elif change.kind == events.TODAY_CHANGED:
+            self.category_list.refresh(task['id'])
+        elif belongs or change.previous_category_id == category_id:
+            # A task joined or left this category, or may have moved in the sort
+            # order or in or out of the filters
+            self.category_list.set_tasks(self.category_tasks(category_id))
+    
+    def patch_tasks_for_day(self, change):
+        """Update only the rows of today's list touched by a change"""
+        if change.kind == events.TODAY_CHANGED or (change.kind == events.TASK_UPDATED
+                                                   and not self.view_query.plain):
+            if not queries.today_tasks(self.store) or self.today_empty:
+                # First task added or last one removed: switch the empty state
+                self.update_tasks_for_day()
+                return
+            # Filtered or sorted, an edited task may also leave the list or move
+            today_tasks = self.today_task_list()
+            self.today_list.set_tasks(today_tasks)
+            self.today_title_label.configure(text=f"Tasks for Today ({len(today_tasks)} tasks)")
+        elif change.kind == events.TASK_UPDATED and self.today_list is not None:
+            self.today_list.refresh(change.task['id'])
+    
+    def patch_timeline(self, change):
+        """Redraw the visible part of the timeline, re-measuring only when needed"""
+        task = change.task
+        if not self.view_query.plain:
+            # The task may have moved in the sort order or in or out of the filters
+            if change.kind in (events.TASK_ADDED, events.TASK_UPDATED):
+                self.update_timeline()
+        elif change.kind == events.TASK_ADDED:
+            self.timeline.add_task(task)
+        elif change.kind == events.TASK_UPDATED:
+            self.timeline.update_task(task)
     
     def toggle_theme(self):
         """Toggle between light and dark themes"""
         self.dark_mode = not self.dark_mode
         self.apply_theme()
     
+    @traced
     def apply_theme(self):
-        """Apply the current theme"""
-        if self.dark_mode:
-            # Dark theme colors
-            bg_color = '#2d2d2d'
-            fg_color = '#ffffff'
-            header_bg = '#3d3d3d'
-            button_bg = '#555555'
-            self.theme_btn.configure(text="☀️")
-        else:
-            # Light theme colors
-            bg_color = '#f0f0f0'
-            fg_color = '#333333'
-            header_bg = '#ffffff'
-            button_bg = '#ffffff'
-            self.theme_btn.configure(text="🌙")
-        
-        # Apply colors
-        self.root.configure(bg=bg_color)
-        self.header.configure(bg=header_bg)
-        self.main_frame.configure(bg=bg_color)
-        
-        for tab in self.tab_content.values():
-            tab.configure(bg=bg_color)
+        """Apply the current theme.
+        
+        The registered widgets are recolored in one pass; the task lists
+        only update the rows on screen and the timeline redraws its visible
+        window, so nothing is rebuilt.
+        """
+        self.theme.use('dark' if self.dark_mode else 'light')
+        self.theme_btn.configure(text="☀️" if self.dark_mode else "🌙")
+        
+        for task_list in (self.main_list, self.today_list):
+            if task_list is not None:
+                task_list.apply_theme()
+        if 'Timeline' not in self.unbuilt_tabs:
+            self.timeline.apply_theme()
     
-    def lighten_color(self, color, factor=0.3):
-        """Lighten a color by a factor"""
-        # Convert hex to RGB
-        color = color.lstrip('#')
-        r, g, b = tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
-        
-        # Lighten
-        r = min(255, int(r + (255 - r) * factor))
-        g = min(255, int(g + (255 - g) * factor))
-        b = min(255, int(b + (255 - b) * factor))
-        
-        # Convert back to hex
-        return f'#{r:02x}{g:02x}{b:02x}'
-
     def edit_category(self, category_id):
         """Edit an existing category"""
         category = self.categories[category_id]
@@ -1271,18 +1388,11 @@ class TodoApp:
         btn_frame.pack(fill='x', pady=(20, 0))
         
         def save_category():
-            name = name_entry.get().strip()
-            if not name:
-                messagebox.showerror("Error", "Please enter a category name")
+            try:
+                commands.update_category(self.store, category_id, name_entry.get(), selected_color.get())
+            except CommandError as error:
+                messagebox.showerror("Error", str(error))
                 return
-            
-            self.categories[category_id] = {
-                'name': name,
-                'color': selected_color.get()
-            }
-            
-            self.save_data()
-            self.update_categories_display()
             dialog.destroy()
             messagebox.showinfo("Success", "Category updated successfully!")
         
@@ -1293,11 +1403,49 @@ class TodoApp:
         cancel_btn = tk.Button(btn_frame, text="Cancel", command=dialog.destroy,
                              bg='#f44336', fg='white', bd=0, padx=20, pady=8, cursor='hand2')
         cancel_btn.pack(side='right')
+        
+        # Colors of the current theme
+        self.theme.register_tree(dialog, skip=(color_preview,))
+
+def report_first_paint(root):
+    """Print how long it took until the first frame was drawn, then quit"""
+    root.update()
+    elapsed = time.perf_counter() - STARTED
+    verdict = "ok" if elapsed <= FIRST_PAINT_TARGET else "over target"
+    print(f"First paint after {elapsed * 1000:.0f} ms "
+          f"(target {FIRST_PAINT_TARGET * 1000:.0f} ms, {verdict})")
+    root.quit()
 
 def main():
+    parser = argparse.ArgumentParser(description="To-Do List Application")
+    parser.add_argument('--data', default='todo_data.json',
+                        help="data file to use; a .db/.sqlite file selects the SQLite backend")
+    parser.add_argument('--measure-startup', action='store_true',
+                        help="print the time to first paint and exit")
+    parser.add_argument('--defer-completed', action='store_true',
+                        help="leave completed tasks on disk until a view asks for them")
+    parser.add_argument('--archive-after', type=int, default=90, metavar='DAYS',
+                        help="archive tasks completed more than DAYS days ago (default 90, 0 to keep all)")
+    parser.add_argument('--trace', metavar='FILE', default=os.environ.get(trace.ENV_VAR),
+                        help="time the views and saves, show the totals (F12) and write "
+                             f"a Chrome trace to FILE at exit (or set {trace.ENV_VAR}=FILE)")
+    args = parser.parse_args()
+    
+    if args.trace:
+        trace.enable(args.trace)
     root = tk.Tk()
-    app = TodoApp(root)
+    try:
+        app = TodoApp(root, data_path=args.data, defer_completed=args.defer_completed,
+                      archive_after=args.archive_after)
+    except DataLockedError as error:
+        root.withdraw()
+        messagebox.showerror("Data In Use", str(error))
+        root.destroy()
+        raise SystemExit(1)
+    if args.measure_startup:
+        root.after_idle(lambda: report_first_paint(root))
     root.mainloop()
+    app.store.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
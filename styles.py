@@ -0,0 +1,226 @@
+"""Colors and fonts shared by the views.
+
+Colors that only depend on a task's status, priority or progress are
+looked up in tables built once, and the lighter shades of category colors
+are cached. Fonts are named Tk fonts, created once per window and shared by
+every widget and canvas item that shows text in that role, so Tk resolves
+each font once instead of parsing a font description for every widget.
+The application creates them with create_fonts() before building widgets.
+
+Window colors come from the light and dark PALETTES. Widgets are
+registered with a Theme under a role (see ROLES), which says which of their
+options take which palette color; switching palettes recolors the
+registered widgets and the ttk styles in one pass, without rebuilding
+anything.
+"""
+
+import tkinter as tk
+import weakref
+from functools import lru_cache
+from tkinter import font as tkfont
+from tkinter import ttk
+
+# Row background by status
+STATUS_COLORS = {
+    'Not Started': '#ffebee',  # Light red
+    'In Progress': '#fff8e1',  # Light yellow
+    'Completed': '#e8f5e8',    # Light green
+    'On Hold': '#f3e5ab'       # Light yellow-brown
+}
+
+# Status box colors
+STATUS_BOX_COLORS = {
+    'Not Started': '#ff4444',
+    'In Progress': '#ffaa00',
+    'Completed': '#44aa44',
+    'On Hold': '#8B4513'  # Brown
+}
+
+PRIORITY_COLORS = {'High': '#ff4444', 'Medium': '#ffaa00', 'Low': '#ffdd00'}  # Low is yellow
+UNKNOWN_COLOR = '#cccccc'  # box color for a status or priority not listed above
+
+# Row background by status in dark mode
+DARK_STATUS_COLORS = {
+    'Not Started': '#4a2c2c',
+    'In Progress': '#4a4226',
+    'Completed': '#2c4a2c',
+    'On Hold': '#4a4330'
+}
+
+# Window colors by name; 'rows' are the task row backgrounds by status
+PALETTES = {
+    'light': {
+        'window': '#f0f0f0',
+        'header': '#ffffff',
+        'logo': '#e0e0e0',
+        'text': '#333333',
+        'muted': '#666666',
+        'faint': '#888888',
+        'field': '#ffffff',
+        'chart': '#ffffff',
+        'line': '#000000',
+        'row': '#ffffff',
+        'rows': STATUS_COLORS,
+    },
+    'dark': {
+        'window': '#2d2d2d',
+        'header': '#3d3d3d',
+        'logo': '#555555',
+        'text': '#ffffff',
+        'muted': '#bbbbbb',
+        'faint': '#999999',
+        'field': '#555555',
+        'chart': '#262626',
+        'line': '#dddddd',
+        'row': '#3d3d3d',
+        'rows': DARK_STATUS_COLORS,
+    },
+}
+
+# Widget options set from the palette, by role
+ROLES = {
+    'window': {'bg': 'window'},
+    'header': {'bg': 'header'},
+    'logo': {'bg': 'logo'},
+    'chart': {'bg': 'chart'},
+    'text': {'bg': 'window', 'fg': 'text'},
+    'muted_text': {'bg': 'window', 'fg': 'muted'},
+    'header_text': {'bg': 'header', 'fg': 'text'},
+    'logo_text': {'bg': 'logo', 'fg': 'muted'},
+    'header_button': {'bg': 'header', 'fg': 'text',
+                      'activebackground': 'logo', 'activeforeground': 'text'},
+    'entry': {'bg': 'field', 'fg': 'text', 'insertbackground': 'text'},
+    'scale': {'bg': 'window', 'fg': 'text', 'troughcolor': 'field',
+              'activebackground': 'header', 'highlightbackground': 'window'},
+}
+
+# Roles given to the widgets of a dialog by register_tree(), by Tk widget class
+TREE_ROLES = {
+    'Toplevel': 'window',
+    'Frame': 'window',
+    'Canvas': 'window',
+    'Label': 'text',
+    'Entry': 'entry',
+    'Text': 'entry',
+    'Scale': 'scale',
+}
+
+# Font descriptions by role
+FONTS = {
+    'title': ('Arial', 20, 'bold'),
+    'heading': ('Arial', 16, 'bold'),
+    'tile': ('Arial', 14, 'bold'),
+    'notice': ('Arial', 14),
+    'task_name': ('Arial', 12, 'bold'),
+    'message': ('Arial', 12),
+    'button': ('Arial', 10),
+    'month': ('Arial', 10, 'bold'),
+    'detail': ('Arial', 9),
+    'tick': ('Arial', 8),
+}
+
+_fonts = {}
+
+
+def progress_color(progress):
+    """Return the color of the progress box"""
+    if progress <= 25:
+        return '#ff4444'  # Red
+    elif progress <= 50:
+        return '#ff8800'  # Orange
+    elif progress <= 75:
+        return '#ffaa00'  # Yellow
+    return '#44aa44'      # Green
+
+
+PROGRESS_COLORS = tuple(progress_color(progress) for progress in range(101))
+
+
+@lru_cache(maxsize=256)
+def lighten_color(color, factor=0.3):
+    """Lighten a '#rrggbb' color by a factor"""
+    color = color.lstrip('#')
+    r, g, b = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+    r = min(255, int(r + (255 - r) * factor))
+    g = min(255, int(g + (255 - g) * factor))
+    b = min(255, int(b + (255 - b) * factor))
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def create_fonts(root):
+    """Create the named fonts of FONTS for a window (replacing those of an earlier one)"""
+    _fonts.clear()
+    for role, description in FONTS.items():
+        _fonts[role] = tkfont.Font(root, name=f'todo_{role}', font=description)
+
+
+def font(role):
+    """Return the named font for a role in FONTS"""
+    return _fonts[role]
+
+
+class Theme:
+    """The current palette and the widgets colored from it.
+
+    register() colors a widget for its role and remembers it (weakly, so
+    destroyed views are not kept alive); use() switches to another palette
+    and reconfigures every registered widget and the ttk styles in a single
+    pass. The option values of each role are resolved once per palette.
+    Views that draw with palette colors themselves (task rows, canvases)
+    read ``palette`` when they draw and are redrawn by the application.
+    """
+
+    def __init__(self, root, name='light'):
+        self.style = ttk.Style(root)
+        self.widgets = weakref.WeakKeyDictionary()  # widget -> role
+        self._select(name)
+
+    def _select(self, name):
+        self.name = name
+        self.palette = PALETTES[name]
+        self.options = {role: {option: self.palette[key] for option, key in options.items()}
+                        for role, options in ROLES.items()}
+
+    def register(self, widget, role):
+        """Color a widget for a role in ROLES now and on every palette switch; return it"""
+        widget.configure(**self.options[role])
+        self.widgets[widget] = role
+        return widget
+
+    def register_tree(self, widget, skip=()):
+        """Register a widget and its descendants by their class (see TREE_ROLES).
+
+        Buttons and ttk widgets keep their own colors, as do the widgets in
+        ``skip`` (such as a color preview).
+        """
+        stack = [widget]
+        while stack:
+            widget = stack.pop()
+            if widget in skip:
+                continue
+            role = TREE_ROLES.get(widget.winfo_class())
+            if role is not None:
+                self.register(widget, role)
+            stack.extend(widget.children.values())
+
+    def use(self, name):
+        """Switch to the palette ``name``, recoloring every registered widget"""
+        if name == self.name:
+            return
+        self._select(name)
+        for widget, role in list(self.widgets.items()):
+            try:
+                widget.configure(**self.options[role])
+            except tk.TclError:
+                # Destroyed but not yet collected
+                del self.widgets[widget]
+        self._style_ttk()
+
+    def _style_ttk(self):
+        palette = self.palette
+        self.style.configure('TCombobox', fieldbackground=palette['field'], foreground=palette['text'],
+                             background=palette['header'], arrowcolor=palette['text'])
+        self.style.map('TCombobox', fieldbackground=[('readonly', palette['field'])],
+                       foreground=[('readonly', palette['text'])])
+        self.style.configure('TScrollbar', background=palette['header'], troughcolor=palette['window'],
+                             arrowcolor=palette['text'])
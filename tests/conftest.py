@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from todo_core.store import TodoStore  # noqa: E402
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    """Path of a data file in an empty directory"""
+    return str(tmp_path / 'todo_data.json')
+
+
+@pytest.fixture
+def store(data_path):
+    """An empty, loaded TodoStore that saves synchronously"""
+    store = TodoStore(data_path)
+    store.load()
+    yield store
+    store.close()
@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+
+from todo_core import cli, commands
+from todo_core.store import TodoStore
+from todo_core.task_query import TaskQuery
+
+
+def run(data_path, *argv):
+    cli.main(['--data', data_path, *argv])
+
+
+def load(data_path):
+    store = TodoStore(data_path)
+    store.load()
+    tasks = {task.name: task for task in store.tasks}
+    store.close()
+    return tasks
+
+
+@pytest.fixture
+def imported(tmp_path, data_path):
+    source = tmp_path / 'tasks.csv'
+    with open(source, 'w', newline='') as f:
+        writer = csv.DictWriter(f, ['name', 'category', 'start_date', 'due_date', 'status', 'priority'])
+        writer.writeheader()
+        writer.writerow({'name': 'Report', 'category': 'Work', 'start_date': '2024-01-01',
+                         'due_date': '2024-03-01', 'priority': 'High'})
+        writer.writerow({'name': 'Meeting', 'category': 'Work', 'start_date': '2024-01-01',
+                         'due_date': '2024-02-01', 'status': 'In Progress'})
+        writer.writerow({'name': 'Laundry', 'category': 'Home', 'start_date': '2024-01-01',
+                         'due_date': '2024-01-15', 'priority': 'Low'})
+        writer.writerow({'name': '', 'category': 'Home', 'start_date': '2024-01-01',
+                         'due_date': '2024-01-15'})
+    run(data_path, 'import', str(source))
+    return data_path
+
+
+def test_import_skips_invalid_records(imported):
+    tasks = load(imported)
+    assert sorted(tasks) == ['Laundry', 'Meeting', 'Report']
+    assert tasks['Report'].category_id != tasks['Laundry'].category_id  # categories made by name
+
+
+def test_set_status_completed_matches_complete(imported):
+    run(imported, 'update', '--category', 'Work', '--status', 'In Progress', '--set-status', 'Completed')
+    run(imported, 'update', '--category', 'Home', '--complete')
+    tasks = load(imported)
+    today = date.today().isoformat()
+    assert tasks['Meeting'].date_completed == tasks['Laundry'].date_completed == today
+    assert tasks['Report'].date_completed is None
+
+    run(imported, 'update', '--category', 'Work', '--set-status', 'On Hold')
+    tasks = load(imported)
+    assert tasks['Meeting'].date_completed is None
+    assert tasks['Laundry'].date_completed == today
+
+
+def test_export_with_filters_and_sort(imported, capsys):
+    run(imported, 'export', '-', '--category', 'Work', '--sort', 'due_date')
+    rows = [json.loads(line) for line in io.StringIO(capsys.readouterr().out)]
+    assert [(row['name'], row['category']) for row in rows] == [('Meeting', 'Work'), ('Report', 'Work')]
+
+
+def export_rows(data_path, capsys, *filters):
+    run(data_path, 'export', '-', *filters)
+    return [json.loads(line) for line in io.StringIO(capsys.readouterr().out)]
+
+
+def test_export_includes_the_archive(data_path, capsys):
+    store = TodoStore(data_path)
+    store.load()
+    work = commands.add_category(store, 'Work')
+    old, reopened, _ = commands.add_tasks(store, [
+        {'name': name, 'category_id': work, 'start_date': '2019-12-01', 'due_date': '2019-12-31'}
+        for name in ('Old', 'Reopened', 'Open')])
+    commands.update_tasks(store, [old, reopened], status='Completed', date_completed='2020-01-01')
+    store.close()
+
+    store = TodoStore(data_path, archive_after=30)
+    store.load()  # moves both completed tasks to the archive
+    assert store.archive.unloaded() == 2
+    store.load_archived()
+    commands.update_task(store, store.task_index.get(reopened.id), status='In Progress')
+    store.close()
+
+    assert [row['name'] for row in export_rows(data_path, capsys, '--status', 'Completed')] == ['Old']
+    rows = export_rows(data_path, capsys, '--sort', 'name')
+    assert [(row['name'], row['status']) for row in rows] == [
+        ('Old', 'Completed'), ('Open', 'Not Started'), ('Reopened', 'In Progress')]
+
+
+@pytest.mark.parametrize('data_file', ['todo_data.json', 'todo_data.db'])
+def test_export_streams_matches_from_storage(tmp_path, capsys, data_file):
+    data_path = str(tmp_path / data_file)
+    store = TodoStore(data_path)
+    store.load()
+    work, home = commands.add_category(store, 'Work'), commands.add_category(store, 'Home')
+    commands.add_tasks(store, [
+        {'name': f'Task {number}', 'category_id': (work, home)[number % 2], 'start_date': '2024-01-01',
+         'due_date': f'2024-{number % 12 + 1:02d}-01', 'priority': ('High', 'Low')[number % 3 > 0],
+         'progress': number}
+        for number in range(60)])
+    expected = [task.name for task in TaskQuery(category_id=home, priority='High', due_from='2024-03-01',
+                                                due_to='2024-08-31', min_progress=20).run(store)]
+    store.close()
+
+    rows = export_rows(data_path, capsys, '--category', 'home', '--priority', 'High',
+                       '--due-from', '2024-03-01', '--due-to', '2024-08-31', '--min-progress', '20')
+    assert expected and [row['name'] for row in rows] == expected
+    assert {row['category'] for row in rows} == {'Home'}
+
+
+def test_export_help_says_what_is_streamed(capsys):
+    with pytest.raises(SystemExit):
+        cli.main(['export', '--help'])
+    assert 'archived ones included' in capsys.readouterr().out
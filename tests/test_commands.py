@@ -0,0 +1,84 @@
+from datetime import date
+
+import pytest
+
+from todo_core import commands, queries
+from todo_core.commands import CommandError
+from todo_core.store import TodoStore
+
+
+def test_category_names_must_be_unique(store):
+    work = commands.add_category(store, 'Work')
+    home = commands.add_category(store, 'Home')
+    for name in ('work', ' WORK ', ''):
+        with pytest.raises(CommandError):
+            commands.add_category(store, name)
+    with pytest.raises(CommandError):
+        commands.update_category(store, home, 'Work', '#000000')
+
+    commands.update_category(store, work, 'work', '#000000')  # its own name, recased
+    commands.update_category(store, home, 'Chores', '#000000')
+    assert store.category_index.id_for('HOME') is None
+    assert commands.add_category(store, 'Home') not in (work, home)
+
+
+def test_typed_dates_are_checked_and_normalized(store):
+    work = commands.add_category(store, 'Work')
+    for start_date in ('2024-13-01', '2024-02-30', 'tomorrow'):
+        with pytest.raises(CommandError):
+            commands.add_task(store, 'Task', work, start_date, '2024-01-02')
+    assert store.tasks == []
+
+    task = commands.add_task(store, 'Task', work, ' 2024-01-01 ', '2024-01-02')
+    assert (task.start_date, task.start_day) == ('2024-01-01', date(2024, 1, 1).toordinal())
+    commands.update_task(store, task, due_date='2024-03-01')
+    assert task.due_day == date(2024, 3, 1).toordinal()
+
+
+def test_commands_wait_for_loading(data_path, store):
+    work = commands.add_category(store, 'Work')
+    task = commands.add_task(store, 'Task', work, '2024-01-01', '2024-01-02')
+    store.close()
+
+    reopened = TodoStore(data_path)
+    batches = reopened.load_in_batches(batch_size=1)
+    next(batches)
+    assert reopened.loading
+    for command, args in ((commands.add_category, ('Home',)),
+                          (commands.update_category, (work, 'Renamed', '#000000')),
+                          (commands.update_task, (task,)),
+                          (commands.add_to_today, (task,))):
+        with pytest.raises(CommandError):
+            command(reopened, *args)
+    for _ in batches:
+        pass
+    assert not reopened.loading
+    commands.update_category(reopened, work, 'Renamed', '#000000')
+    reopened.close()
+
+
+def test_loading_in_batches_matches_load(data_path, store):
+    work = commands.add_category(store, 'Work')
+    commands.add_tasks(store, [
+        {'name': f'Task {number}', 'category_id': work, 'start_date': '2024-01-01',
+         'due_date': '2024-01-02', 'status': ('Not Started', 'Completed')[number % 2]}
+        for number in range(25)])
+    store.close()
+
+    whole = TodoStore(data_path)
+    whole.load()
+    expected = [task.to_dict() for task in whole.tasks]
+    whole.close()
+    batched = TodoStore(data_path)
+    assert list(batched.load_in_batches(batch_size=10)) == [10, 20, 25]
+    assert [task.to_dict() for task in batched.tasks] == expected
+    batched.close()
+
+    deferred = TodoStore(data_path)
+    for _ in deferred.load_in_batches(defer_completed=True):
+        pass
+    assert deferred.deferred == {work: 12}
+    assert queries.task_count(deferred, work) == 25
+    deferred.load_deferred()
+    assert sorted(task.id for task in deferred.tasks) == sorted(task['id'] for task in expected)
+    deferred.close()
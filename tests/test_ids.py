@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from todo_core import commands
+from todo_core import store as store_module
+from todo_core.ids import META_KEY, IdAllocator, migrate_duplicate_ids, rekey_duplicates
+from todo_core.locking import DataLock, DataLockedError
+from todo_core.storage import JournalStorage, StorageError
+from todo_core.store import TodoStore
+
+
+def test_allocator_continues_after_mark_and_existing_ids():
+    assert IdAllocator.for_ids(['1', '7', 'x'], {META_KEY: 3}).allocate() == '8'
+    assert IdAllocator.for_ids(['1', '2'], {META_KEY: 10}).allocate() == '10'
+    assert IdAllocator.for_tasks([]).allocate() == '1'
+
+
+def test_reserve_and_meta():
+    allocator = IdAllocator(5)
+    assert allocator.reserve(3) == ['5', '6', '7']
+    assert allocator.dirty
+    assert allocator.meta() == {META_KEY: 8}
+    assert not allocator.dirty
+
+
+def test_rekey_duplicates_keeps_first_use():
+    tasks = [{'id': '1'}, {'id': '2'}, {'id': '1'}, {'id': '2'}]
+    rekeyed = rekey_duplicates(tasks, IdAllocator(3))
+    assert [task['id'] for task in tasks] == ['1', '2', '3', '4']
+    assert rekeyed == [tasks[2], tasks[3]]
+
+
+def test_ids_of_removed_tasks_are_not_reused(data_path):
+    store = TodoStore(data_path)
+    store.load()
+    work = commands.add_category(store, 'Work')
+    first, second = commands.add_tasks(store, [
+        {'name': name, 'category_id': work, 'start_date': '2024-01-01', 'due_date': '2024-01-02'}
+        for name in ('One', 'Two')])
+    # Drop the newest task from the data, as archiving or a removal would
+    store.tasks.remove(second)
+    store.save()
+    store.close()
+
+    store = TodoStore(data_path)
+    store.load()
+    third = commands.add_task(store, 'Three', work, '2024-01-01', '2024-01-02')
+    store.close()
+    assert (first.id, second.id, third.id) == ('1', '2', '3')
+
+
+def test_duplicate_ids_are_migrated(data_path):
+    storage = JournalStorage(data_path)
+    storage.write_snapshot({}, [{'id': '1', 'name': 'a'}, {'id': '1', 'name': 'b'}])
+    assert migrate_duplicate_ids(data_path) == 1
+    _, tasks = JournalStorage(data_path).load()
+    assert [(task['id'], task['name']) for task in tasks] == [('1', 'a'), ('2', 'b')]
+
+
+def locked_elsewhere(data_path):
+    """Return True if another process cannot take the data file's lock"""
+    script = ("import sys; from todo_core.locking import DataLock, DataLockedError\n"
+              "try:\n    DataLock(sys.argv[1]).acquire()\n"
+              "except DataLockedError:\n    sys.exit(3)\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run([sys.executable, '-c', script, data_path], cwd=root).returncode == 3
+
+
+def test_data_is_locked_against_other_processes(data_path):
+    with DataLock(data_path):
+        with DataLock(data_path):  # shared within the process
+            pass
+        assert locked_elsewhere(data_path)
+    assert not locked_elsewhere(data_path)
+
+
+def test_store_holds_the_lock_until_closed(data_path):
+    store = TodoStore(data_path)
+    second = TodoStore(data_path)  # same process: allowed
+    second.close()
+    assert locked_elsewhere(data_path)
+    store.close()
+    assert not locked_elsewhere(data_path)
+
+
+def test_store_that_fails_to_open_releases_the_lock(data_path, monkeypatch):
+    def broken_archive(*args):
+        raise StorageError("cannot open the archive")
+
+    monkeypatch.setattr(store_module, 'Archive', broken_archive)
+    with pytest.raises(StorageError):
+        TodoStore(data_path, background=True)
+    assert not locked_elsewhere(data_path)
+
+
+def test_cli_refuses_data_open_elsewhere(data_path):
+    with DataLock(data_path):
+        assert subprocess.run(
+            [sys.executable, '-m', 'todo_core.cli', '--data', data_path, 'export', '-'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True).stderr.strip().endswith("the same task ids.")
+    assert issubclass(DataLockedError, StorageError)
@@ -0,0 +1,51 @@
+import io
+import json
+
+import pytest
+
+from todo_core.json_stream import iter_snapshot
+
+SNAPSHOT = {
+    'categories': {'1': {'name': 'Work é "quoted"', 'color': '#2196F3'}},
+    'tasks': [
+        {'id': '1', 'name': 'Plain', 'progress': 0, 'done': False, 'comments': None},
+        {'id': '22', 'name': 'Numbers', 'progress': 12345, 'ratio': -1.5e3, 'tags': ['a', 'b']},
+        {'id': '333', 'name': 'Escapes \\ \n \t ☃', 'nested': {'list': [1, [2, {}]], 'x': True}},
+    ],
+    'meta': {'next_task_id': 334, 'today': {'date': '2024-06-01', 'task_ids': ['1']}},
+}
+
+
+def entries(data):
+    """What iter_snapshot should yield for a decoded snapshot"""
+    for key, value in data.items():
+        if key == 'tasks':
+            for task in value:
+                yield 'task', task
+        else:
+            yield key, value
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 65536])
+def test_matches_json_load(indent, chunk_size):
+    text = json.dumps(SNAPSHOT, indent=indent)
+    assert list(iter_snapshot(io.StringIO(text), chunk_size)) == list(entries(json.loads(text)))
+
+
+@pytest.mark.parametrize('text', ['{}', '{"tasks": []}', ' { "tasks" : [ ] , "meta" : { } } '])
+def test_empty_snapshots(text):
+    assert list(iter_snapshot(io.StringIO(text), 3)) == list(entries(json.loads(text)))
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    '[]',
+    '{"tasks": [{"id": "1"}',
+    '{"tasks": [{"id": "1"} {"id": "2"}]}',
+    '{"categories": {"1": ',
+    '{1: 2}',
+])
+def test_invalid_snapshots_raise_value_error(text):
+    with pytest.raises(ValueError):
+        list(iter_snapshot(io.StringIO(text), 4))
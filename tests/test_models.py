@@ -0,0 +1,23 @@
+from todo_core.models import TASK_FIELDS, Task, new_task
+
+
+def test_round_trip_keeps_every_field():
+    task = new_task('1', 'Name', '2', '2024-01-01', '2024-02-01', comments='note')
+    assert Task.from_dict(task.to_dict()).to_dict() == task.to_dict()
+    assert set(task.to_dict()) == set(TASK_FIELDS)
+
+
+def test_fields_a_record_never_had_are_not_written():
+    task = Task.from_dict({'id': '1', 'name': 'Old', 'category_id': '1', 'status': 'Not Started'})
+    assert 'date_completed' not in task.to_dict()
+    assert 'date_completed' not in task
+    assert task['date_completed'] is None
+
+    task['date_completed'] = '2024-05-01'
+    assert task.to_dict()['date_completed'] == '2024-05-01'
+    assert len(task) == len(task.to_dict())
+
+
+def test_extra_fields_are_kept():
+    record = dict(new_task('1', 'Name', '2', '2024-01-01', '2024-02-01').to_dict(), colour='red')
+    assert Task.from_dict(record).to_dict() == record
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+from todo_core.save_queue import SaveQueue
+
+
+class FakeStorage:
+    """Records the writes it is asked to make; fails while ``failing`` is set"""
+
+    def __init__(self):
+        self.writes = []
+        self.failing = False
+        self.started = threading.Event()  # set when a write begins
+        self.gate = threading.Event()     # writes wait until it is set
+        self.gate.set()
+
+    def append(self, categories=None, tasks=None, meta=None):
+        self.started.set()
+        self.gate.wait()
+        if self.failing:
+            raise OSError("disk full")
+        self.writes.append(('append', categories, tasks, meta))
+
+    def write_snapshot(self, categories, tasks, meta=None):
+        self.started.set()
+        self.gate.wait()
+        if self.failing:
+            raise OSError("disk full")
+        self.writes.append(('snapshot', categories, tasks, meta))
+
+    def wait(self):
+        pass
+
+
+@pytest.fixture
+def storage():
+    return FakeStorage()
+
+
+@pytest.fixture
+def queue(storage):
+    queue = SaveQueue(storage, delay=60, max_delay=60)
+    yield queue
+    storage.failing = False
+    storage.gate.set()
+    queue.close()
+
+
+def test_changes_are_coalesced_into_one_write(storage, queue):
+    queue.put(tasks=[{'id': '1', 'name': 'first'}, {'id': '2', 'name': 'other'}])
+    queue.put(categories={'1': {'name': 'Work'}}, tasks=[{'id': '1', 'name': 'latest'}],
+              meta={'next_task_id': 3})
+    queue.put(meta={'today': []})
+    assert queue.pending == 5
+    assert storage.writes == []  # nothing is written before the delay
+
+    assert queue.flush(5)
+    assert storage.writes == [('append', {'1': {'name': 'Work'}},
+                               [{'id': '1', 'name': 'latest'}, {'id': '2', 'name': 'other'}],
+                               {'next_task_id': 3, 'today': []})]
+    assert queue.pending == 0
+
+
+def test_queued_tasks_are_copies(storage, queue):
+    task = {'id': '1', 'name': 'before'}
+    queue.put(tasks=[task])
+    task['name'] = 'after'
+    queue.flush(5)
+    assert storage.writes[0][2] == [{'id': '1', 'name': 'before'}]
+
+
+def test_snapshot_replaces_waiting_changes(storage, queue):
+    queue.put(tasks=[{'id': '1'}], meta={'a': 1})
+    queue.put_snapshot({}, [{'id': '1'}, {'id': '2'}], meta={'b': 2})
+    queue.flush(5)
+    assert storage.writes == [('snapshot', {}, [{'id': '1'}, {'id': '2'}], {'a': 1, 'b': 2})]
+
+
+def test_failed_write_is_retried(storage, queue):
+    storage.failing = True
+    queue.put(tasks=[{'id': '1', 'name': 'first'}])
+    assert not queue.flush(5)
+    assert isinstance(queue.error, OSError)
+    assert queue.pending == 1
+
+    # Newer changes are written together with the failed ones
+    queue.put(tasks=[{'id': '1', 'name': 'second'}, {'id': '2'}])
+    storage.failing = False
+    assert queue.flush(5)
+    assert queue.error is None
+    assert storage.writes == [('append', {}, [{'id': '1', 'name': 'second'}, {'id': '2'}], {})]
+
+
+def test_failed_batch_does_not_replace_a_newer_snapshot(storage, queue):
+    storage.gate.clear()
+    storage.failing = True
+    queue.put(tasks=[{'id': '1', 'name': 'old'}], meta={'a': 1})
+    queue.flush(0)  # start the write without waiting for it
+    assert storage.started.wait(5)
+    # While the batch is being (unsuccessfully) written, a full snapshot is queued
+    queue.put_snapshot({}, [{'id': '1', 'name': 'new'}], meta={'b': 2})
+    storage.gate.set()
+    assert not queue.flush(5)
+
+    storage.failing = False
+    assert queue.flush(5)
+    assert storage.writes == [('snapshot', {}, [{'id': '1', 'name': 'new'}], {'a': 1, 'b': 2})]
+
+
+def test_closed_queue_refuses_changes(storage, queue):
+    queue.put(tasks=[{'id': '1'}])
+    assert queue.close()
+    assert len(storage.writes) == 1
+    with pytest.raises(RuntimeError):
+        queue.put(tasks=[{'id': '2'}])
+
+
+def test_close_without_waiting(storage, queue):
+    storage.gate.clear()  # the write hangs
+    queue.put(tasks=[{'id': '1'}])
+    assert not queue.flush(0.2)
+    started = time.monotonic()
+    assert not queue.close(timeout=0)
+    assert time.monotonic() - started < 1
@@ -0,0 +1,64 @@
+from todo_core.models import new_task
+from todo_core.search import SearchIndex
+
+
+def make_task(task_id, name, comments=''):
+    return new_task(task_id, name, '1', '2024-01-01', '2024-12-31', comments=comments)
+
+
+def test_every_query_word_matches_a_word_prefix():
+    tasks = [make_task('1', 'Write quarterly report'),
+             make_task('2', 'Report bug', comments='crash when writing'),
+             make_task('3', 'Buy groceries')]
+    index = SearchIndex(tasks)
+    assert set(index.search('rep')) == {'1', '2'}
+    assert index.search('wri rep') == ['1', '2']
+    assert index.search('port') == []
+    assert index.search('REPORT Quarterly') == ['1']
+    assert index.search('') == []
+
+
+def test_name_ranks_above_comments_and_whole_words_above_prefixes():
+    tasks = [make_task('1', 'Misc', comments='plan the garden'),
+             make_task('2', 'Planning session'),
+             make_task('3', 'Plan holiday'),
+             make_task('4', 'Other', comments='planning')]
+    index = SearchIndex(tasks)
+    assert index.search('plan') == ['3', '2', '1', '4']
+    assert index.search('plan', limit=2) == ['3', '2']
+
+
+def test_equal_scores_keep_index_order():
+    tasks = [make_task(str(number), f'Task {number}') for number in range(1, 6)]
+    index = SearchIndex(tasks)
+    assert index.search('task') == ['1', '2', '3', '4', '5']
+    assert index.search('task', limit=3) == ['1', '2', '3']
+
+
+def test_results_follow_edits():
+    alpha, beta = make_task('1', 'Alpha'), make_task('2', 'Beta')
+    index = SearchIndex([alpha, beta])
+    assert index.search('al') == ['1']  # also caches the short prefix
+
+    alpha['name'] = 'Gamma'
+    index.update(alpha)
+    beta['comments'] = 'alpine notes'
+    index.update(beta)
+    assert index.search('al') == ['2']
+    assert index.search('gam') == ['1']
+
+    index.remove('2')
+    assert index.search('al') == []
+    assert '2' not in index
+
+    index.add(make_task('3', 'Alps trip'))
+    assert index.pending == 1
+    assert index.search('al') == ['3']
+    assert index.pending == 0
+
+
+def test_index_pending_in_batches():
+    index = SearchIndex([make_task(str(number), 'Same') for number in range(10)])
+    assert index.index_pending(4) == 6
+    assert index.index_pending() == 0
+    assert len(index.search('same', limit=100)) == 10
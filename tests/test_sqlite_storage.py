@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+
+from todo_core.models import STATUSES
+from todo_core.sqlite_storage import SqliteStorage
+from todo_core.storage import JournalStorage
+from todo_core.store import TodoStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'todo_data.db')
+
+
+def task(task_id, **fields):
+    return dict({'id': task_id, 'name': f'Task {task_id}', 'category_id': '1', 'priority': 'Medium',
+                 'start_date': '2024-01-01', 'due_date': '2024-02-01', 'progress': 0,
+                 'status': 'Not Started', 'comments': '', 'date_completed': None}, **fields)
+
+
+def test_round_trip_with_extra_fields(db_path):
+    storage = SqliteStorage(db_path)
+    storage.write_snapshot({'1': {'name': 'Work', 'color': '#2196F3'}}, [task('1'), task('2')],
+                           {'next_task_id': 3})
+    storage.append(tasks=[task('2', status='Completed', colour='red'), task('3')])
+    storage.close()
+
+    storage = SqliteStorage(db_path)
+    categories, tasks = storage.load()
+    assert categories == {'1': {'name': 'Work', 'color': '#2196F3'}}
+    assert tasks == [task('1'), task('2', status='Completed', colour='red'), task('3')]
+    assert storage.meta == {'next_task_id': 3}
+    assert [t['id'] for t in storage.iter_tasks('Completed')] == ['2']
+    assert [t['id'] for t in storage.iter_tasks(page_size=1)] == ['1', '2', '3']
+    storage.close()
+
+
+def test_older_database_gains_the_extra_column(db_path):
+    storage = SqliteStorage(db_path)
+    storage.write_snapshot({}, [task('1')])
+    storage.close()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('ALTER TABLE tasks DROP COLUMN extra')
+
+    storage = SqliteStorage(db_path)
+    storage.append(tasks=[task('2', colour='blue')])
+    assert storage.load()[1] == [task('1'), task('2', colour='blue')]
+    storage.close()
+
+
+def test_filtered_queries_match_the_json_backend(tmp_path, db_path):
+    tasks = [task(str(number), category_id=str(number % 3),
+                  status='Completed' if number % 2 else 'Not Started',
+                  priority='High' if number % 5 == 0 else 'Low',
+                  due_date=(None, '', f'2024-{number % 12 + 1:02d}-15')[min(number % 4, 2)])
+             for number in range(1, 200)]
+    storage = SqliteStorage(db_path)
+    storage.write_snapshot({}, tasks)
+    journal = JournalStorage(str(tmp_path / 'todo_data.json'))
+    journal.write_snapshot({}, tasks)
+
+    for filters in ({'status': 'Completed'}, {'category_id': '1', 'status': 'Completed'},
+                    {'priority': 'High'}, {'due_from': '2024-03-01', 'due_to': '2024-06-30'},
+                    {'due_to': '2024-04-30', 'category_id': '2'}):
+        found = [t['id'] for t in storage.iter_tasks(page_size=7, **filters)]
+        assert found == [t['id'] for t in journal.iter_tasks(**filters)]
+        assert found  # every filter selects something
+    storage.close()
+
+
+@pytest.mark.parametrize('filters, index', [
+    ({'status': 'Completed'}, 'idx_tasks_status'),
+    ({'category_id': '1', 'status': 'Completed'}, 'idx_tasks_category_status'),
+    ({'priority': 'High'}, 'idx_tasks_priority'),
+    ({'due_from': '2024-03-01', 'due_to': '2024-03-02'}, 'idx_tasks_due_date'),
+])
+def test_filtered_queries_use_an_index(db_path, filters, index):
+    storage = SqliteStorage(db_path)
+    storage.write_snapshot({}, [
+        task(str(number), category_id=str(number % 50), status=STATUSES[number % 4],
+             priority='High' if number % 9 == 0 else 'Low',
+             due_date=f'2024-{number % 12 + 1:02d}-{number % 28 + 1:02d}')
+        for number in range(2000)])
+    storage.conn.execute('ANALYZE')
+    sql, params = storage._select_tasks(**filters)
+    plan = storage.conn.execute(f'EXPLAIN QUERY PLAN {sql}', [0, *params, 1000]).fetchall()
+    assert index in ' '.join(row[-1] for row in plan)
+    storage.close()
+
+
+def test_history_of_one_category_is_read_on_its_own(db_path):
+    storage = SqliteStorage(db_path)
+    categories = {'1': {'name': 'Work', 'color': '#2196F3'}, '2': {'name': 'Home', 'color': '#4CAF50'}}
+    storage.write_snapshot(categories, [task('1', status='Completed'),
+                                        task('2', category_id='2', status='Completed'), task('3')])
+    storage.close()
+
+    store = TodoStore(db_path)
+    for _ in store.load_in_batches(defer_completed=True):
+        pass
+    assert store.deferred == {'1': 1, '2': 1}
+    assert [t.id for t in store.load_deferred(category_id='2')] == ['2']
+    assert store.deferred == {'1': 1}
+    assert store.load_deferred(category_id='2') == []
+    assert [t.id for t in store.load_deferred()] == ['1']
+    store.close()
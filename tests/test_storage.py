@@ -0,0 +1,118 @@
+import json
+import os
+
+from todo_core.storage import JournalStorage
+
+
+def task(task_id, name=None, status='Not Started'):
+    return {'id': task_id, 'name': name or f'Task {task_id}', 'category_id': '1', 'status': status}
+
+
+CATEGORIES = {'1': {'name': 'Work', 'color': '#2196F3'}}
+
+
+def reload(path):
+    storage = JournalStorage(path)
+    categories, tasks = storage.load()
+    storage.wait()
+    return storage, categories, tasks
+
+
+def test_journal_is_replayed_over_snapshot(data_path):
+    storage = JournalStorage(data_path)
+    storage.write_snapshot(CATEGORIES, [task('1'), task('2')], {'next_task_id': 3})
+    storage.append(tasks=[task('2', 'Renamed'), task('3')], meta={'next_task_id': 4})
+
+    storage, categories, tasks = reload(data_path)
+    assert categories == CATEGORIES
+    assert [(t['id'], t['name']) for t in tasks] == [('1', 'Task 1'), ('2', 'Renamed'), ('3', 'Task 3')]
+    assert storage.meta == {'next_task_id': 4}
+
+
+def test_torn_journal_record_is_cut_off(data_path):
+    storage = JournalStorage(data_path)
+    storage.write_snapshot(CATEGORIES, [task('1')])
+    storage.append(tasks=[task('2')])
+    with open(storage.journal_path, 'a') as f:
+        f.write('{"type":"task","id":"3","data":{"id":"3","na')
+
+    storage, _, tasks = reload(data_path)
+    assert [t['id'] for t in tasks] == ['1', '2']
+    with open(storage.journal_path, 'rb') as f:
+        assert f.read().endswith(b'\n')
+
+    # Records appended after the repair are read back normally
+    storage.append(tasks=[task('4')])
+    _, _, tasks = reload(data_path)
+    assert [t['id'] for t in tasks] == ['1', '2', '4']
+
+
+def test_damaged_snapshot_is_recovered_from_backup_and_its_journal(data_path):
+    storage = JournalStorage(data_path)
+    storage.write_snapshot(CATEGORIES, [task('1')])
+    storage.append(tasks=[task('2')])
+    # The second snapshot folds in the journal, which is kept with the backup
+    storage.write_snapshot(CATEGORIES, [task('1'), task('2'), task('3')])
+    assert not os.path.exists(storage.journal_path)
+    assert os.path.exists(storage.backup_journal_path)
+    storage.append(tasks=[task('4')])
+
+    with open(data_path, 'w') as f:
+        f.write('{"categories": {"1": ')
+
+    storage, categories, tasks = reload(data_path)
+    assert categories == CATEGORIES
+    assert [t['id'] for t in tasks] == ['1', '2', '4']  # only '3' (in the lost snapshot) is missing
+    assert storage.recovery_note is not None
+    assert any(name.startswith('todo_data.json.corrupt-') for name in os.listdir(os.path.dirname(data_path)))
+
+
+def test_missing_snapshot_falls_back_to_backup(data_path):
+    storage = JournalStorage(data_path)
+    storage.write_snapshot(CATEGORIES, [task('1')])
+    storage.append(tasks=[task('2')])
+    storage.write_snapshot(CATEGORIES, [task('1'), task('2')])
+    os.remove(data_path)  # as if the process died between the two renames
+
+    _, _, tasks = reload(data_path)
+    assert [t['id'] for t in tasks] == ['1', '2']
+
+
+def test_compaction_keeps_the_data(data_path):
+    storage = JournalStorage(data_path, compact_every=3)
+    storage.write_snapshot(CATEGORIES, [task('1')])
+    for number in range(2, 8):
+        storage.append(tasks=[task(str(number))])
+    storage.wait()
+
+    _, _, tasks = reload(data_path)
+    assert [t['id'] for t in tasks] == [str(number) for number in range(1, 8)]
+
+
+def test_iter_load_matches_load(data_path):
+    storage = JournalStorage(data_path)
+    storage.write_snapshot(CATEGORIES, [task('1'), task('2'), task('3')], {'next_task_id': 4})
+    storage.append(categories={'2': {'name': 'Home', 'color': '#4CAF50'}},
+                   tasks=[task('2', 'Changed'), task('4')], meta={'next_task_id': 5})
+
+    categories, tasks = JournalStorage(data_path).load()
+    streamed = list(JournalStorage(data_path).iter_load())
+    assert ('categories', categories) in streamed
+    assert [value for kind, value in streamed if kind == 'task'] == tasks
+    assert streamed[-1] == ('meta', {'next_task_id': 5})
+
+
+def test_iter_tasks_filters_by_status(data_path):
+    storage = JournalStorage(data_path)
+    storage.write_snapshot(CATEGORIES, [task('1'), task('2', status='Completed')])
+    storage.append(tasks=[task('1', status='Completed')])
+
+    assert [t['id'] for t in storage.iter_tasks('Completed')] == ['1', '2']
+    assert list(storage.iter_tasks('In Progress')) == []
+
+
+def test_snapshot_is_plain_json(data_path):
+    storage = JournalStorage(data_path)
+    storage.write_snapshot(CATEGORIES, [task('1')], {'next_task_id': 2})
+    with open(data_path) as f:
+        assert json.load(f) == {'categories': CATEGORIES, 'tasks': [task('1')], 'meta': {'next_task_id': 2}}
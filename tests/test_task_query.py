@@ -0,0 +1,103 @@
+import pytest
+
+from todo_core import commands
+from todo_core.task_query import TaskQuery
+
+
+@pytest.fixture
+def filled(store):
+    work = commands.add_category(store, 'Work')
+    home = commands.add_category(store, 'Home')
+    commands.add_tasks(store, [
+        {'name': 'Report', 'category_id': work, 'start_date': '2024-01-01', 'due_date': '2024-03-01',
+         'priority': 'High'},
+        {'name': 'Meeting', 'category_id': work, 'start_date': '2024-01-01', 'due_date': '2024-02-01',
+         'status': 'In Progress'},
+        {'name': 'Laundry', 'category_id': home, 'start_date': '2024-01-01', 'due_date': '2024-01-15',
+         'priority': 'Low'},
+    ])
+    return store, work, home
+
+
+def names(tasks):
+    return [task.name for task in tasks]
+
+
+def test_filters_and_sorting(filled):
+    store, work, _ = filled
+    assert names(TaskQuery(category_id=work).run(store)) == ['Report', 'Meeting']
+    assert names(TaskQuery(sort=('due_date',)).run(store)) == ['Laundry', 'Meeting', 'Report']
+    assert names(TaskQuery(sort=('priority',)).run(store)) == ['Report', 'Meeting', 'Laundry']
+    assert names(TaskQuery(status='In Progress').run(store)) == ['Meeting']
+    assert names(TaskQuery(due_from='2024-01-20', due_to='2024-02-28').run(store)) == ['Meeting']
+    with pytest.raises(ValueError):
+        TaskQuery(due_from='next week')
+    with pytest.raises(TypeError):
+        TaskQuery(colour='red')
+
+
+def test_repeated_query_is_served_from_cache(filled):
+    store, work, _ = filled
+    query = TaskQuery(category_id=work).order_by('name')
+    first = query.run(store)
+    hits = store.query_cache.hits
+    assert query.run(store) == first
+    assert TaskQuery(category_id=work).order_by('name').run(store) == first  # equal queries share it
+    assert store.query_cache.hits == hits + 2
+
+
+def test_updates_invalidate_only_their_category(filled):
+    store, work, home = filled
+    work_query, home_query = TaskQuery(category_id=work), TaskQuery(category_id=home, status='Completed')
+    work_query.run(store)
+    assert home_query.run(store) == []
+
+    laundry = TaskQuery(category_id=home).run(store)[0]
+    commands.complete_task(store, laundry)
+    hits = store.query_cache.hits
+    assert names(home_query.run(store)) == ['Laundry']
+    assert store.query_cache.hits == hits  # recomputed
+    work_query.run(store)
+    assert store.query_cache.hits == hits + 1  # untouched category is still cached
+
+
+def test_moving_a_task_invalidates_both_categories(filled):
+    store, work, home = filled
+    work_query, home_query = TaskQuery(category_id=work), TaskQuery(category_id=home)
+    report = work_query.run(store)[0]
+    home_query.run(store)
+
+    commands.update_task(store, report, category_id=home)
+    assert names(work_query.run(store)) == ['Meeting']
+    assert names(home_query.run(store)) == ['Report', 'Laundry']
+
+
+def test_adding_a_task_invalidates_unscoped_queries(filled):
+    store, work, _ = filled
+    everything = TaskQuery(sort=('name',))
+    assert len(everything.run(store)) == 3
+    commands.add_task(store, 'Budget', work, '2024-01-01', '2024-04-01')
+    assert names(everything.run(store)) == ['Budget', 'Laundry', 'Meeting', 'Report']
+
+
+def test_today_query_follows_the_plan(filled):
+    store, _, _ = filled
+    today = TaskQuery(today=True)
+    assert today.run(store) == []
+    laundry, report = TaskQuery(sort=('name',)).run(store)[0], TaskQuery(sort=('name',)).run(store)[2]
+    commands.add_to_today(store, report)
+    commands.add_to_today(store, laundry)
+    assert names(today.run(store)) == ['Report', 'Laundry']
+    commands.remove_from_today(store, report)
+    assert names(today.run(store)) == ['Laundry']
+
+
+def test_cache_drops_least_recently_used(store):
+    store.query_cache.size = 2
+    queries = [TaskQuery(priority=priority) for priority in ('Low', 'Medium', 'High')]
+    for query in queries:
+        query.run(store)
+    queries[2].run(store)
+    hits = store.query_cache.hits
+    queries[0].run(store)
+    assert store.query_cache.hits == hits
@@ -0,0 +1,63 @@
+import datetime
+
+from todo_core import commands, queries
+from todo_core import today as today_module
+from todo_core.store import TodoStore
+from todo_core.today import DayPlan
+
+
+class FakeDate(datetime.date):
+    current = datetime.date(2024, 5, 1)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+def test_plan_is_read_and_saved_under_its_day():
+    plan = DayPlan({'today:2024-05-01': ['3', '1']}, day='2024-05-01')
+    assert list(plan) == ['3', '1']
+    assert plan.add('2')
+    assert not plan.add('2')
+    assert plan.remove('3')
+    assert plan.meta() == {'today:2024-05-01': ['1', '2']}
+    assert not plan.dirty
+
+
+def test_new_day_starts_an_empty_plan(monkeypatch):
+    monkeypatch.setattr(today_module, 'date', FakeDate)
+    FakeDate.current = datetime.date(2024, 5, 1)
+    plan = DayPlan({'today:2024-05-01': ['1']})
+    plan.add('2')
+    version = plan.version
+
+    FakeDate.current = datetime.date(2024, 5, 2)
+    assert list(plan) == []
+    assert plan.version != version
+    plan.add('3')
+    # Yesterday's unsaved change is still saved, under yesterday's key
+    assert plan.meta() == {'today:2024-05-01': ['1', '2'], 'today:2024-05-02': ['3']}
+
+
+def test_pinned_plan_does_not_follow_the_date(monkeypatch):
+    monkeypatch.setattr(today_module, 'date', FakeDate)
+    FakeDate.current = datetime.date(2024, 5, 2)
+    plan = DayPlan({'today:2024-05-01': ['1']}, day='2024-05-01')
+    assert list(plan) == ['1']
+
+
+def test_plan_is_saved_with_the_data(data_path, store):
+    work = commands.add_category(store, 'Work')
+    first, second = commands.add_tasks(store, [
+        {'name': name, 'category_id': work, 'start_date': '2024-01-01', 'due_date': '2024-01-02'}
+        for name in ('First', 'Second')])
+    commands.add_to_today(store, second)
+    commands.add_to_today(store, first)
+    commands.update_task(store, first, name='First, renamed')
+    store.close()
+
+    reopened = TodoStore(data_path)
+    reopened.load()
+    # The plan refers to the tasks, so it shows their latest state
+    assert [task.name for task in queries.today_tasks(reopened)] == ['Second', 'First, renamed']
+    reopened.close()
@@ -0,0 +1,336 @@
+import tkinter as tk
+from tkinter import ttk
+from datetime import date
+
+from instrumentation import traced
+from styles import STATUS_BOX_COLORS, UNKNOWN_COLOR, font
+from todo_core.columns import TaskColumns
+from todo_core.models import STATUSES
+
+MARGIN_LEFT = 150  # Space for task names
+MARGIN_TOP = 50    # Space for date headers
+ROW_HEIGHT = 30
+BAR_HEIGHT = 20
+DENSITY_BUCKET = 4  # Width in pixels of one density cell
+
+# Zoom levels, from closest to farthest. Far levels summarize several tasks
+# per row as a density strip instead of drawing one bar per task.
+ZOOM_LEVELS = [
+    {'px_per_day': 32, 'tasks_per_row': 1},
+    {'px_per_day': 16, 'tasks_per_row': 1},
+    {'px_per_day': 8, 'tasks_per_row': 1},
+    {'px_per_day': 4, 'tasks_per_row': 1},
+    {'px_per_day': 2, 'tasks_per_row': 10},
+    {'px_per_day': 1, 'tasks_per_row': 50},
+    {'px_per_day': 0.25, 'tasks_per_row': 250},
+]
+
+
+def month_start(ordinal):
+    """Return the ordinal of the first day of the month containing ``ordinal``"""
+    day = date.fromordinal(ordinal)
+    return date(day.year, day.month, 1).toordinal()
+
+
+def next_month(ordinal):
+    """Return the ordinal of the first day of the month after ``ordinal``"""
+    day = date.fromordinal(ordinal)
+    if day.month == 12:
+        return date(day.year + 1, 1, 1).toordinal()
+    return date(day.year, day.month + 1, 1).toordinal()
+
+
+class GanttChart:
+    """A Gantt chart canvas that only draws what is inside the scroll window.
+
+    The chart keeps the full list of tasks but, on every scroll, resize or
+    zoom, deletes and redraws just the bars, names and day ticks that fall
+    inside the visible area, so redraw cost depends on the screen size rather
+    than on the number of tasks. At far zoom levels rows are grouped and
+    drawn as density strips.
+
+    Task date ordinals are copied into TaskColumns, which lays out every bar
+    for a zoom level in one batched pass; tasks whose dates are malformed
+    keep their row but get no bar.
+
+    Colors come from the theme's current palette; the canvas is registered
+    with the theme and apply_theme() redraws the visible window.
+    """
+
+    # Indexed by status code; unknown statuses share the last color
+    BAR_COLORS = [STATUS_BOX_COLORS[status] for status in STATUSES] + [UNKNOWN_COLOR]
+
+    def __init__(self, parent, theme):
+        self.theme = theme
+        self.tasks = []
+        self.columns = TaskColumns(())
+        self.rows = {}          # task id -> row
+        self.zoom = 2
+        self.start_day = 0      # ordinal of the first day on the chart
+        self.end_day = 0        # ordinal of the first day after the chart
+        self._render_pending = False
+
+        self.canvas = tk.Canvas(parent, relief='solid', bd=1, height=400)
+        theme.register(self.canvas, 'chart')
+
+        # Horizontal scrollbar for timeline
+        self.h_scrollbar = ttk.Scrollbar(parent, orient="horizontal", command=self.canvas.xview)
+
+        # Vertical scrollbar for tasks
+        self.v_scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.canvas.yview)
+
+        # Configure canvas scrolling; every scroll redraws the visible window
+        self.canvas.configure(xscrollcommand=self._on_xscroll, yscrollcommand=self._on_yscroll)
+        self.canvas.bind('<Configure>', lambda e: self.schedule_render())
+        self.canvas.bind('<Control-MouseWheel>',
+                         lambda e: self.zoom_in() if e.delta > 0 else self.zoom_out())
+
+        # Pack scrollbars and canvas
+        self.h_scrollbar.pack(side='bottom', fill='x')
+        self.v_scrollbar.pack(side='right', fill='y')
+        self.canvas.pack(side='left', fill='both', expand=True)
+
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+    def set_tasks(self, tasks, fit=False):
+        """Show a new task list; with ``fit`` pick the zoom that fits the width"""
+        self.tasks = list(tasks)
+        self.rows = {task.id: row for row, task in enumerate(self.tasks)}
+        self.columns = TaskColumns(self.tasks)
+        days = self.columns.day_range()
+        if days:
+            # Expand to full months
+            self.start_day = month_start(days[0])
+            self.end_day = next_month(days[1])
+        if fit:
+            self.zoom = self._fitting_zoom()
+        self._update_scrollregion()
+        self.render()
+
+    def add_task(self, task):
+        """Append a task, re-measuring the date range only if it falls outside"""
+        if not self.covers(task):
+            self.set_tasks(self.tasks + [task])
+            return
+        self.rows[task.id] = len(self.tasks)
+        self.tasks.append(task)
+        self.columns.append(task)
+        self._update_scrollregion()
+        self.schedule_render()
+
+    def update_task(self, task):
+        """Redraw after a task was edited, re-measuring only if it moved outside"""
+        row = self.rows.get(task.id)
+        if row is None or not self.covers(task):
+            self.set_tasks(self.tasks)
+            return
+        self.columns.update(row, task)
+        self.schedule_render()
+
+    def covers(self, task):
+        """Return True if a task's dates fit the current month range"""
+        start, end = task.start_day, task.due_day
+        if start is None or end is None:
+            return bool(self.tasks)
+        return (bool(self.tasks) and self.start_day <= min(start, end)
+                and max(start, end) < self.end_day)
+
+    # ------------------------------------------------------------------
+    # Zoom
+    # ------------------------------------------------------------------
+    @property
+    def level(self):
+        return ZOOM_LEVELS[self.zoom]
+
+    def zoom_in(self):
+        self.set_zoom(self.zoom - 1)
+
+    def zoom_out(self):
+        self.set_zoom(self.zoom + 1)
+
+    def set_zoom(self, zoom):
+        """Change the zoom level, keeping the date in the middle of the view"""
+        zoom = max(0, min(len(ZOOM_LEVELS) - 1, zoom))
+        if zoom == self.zoom:
+            return
+        width = self.canvas.winfo_width()
+        center_day = self._x_to_day(self.canvas.canvasx(width / 2))
+        self.zoom = zoom
+        self._update_scrollregion()
+        scroll_width = self._chart_width() + MARGIN_LEFT
+        left = MARGIN_LEFT + (center_day - self.start_day) * self.level['px_per_day'] - width / 2
+        self.canvas.xview_moveto(max(0, left) / scroll_width)
+        self.schedule_render()
+
+    def _fitting_zoom(self):
+        """Return the closest zoom level at which the whole range fits the view"""
+        width = max(self.canvas.winfo_width(), 800) - MARGIN_LEFT
+        days = max(self.end_day - self.start_day, 1)
+        for zoom, level in enumerate(ZOOM_LEVELS):
+            if days * level['px_per_day'] <= width:
+                return zoom
+        return len(ZOOM_LEVELS) - 1
+
+    # ------------------------------------------------------------------
+    # Geometry
+    # ------------------------------------------------------------------
+    def _chart_width(self):
+        return (self.end_day - self.start_day) * self.level['px_per_day']
+
+    def _row_count(self):
+        per_row = self.level['tasks_per_row']
+        return (len(self.tasks) + per_row - 1) // per_row
+
+    def _update_scrollregion(self):
+        width = MARGIN_LEFT + self._chart_width()
+        height = MARGIN_TOP + self._row_count() * ROW_HEIGHT
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+
+    def _day_to_x(self, day):
+        return MARGIN_LEFT + (day - self.start_day) * self.level['px_per_day']
+
+    def _x_to_day(self, x):
+        return self.start_day + (x - MARGIN_LEFT) / self.level['px_per_day']
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+    def schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.canvas.after_idle(self.render)
+
+    def _on_xscroll(self, first, last):
+        self.h_scrollbar.set(first, last)
+        self.schedule_render()
+
+    def _on_yscroll(self, first, last):
+        self.v_scrollbar.set(first, last)
+        self.schedule_render()
+
+    @traced
+    def render(self):
+        """Redraw the part of the chart inside the scroll window"""
+        self._render_pending = False
+        canvas = self.canvas
+        canvas.delete('all')
+        palette = self.theme.palette
+
+        if not self.tasks:
+            canvas.create_text(400, 200, text="No tasks to display",
+                               font=font('notice'), fill=palette['muted'])
+            return
+
+        width = max(canvas.winfo_width(), 1)
+        height = max(canvas.winfo_height(), 1)
+        x0, y0 = canvas.canvasx(0), canvas.canvasy(0)
+        x1, y1 = x0 + width, y0 + height
+
+        # Visible rows and days
+        first_row = max(0, int(y0 // ROW_HEIGHT))
+        last_row = min(self._row_count(), int((y1 - MARGIN_TOP) // ROW_HEIGHT) + 1)
+        first_day = max(self.start_day, int(self._x_to_day(x0 + MARGIN_LEFT)))
+        last_day = min(self.end_day, int(self._x_to_day(x1)) + 1)
+
+        if self.level['tasks_per_row'] == 1:
+            self._draw_bars(first_row, last_row, first_day, last_day)
+        else:
+            self._draw_density(first_row, last_row, first_day, last_day)
+
+        # Sticky name column and date axis, drawn on top of the bars
+        canvas.create_rectangle(x0, y0, x0 + MARGIN_LEFT, y1, fill=palette['chart'], outline='')
+        self._draw_row_labels(first_row, last_row, x0)
+        self._draw_date_axis(first_day, last_day, x0, y0, x1)
+        canvas.create_rectangle(x0, y0, x0 + MARGIN_LEFT, y0 + MARGIN_TOP, fill=palette['chart'], outline='')
+
+        # Axis lines
+        line = palette['line']
+        canvas.create_line(x0 + MARGIN_LEFT, y0 + MARGIN_TOP, x1, y0 + MARGIN_TOP, fill=line, width=2)
+        canvas.create_line(x0 + MARGIN_LEFT, y0 + MARGIN_TOP, x0 + MARGIN_LEFT, y1, fill=line, width=2)
+
+    def apply_theme(self):
+        """Redraw with the theme's current palette (the canvas itself is registered)"""
+        self.render()
+
+    def _row_y(self, row):
+        return MARGIN_TOP + row * ROW_HEIGHT + ROW_HEIGHT / 2
+
+    def _draw_bars(self, first_row, last_row, first_day, last_day):
+        """Draw one bar per task in the visible rows that overlaps the visible days"""
+        bars = self.columns.bars(first_row, last_row, first_day, last_day,
+                                 self.start_day, self.level['px_per_day'], MARGIN_LEFT)
+        outline = self.theme.palette['line']
+        for row, start_x, end_x, code in bars:
+            y = self._row_y(row)
+            self.canvas.create_rectangle(start_x, y - BAR_HEIGHT / 2, end_x, y + BAR_HEIGHT / 2,
+                                         fill=self.BAR_COLORS[code], outline=outline, width=2)
+
+    def _draw_density(self, first_row, last_row, first_day, last_day):
+        """Draw each visible group of tasks as a strip shaded by how many are active"""
+        per_row = self.level['tasks_per_row']
+        days_per_bucket = DENSITY_BUCKET / self.level['px_per_day']
+        bucket_count = int((last_day - first_day) / days_per_bucket) + 2
+
+        cells = self.columns.density(first_row, last_row, per_row, first_day, last_day,
+                                     days_per_bucket, bucket_count)
+        for row, bucket, active in cells:
+            y = self._row_y(row)
+            shade = 235 - int(200 * min(active, per_row) / per_row)
+            x = self._day_to_x(first_day + bucket * days_per_bucket)
+            self.canvas.create_rectangle(x, y - BAR_HEIGHT / 2, x + DENSITY_BUCKET, y + BAR_HEIGHT / 2,
+                                         fill=f'#{shade:02x}{shade:02x}ff', outline='')
+
+    def _draw_row_labels(self, first_row, last_row, x0):
+        """Draw task names (or group ranges) in the sticky name column"""
+        per_row = self.level['tasks_per_row']
+        color = self.theme.palette['text']
+        for row in range(first_row, last_row):
+            if per_row == 1:
+                text = self.tasks[row].name
+                if len(text) > 22:
+                    text = text[:21] + '…'
+            else:
+                last = min(len(self.tasks), (row + 1) * per_row)
+                text = f"Tasks {row * per_row + 1}–{last}"
+            self.canvas.create_text(x0 + MARGIN_LEFT - 5, self._row_y(row), text=text,
+                                    anchor='e', font=font('detail'), fill=color)
+
+    def _draw_date_axis(self, first_day, last_day, x0, y0, x1):
+        """Draw month names and day ticks for the visible days"""
+        canvas = self.canvas
+        palette = self.theme.palette
+        canvas.create_rectangle(x0, y0, x1, y0 + MARGIN_TOP, fill=palette['chart'], outline='')
+
+        # Tick every 5 days (1, 6, 11, ...) unless that gets too crowded
+        px_per_day = self.level['px_per_day']
+        if px_per_day * 5 >= 20:
+            tick_days = range(1, 32, 5)
+        elif px_per_day * 10 >= 20:
+            tick_days = (1, 11, 21)
+        else:
+            tick_days = (1,)
+
+        month = month_start(first_day)
+        while month < last_day:
+            following = next_month(month)
+            start_x = self._day_to_x(max(month, first_day))
+            end_x = self._day_to_x(min(following, last_day))
+
+            # Month header, kept inside the visible part of the month
+            if end_x - start_x > 40:
+                month_name = date.fromordinal(month).strftime('%B %Y')
+                canvas.create_text((start_x + end_x) / 2, y0 + MARGIN_TOP / 2,
+                                   text=month_name, font=font('month'), anchor='center',
+                                   fill=palette['text'])
+
+            for day in tick_days:
+                ordinal = month + day - 1
+                if ordinal >= following or not first_day <= ordinal < last_day:
+                    continue
+                day_x = self._day_to_x(ordinal)
+                canvas.create_line(day_x, y0 + MARGIN_TOP - 5, day_x, y0 + MARGIN_TOP + 5,
+                                   fill=palette['line'], width=1)
+                canvas.create_text(day_x, y0 + MARGIN_TOP + 15, text=str(day),
+                                   font=font('tick'), anchor='center', fill=palette['text'])
+            month = following
@@ -0,0 +1,9 @@
+"""Core (GUI-free) building blocks for the To-Do List Application"""
+
+from .category_index import CategoryIndex
+from .events import ChangeNotifier
+from .locking import DataLockedError
+from .search import SearchIndex
+from .storage import JournalStorage, Storage, StorageError, open_storage
+from .task_index import TaskIndex
+from .task_query import QueryCache, TaskQuery
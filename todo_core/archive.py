@@ -0,0 +1,132 @@
+"""Archive of tasks completed long ago.
+
+Tasks completed more than ``days`` days ago are moved out of the working
+set when the data is loaded and appended to a second storage next to the
+data file (``todo_data.archive.json``, or ``todo_data.archive.db`` for
+SQLite), so they are no longer counted, drawn or rewritten by every save.
+Views page them back in when the user asks to see history. How many tasks
+each category has in the archive is saved with the working data
+(``meta['archived']``), so the archive itself is only read on request.
+
+An archived task that is reopened moves back to the working data; the
+copy left in the archive is ignored from then on.
+"""
+
+import glob
+import os
+from datetime import date, timedelta
+
+from .models import COMPLETED
+from .save_queue import SaveQueue
+from .storage import open_storage
+
+META_KEY = 'archived'
+
+
+def archive_path(path):
+    """Return the archive file that belongs to a data file"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.archive{ext}"
+
+
+def has_archive(path):
+    """Return True if a data file has an archive (which may be only a journal so far)"""
+    return bool(glob.glob(glob.escape(archive_path(path)) + '*'))
+
+
+class Archive:
+    def __init__(self, path, days=None, background=False):
+        self.path = archive_path(path)
+        self.storage = open_storage(self.path)
+        self.saves = SaveQueue(self.storage) if background else None
+        # Tasks completed before this day (an ordinal) are archived; never, without ``days``
+        self.cutoff = (date.today() - timedelta(days=days)).toordinal() if days else None
+        self.counts = {}      # category id -> number of archived tasks
+        self.ids = {}         # paged-in archived task id -> category it is counted under
+        self.loaded = set()   # category ids paged in (None once everything is)
+        self.dirty = False
+
+    def due(self, task):
+        """Return True if a task was completed long enough ago to be archived"""
+        return (self.cutoff is not None and task.status_code == COMPLETED
+                and task.completed_day is not None and task.completed_day < self.cutoff)
+
+    def read_meta(self, meta):
+        self.counts = dict((meta or {}).get(META_KEY, {}))
+        self.ids = {}
+        self.loaded = set()
+        self.dirty = False
+
+    def meta(self):
+        """Return the meta values to save, marking the counts clean"""
+        self.dirty = False
+        return {META_KEY: dict(self.counts)}
+
+    def unloaded(self, category_id=None):
+        """Return how many archived tasks (of a category, or all) are not paged in"""
+        if None in self.loaded:
+            return 0
+        if category_id is None:
+            return sum(count for cat_id, count in self.counts.items() if cat_id not in self.loaded)
+        return 0 if category_id in self.loaded else self.counts.get(category_id, 0)
+
+    def add(self, tasks):
+        """Move tasks into the archive.
+
+        They are on disk when this returns, so the caller can then save
+        working data without them.
+        """
+        self.storage.append(tasks=tasks)
+        for task in tasks:
+            self._count(task.category_id, 1)
+
+    def paged_in(self, task):
+        """Record that an archived task was loaded into the working data"""
+        self.ids[task.id] = task.category_id
+
+    def keep(self, task):
+        """Account for a change to a paged-in task.
+
+        Returns False if the task no longer belongs in the archive (it was
+        reopened) and should be saved with the working data instead.
+        """
+        counted_under = self.ids[task.id]
+        if task.status_code == COMPLETED and task.category_id == counted_under:
+            return True
+        self._count(counted_under, -1)
+        if task.status_code != COMPLETED:
+            del self.ids[task.id]
+            return False
+        self._count(task.category_id, 1)
+        self.ids[task.id] = task.category_id
+        return True
+
+    def save(self, tasks):
+        """Save changes to paged-in archived tasks"""
+        if self.saves is not None:
+            self.saves.put(tasks=tasks)
+        else:
+            self.storage.append(tasks=tasks)
+
+    def _count(self, category_id, change):
+        count = self.counts.get(category_id, 0) + change
+        if count > 0:
+            self.counts[category_id] = count
+        else:
+            self.counts.pop(category_id, None)
+        self.dirty = True
+
+    def iter_tasks(self, category_id=None):
+        """Yield the archived tasks (of one category, if given) from disk"""
+        return self.storage.iter_tasks(status='Completed', category_id=category_id)
+
+    def flush(self, timeout=None):
+        if self.saves is not None:
+            return self.saves.flush(timeout)
+        return True
+
+    def close(self, timeout=10):
+        if self.saves is not None:
+            return self.saves.close(timeout)
+        self.storage.wait()
+        return True
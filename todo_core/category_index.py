@@ -0,0 +1,53 @@
+"""Name lookups for categories.
+
+CategoryIndex maps category names back to ids and keeps the list of names
+shown in the category pickers, so neither has to be rebuilt by walking the
+categories dict. Names are compared case-insensitively and ignoring
+surrounding whitespace, and must be unique.
+"""
+
+
+def _name_key(name):
+    return name.strip().casefold()
+
+
+class CategoryIndex:
+    def __init__(self, categories=None):
+        self._ids = {}          # name key -> category id
+        self._names = {}        # category id -> display name, in category order
+        self._names_list = None
+        for cat_id, category in (categories or {}).items():
+            self.set(cat_id, category)
+
+    @property
+    def names(self):
+        """Category names in display order (cached until a category changes)"""
+        if self._names_list is None:
+            self._names_list = list(self._names.values())
+        return self._names_list
+
+    def id_for(self, name):
+        """Return the id of the category with this name, or None"""
+        return self._ids.get(_name_key(name))
+
+    def is_taken(self, name, exclude_id=None):
+        """Return True if another category already uses this name"""
+        cat_id = self.id_for(name)
+        return cat_id is not None and cat_id != exclude_id
+
+    def set(self, cat_id, category):
+        """Index a new category or pick up a rename"""
+        old_name = self._names.get(cat_id)
+        if old_name is not None and self._ids.get(_name_key(old_name)) == cat_id:
+            del self._ids[_name_key(old_name)]
+        self._names[cat_id] = category['name']
+        # setdefault keeps the first id if older data already has duplicates
+        self._ids.setdefault(_name_key(category['name']), cat_id)
+        self._names_list = None
+
+    def remove(self, cat_id):
+        """Drop a category from the index"""
+        name = self._names.pop(cat_id, None)
+        if name is not None and self._ids.get(_name_key(name)) == cat_id:
+            del self._ids[_name_key(name)]
+        self._names_list = None
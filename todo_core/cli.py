@@ -0,0 +1,372 @@
+"""Command-line tool for bulk work on a data file.
+
+    python -m todo_core.cli import tasks.csv
+    python -m todo_core.cli update --category Work --due-to 2024-06-30 --complete
+    python -m todo_core.cli export in_progress.jsonl --status "In Progress" --sort due_date,-priority
+
+Every command takes ``--data`` (default todo_data.json; a .db file selects
+the SQLite backend). Imports read CSV or JSON-lines files with the task
+fields as columns/keys, plus an optional ``category`` column naming the
+category (created if it does not exist). Records are read, saved and
+written in batches, and every command reports its throughput.
+
+Import and update load the working data, because they go through the same
+commands (and indexes) as the application; tasks in the archive are not
+updated. Export streams the matching tasks from the data file and then the
+archive, without loading the rest, unless ``--sort`` needs them all.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from . import commands
+from .archive import archive_path, has_archive
+from .category_index import CategoryIndex
+from .commands import CommandError
+from .dates import validate_date
+from .locking import DataLock, DataLockedError
+from .models import PRIORITIES, STATUSES, TASK_FIELDS, Task
+from .storage import JournalStorage, StorageError, open_storage
+from .store import TodoStore
+from .task_query import SORT_KEYS, TaskQuery
+
+EXPORT_FIELDS = TASK_FIELDS + ('category',)
+MAX_REPORTED_ERRORS = 20
+
+
+def file_format(path, fmt=None):
+    """Return 'csv' or 'jsonl' for a file, from ``fmt`` or its extension"""
+    if fmt:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(f, fmt):
+    """Yield (line number, record dict) from an open CSV or JSON-lines file"""
+    if fmt == 'csv':
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield line_number, error
+            continue
+        yield line_number, record
+
+
+def batches(iterable, size):
+    """Yield lists of up to ``size`` items from ``iterable``"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Report:
+    """Counts, error messages (up to a limit) and throughput for one command"""
+
+    def __init__(self, out=sys.stderr):
+        self.out = out
+        self.started = time.perf_counter()
+        self.errors = 0
+
+    def error(self, message):
+        self.errors += 1
+        if self.errors <= MAX_REPORTED_ERRORS:
+            print(message, file=self.out)
+        elif self.errors == MAX_REPORTED_ERRORS + 1:
+            print("(more errors not shown)", file=self.out)
+
+    def done(self, verb, count):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        message = f"{verb} {count} tasks in {elapsed:.2f}s ({count / elapsed:,.0f} tasks/s)"
+        if self.errors:
+            message += f", {self.errors} skipped"
+        print(message, file=self.out)
+
+
+# ----------------------------------------------------------------------
+# Commands
+# ----------------------------------------------------------------------
+def _task_arguments(store, record):
+    """Turn an imported record into add_task's arguments"""
+    category_name = (record.get('category') or '').strip()
+    if category_name:
+        category_id = store.category_index.id_for(category_name)
+        if category_id is None:
+            category_id = commands.add_category(store, category_name)
+    else:
+        category_id = record.get('category_id') or None
+    return commands.validate_task(
+        store, record.get('name'), category_id, record.get('start_date'), record.get('due_date'),
+        priority=record.get('priority') or 'Medium',
+        progress=record.get('progress') or 0,
+        status=record.get('status') or 'Not Started',
+        comments=record.get('comments') or '')
+
+
+def import_tasks(store, f, fmt, batch_size=1000, report=None):
+    """Add the tasks of an open CSV/JSON-lines file; return how many were added.
+
+    Ids in the file are ignored: imported tasks always get new ids. Invalid
+    records are reported and skipped.
+    """
+    report = report or Report()
+    imported = 0
+    for batch in batches(read_records(f, fmt), batch_size):
+        valid = []
+        for line_number, record in batch:
+            if not isinstance(record, dict):
+                report.error(f"line {line_number}: not a JSON object ({record})")
+                continue
+            try:
+                valid.append(_task_arguments(store, record))
+            except CommandError as error:
+                report.error(f"line {line_number}: {error}")
+        if valid:
+            imported += len(commands.add_tasks(store, valid))
+    return imported
+
+
+def update_tasks(store, tasks, changes, batch_size=1000):
+    """Apply ``changes`` (or completion, if it is None) in batches; return the count"""
+    for batch in batches(tasks, batch_size):
+        if changes is None:
+            commands.complete_tasks(store, batch)
+        else:
+            commands.update_tasks(store, batch, **changes)
+    return len(tasks)
+
+
+def stream_tasks(data_path, query):
+    """Yield the saved tasks matching ``query`` from a data file and then its archive.
+
+    Tasks are read straight from storage (through its indexes, where it has
+    them) instead of loading the data. An archived copy of a task that was
+    reopened since is skipped, which takes a pass over every working task
+    to note its id.
+    """
+    storage = open_storage(data_path)
+    matches = query.matcher()
+    if not has_archive(data_path):
+        for record in storage.iter_tasks(**query.storage_filters()):
+            task = Task.from_dict(record)
+            if matches(task):
+                yield task
+        return
+
+    working_ids = set()
+    for record in storage.iter_tasks():
+        working_ids.add(record['id'])
+        task = Task.from_dict(record)
+        if matches(task):
+            yield task
+    for record in open_storage(archive_path(data_path)).iter_tasks(**query.storage_filters()):
+        if record['id'] not in working_ids:
+            task = Task.from_dict(record)
+            if matches(task):
+                yield task
+
+
+def export_tasks(categories, tasks, f, fmt):
+    """Write tasks to an open file as CSV or JSON lines; return how many"""
+    writer = csv.DictWriter(f, EXPORT_FIELDS) if fmt == 'csv' else None
+    if writer:
+        writer.writeheader()
+    count = 0
+    for task in tasks:
+        category = categories.get(task['category_id'])
+        row = dict(task, category=category['name'] if category else '')
+        if writer:
+            writer.writerow(row)
+        else:
+            f.write(json.dumps(row) + '\n')
+        count += 1
+    return count
+
+
+# ----------------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------------
+def _add_filters(parser):
+    parser.add_argument('--category', help="only tasks in this category (by name)")
+    parser.add_argument('--status', choices=STATUSES)
+    parser.add_argument('--priority', choices=PRIORITIES)
+    parser.add_argument('--due-from', help="only tasks due on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--due-to', help="only tasks due on or before this date (YYYY-MM-DD)")
+    parser.add_argument('--min-progress', type=int, help="only tasks at least this far along (0-100)")
+    parser.add_argument('--max-progress', type=int, help="only tasks at most this far along (0-100)")
+    parser.add_argument('--overdue', action='store_true', help="only tasks past their due date and not completed")
+
+
+def _build_query(args, category_index):
+    category_id = None
+    if args.category:
+        category_id = category_index.id_for(args.category)
+        if category_id is None:
+            raise SystemExit(f"No category named '{args.category}'")
+    for option, value in (('--due-from', args.due_from), ('--due-to', args.due_to)):
+        if value is not None:
+            try:
+                validate_date(value, option)
+            except ValueError as error:
+                raise SystemExit(str(error))
+    sort_keys = getattr(args, 'sort', None) or ''  # only export sorts
+    sort = [key.strip() for key in sort_keys.split(',') if key.strip()]
+    try:
+        query = TaskQuery(sort, category_id=category_id, status=args.status, priority=args.priority,
+                          due_from=args.due_from, due_to=args.due_to, min_progress=args.min_progress,
+                          max_progress=args.max_progress, overdue=True if args.overdue else None)
+    except ValueError as error:
+        raise SystemExit(str(error))
+    return query
+
+
+def _open_output(path):
+    if path == '-':
+        return sys.stdout
+    return open(path, 'w', newline='', encoding='utf-8')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m todo_core.cli',
+                                     description="Bulk import, update and export of tasks")
+    parser.add_argument('--data', default='todo_data.json',
+                        help="data file to use; a .db/.sqlite file selects the SQLite backend")
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help="records read and saved per batch (default 1000)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="add tasks from a CSV or JSON-lines file")
+    import_parser.add_argument('file', help="file to read ('-' for standard input)")
+    import_parser.add_argument('--format', choices=('csv', 'jsonl'))
+
+    update_parser = subparsers.add_parser('update', help="change every task matching the filters",
+                                          description="Change every task matching the filters. "
+                                                      "Archived tasks are not changed.")
+    _add_filters(update_parser)
+    update_parser.add_argument('--set-status', choices=STATUSES)
+    update_parser.add_argument('--set-progress', type=int)
+    update_parser.add_argument('--set-priority', choices=PRIORITIES)
+    update_parser.add_argument('--complete', action='store_true',
+                               help="mark the tasks completed today with 100%% progress")
+
+    export_parser = subparsers.add_parser('export', help="write the tasks matching the filters",
+                                          description="Write the tasks matching the filters, archived "
+                                                      "ones included. Tasks are streamed from the data "
+                                                      "file, except with --sort, which holds the "
+                                                      "matching tasks in memory.")
+    export_parser.add_argument('file', help="file to write ('-' for standard output)")
+    export_parser.add_argument('--format', choices=('csv', 'jsonl'))
+    export_parser.add_argument('--sort', help="comma-separated sort keys, '-' for descending "
+                                              f"(any of {', '.join(SORT_KEYS)}), e.g. due_date,-priority")
+    _add_filters(export_parser)
+    return parser
+
+
+def _fold_journal(store):
+    """Fold everything journaled by this run into the snapshot in one pass"""
+    if isinstance(store.storage, JournalStorage) and store.storage.journal_records:
+        store.storage.compact_in_background()
+        store.storage.wait()
+
+
+def export(args, report):
+    """Run the export command"""
+    lock = DataLock(args.data)
+    try:
+        lock.acquire()
+    except DataLockedError as error:
+        raise SystemExit(str(error))
+    try:
+        try:
+            categories = open_storage(args.data).load_categories()
+        except StorageError as error:
+            raise SystemExit(f"Cannot read {args.data}: {error}")
+        query = _build_query(args, CategoryIndex(categories))
+        tasks = stream_tasks(args.data, query)
+        f = _open_output(args.file)
+        try:
+            count = export_tasks(categories, query.sort_tasks(tasks) if query.sort else tasks, f,
+                                 file_format(args.file, args.format))
+        except BrokenPipeError:
+            # The reader (such as head) stopped early; that is not an error
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return
+        except StorageError as error:
+            raise SystemExit(f"Cannot read {args.data}: {error}")
+        finally:
+            if f is not sys.stdout:
+                f.close()
+        report.done("Exported", count)
+    finally:
+        lock.release()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'export':
+        export(args, Report())
+        return
+    try:
+        store = TodoStore(args.data)
+    except DataLockedError as error:
+        raise SystemExit(str(error))
+    try:
+        store.load()
+    except StorageError as error:
+        raise SystemExit(f"Cannot read {args.data}: {error}")
+    if isinstance(store.storage, JournalStorage):
+        # Compacting after every batch would rewrite the snapshot over and
+        # over; fold the journal once at the end instead
+        store.storage.compact_every = float('inf')
+
+    report = Report()
+    try:
+        if args.command == 'import':
+            fmt = file_format(args.file, args.format)
+            if args.file == '-':
+                count = import_tasks(store, sys.stdin, fmt, args.batch_size, report)
+            else:
+                with open(args.file, newline='', encoding='utf-8') as f:
+                    count = import_tasks(store, f, fmt, args.batch_size, report)
+            _fold_journal(store)
+            report.done("Imported", count)
+
+        elif args.command == 'update':
+            if args.complete:
+                changes = None
+            else:
+                changes = {field: value for field, value in (('status', args.set_status),
+                                                             ('progress', args.set_progress),
+                                                             ('priority', args.set_priority))
+                           if value is not None}
+                if not changes:
+                    raise SystemExit("Nothing to change: use --set-status, --set-progress, "
+                                     "--set-priority or --complete")
+            try:
+                tasks = _build_query(args, store.category_index).run(store)
+                count = update_tasks(store, tasks, changes, args.batch_size)
+            except CommandError as error:
+                raise SystemExit(str(error))
+            _fold_journal(store)
+            report.done("Updated", count)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
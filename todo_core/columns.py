@@ -0,0 +1,160 @@
+"""Columnar task data for the timeline.
+
+TaskColumns copies the start/due ordinals and status codes of a task list
+into parallel columns, so bar positions and density counts can be computed
+for many tasks in one batched pass. NumPy is used when it is installed;
+otherwise the same results come from plain Python loops.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .models import STATUSES
+
+
+class TaskColumns:
+    """Start/due ordinals and status codes of a task list, one column each.
+
+    Row ``i`` describes ``tasks[i]``. A row is only drawn if both of its
+    dates are valid (``valid``). Status codes are the tasks' own
+    ``status_code``; every status beyond the known STATUSES shares the code
+    ``len(STATUSES)``.
+    """
+
+    unknown_status = len(STATUSES)
+
+    def __init__(self, tasks):
+        self._arrays = None   # NumPy copies of the columns, built on demand
+        self._layouts = {}    # (origin day, px per day, left) -> (start x, end x) columns
+        rows = [self._row(task) for task in tasks]
+        self.starts = [row[0] for row in rows]
+        self.ends = [row[1] for row in rows]
+        self.valid = [row[2] for row in rows]
+        self.codes = [row[3] for row in rows]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _row(self, task):
+        start, end = task.start_day, task.due_day
+        valid = start is not None and end is not None
+        return (start if valid else 0), (end if valid else 0), valid, min(task.status_code, self.unknown_status)
+
+    def append(self, task):
+        start, end, valid, code = self._row(task)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.valid.append(valid)
+        self.codes.append(code)
+        self._arrays = None
+        self._layouts = {}
+
+    def update(self, row, task):
+        """Re-read one task's dates and status after it was edited"""
+        start, end, valid, code = self._row(task)
+        self.starts[row], self.ends[row], self.valid[row], self.codes[row] = start, end, valid, code
+        if self._arrays is not None:
+            for column, value in zip(self._arrays, (start, end, valid, code)):
+                column[row] = value
+        self._layouts = {}
+
+    def arrays(self):
+        """Return the columns as NumPy arrays (starts, ends, valid, codes)"""
+        if self._arrays is None:
+            self._arrays = (np.array(self.starts, dtype=np.int64),
+                            np.array(self.ends, dtype=np.int64),
+                            np.array(self.valid, dtype=bool),
+                            np.array(self.codes, dtype=np.int16))
+        return self._arrays
+
+    def day_range(self):
+        """Return (first day, last day) over every drawable row, or None"""
+        if np is not None:
+            starts, ends, valid, _ = self.arrays()
+            if not valid.any():
+                return None
+            return (int(min(starts[valid].min(), ends[valid].min())),
+                    int(max(starts[valid].max(), ends[valid].max())))
+        days = [day for start, end, valid in zip(self.starts, self.ends, self.valid) if valid
+                for day in (start, end)]
+        return (min(days), max(days)) if days else None
+
+    def layout(self, origin_day, px_per_day, left=0):
+        """Return the start and end x of every row's bar, computed in one pass.
+
+        The result is cached per zoom and origin until the columns change.
+        """
+        key = (origin_day, px_per_day, left)
+        if key not in self._layouts:
+            if np is not None:
+                starts, ends, _, _ = self.arrays()
+                self._layouts[key] = ((starts - origin_day) * px_per_day + left,
+                                      (ends - origin_day) * px_per_day + left)
+            else:
+                self._layouts[key] = ([(day - origin_day) * px_per_day + left for day in self.starts],
+                                      [(day - origin_day) * px_per_day + left for day in self.ends])
+        return self._layouts[key]
+
+    def bars(self, first_row, last_row, first_day, last_day, origin_day, px_per_day, left=0):
+        """Return (row, start x, end x, status code) for rows overlapping the visible days"""
+        start_x, end_x = self.layout(origin_day, px_per_day, left)
+        if np is not None:
+            starts, ends, valid, codes = self.arrays()
+            window = slice(first_row, last_row)
+            keep = valid[window] & (ends[window] >= first_day) & (starts[window] <= last_day)
+            rows = np.nonzero(keep)[0] + first_row
+            return zip(rows.tolist(), start_x[rows].tolist(), end_x[rows].tolist(),
+                       codes[rows].tolist())
+        return [(row, start_x[row], end_x[row], self.codes[row])
+                for row in range(first_row, last_row)
+                if self.valid[row] and self.ends[row] >= first_day and self.starts[row] <= last_day]
+
+    def density(self, first_group, last_group, per_group, first_day, last_day,
+                days_per_bucket, bucket_count):
+        """Count how many tasks of each group are active in each day bucket.
+
+        Groups are runs of ``per_group`` consecutive rows. Returns
+        (group, bucket, count) for every non-empty cell of the visible groups.
+        """
+        first_row = first_group * per_group
+        last_row = min(len(self), last_group * per_group)
+        if bucket_count <= 0 or first_row >= last_row:
+            return []
+        if np is not None:
+            starts, ends, valid, _ = self.arrays()
+            window = slice(first_row, last_row)
+            keep = valid[window] & (ends[window] >= first_day) & (starts[window] <= last_day)
+            rows = np.nonzero(keep)[0]
+            groups = rows // per_group
+            rows += first_row
+            first = np.maximum(0, ((starts[rows] - first_day) / days_per_bucket).astype(np.int64))
+            last = np.minimum(bucket_count,
+                              ((ends[rows] - first_day) / days_per_bucket).astype(np.int64) + 1)
+
+            # Difference array per group, summed along the buckets
+            counts = np.zeros((last_group - first_group, bucket_count + 1), dtype=np.int64)
+            np.add.at(counts, (groups, first), 1)
+            np.add.at(counts, (groups, last), -1)
+            active = np.cumsum(counts[:, :bucket_count], axis=1)
+            cell_groups, cell_buckets = np.nonzero(active)
+            return zip((cell_groups + first_group).tolist(), cell_buckets.tolist(),
+                       active[cell_groups, cell_buckets].tolist())
+
+        cells = []
+        for group in range(first_group, last_group):
+            counts = [0] * (bucket_count + 1)
+            for row in range(group * per_group, min(last_row, (group + 1) * per_group)):
+                if not self.valid[row] or self.ends[row] < first_day or self.starts[row] > last_day:
+                    continue
+                first = max(0, int((self.starts[row] - first_day) / days_per_bucket))
+                last = min(bucket_count, int((self.ends[row] - first_day) / days_per_bucket) + 1)
+                counts[first] += 1
+                counts[last] -= 1
+            active = 0
+            for bucket in range(bucket_count):
+                active += counts[bucket]
+                if active:
+                    cells.append((group, bucket, active))
+        return cells
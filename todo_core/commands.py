@@ -0,0 +1,206 @@
+"""Changes to a TodoStore.
+
+Every command validates its input, updates the data and indexes, saves the
+change and reports it through ``store.changes``. Invalid input raises
+CommandError with a message that can be shown to the user as it is.
+"""
+
+from datetime import datetime
+
+from . import events
+from .dates import DATE_FORMAT, validate_date
+from .models import PRIORITIES, STATUSES, new_category, new_task
+
+_DATE_FIELDS = {'start_date': "Start date", 'due_date': "Due date", 'date_completed': "Completed date"}
+
+
+class CommandError(ValueError):
+    pass
+
+
+def _check_loaded(store):
+    if store.loading:
+        raise CommandError("Tasks are still loading; please try again in a moment")
+
+
+def _check_date(value, field):
+    try:
+        return validate_date(value, _DATE_FIELDS[field])
+    except ValueError as error:
+        raise CommandError(str(error))
+
+
+def _check_category_name(store, name, exclude_id=None):
+    name = (name or '').strip()
+    if not name:
+        raise CommandError("Please enter a category name")
+    if store.category_index.is_taken(name, exclude_id=exclude_id):
+        raise CommandError(f"A category named '{name}' already exists")
+    return name
+
+
+# ----------------------------------------------------------------------
+# Categories
+# ----------------------------------------------------------------------
+def add_category(store, name, color=None):
+    """Create a category and return its id"""
+    _check_loaded(store)
+    name = _check_category_name(store, name)
+    numbers = [int(cat_id) for cat_id in store.categories if cat_id.isdigit()]
+    cat_id = str(max(numbers, default=0) + 1)
+    store.categories[cat_id] = new_category(name, color) if color else new_category(name)
+    store.category_index.set(cat_id, store.categories[cat_id])
+    store.save(categories=[cat_id])
+    store.changes.notify(events.CATEGORY_CHANGED, category_id=cat_id)
+    return cat_id
+
+
+def update_category(store, category_id, name, color):
+    """Rename and/or recolor a category"""
+    _check_loaded(store)
+    name = _check_category_name(store, name, exclude_id=category_id)
+    store.categories[category_id] = new_category(name, color)
+    store.category_index.set(category_id, store.categories[category_id])
+    store.save(categories=[category_id])
+    store.changes.notify(events.CATEGORY_CHANGED, category_id=category_id)
+
+
+# ----------------------------------------------------------------------
+# Tasks
+# ----------------------------------------------------------------------
+def validate_task(store, name, category_id, start_date, due_date, priority='Medium',
+                  progress=0, status='Not Started', comments=''):
+    """Return add_task's arguments checked and normalized, as a dict"""
+    fields = _check_changes(store, {
+        'name': name, 'category_id': category_id, 'start_date': start_date, 'due_date': due_date,
+        'priority': priority, 'progress': progress, 'status': status, 'comments': comments or '',
+    })
+    if fields['category_id'] is None:
+        raise CommandError("Please choose a category")
+    return fields
+
+
+def _check_changes(store, changes):
+    if 'name' in changes:
+        changes['name'] = (changes['name'] or '').strip()
+        if not changes['name']:
+            raise CommandError("Please enter a task name")
+    if changes.get('category_id') is not None and changes['category_id'] not in store.categories:
+        raise CommandError(f"There is no category with id '{changes['category_id']}'")
+    if 'priority' in changes and changes['priority'] not in PRIORITIES:
+        raise CommandError(f"Priority must be one of {', '.join(PRIORITIES)}")
+    if 'status' in changes and changes['status'] not in STATUSES:
+        raise CommandError(f"Status must be one of {', '.join(STATUSES)}")
+    if 'progress' in changes:
+        try:
+            changes['progress'] = int(changes['progress'])
+        except (TypeError, ValueError):
+            raise CommandError("Progress must be a whole number from 0 to 100")
+        if not 0 <= changes['progress'] <= 100:
+            raise CommandError("Progress must be a whole number from 0 to 100")
+    for field in _DATE_FIELDS:
+        if changes.get(field):
+            changes[field] = _check_date(changes[field], field)
+    return changes
+
+
+def add_task(store, name, category_id, start_date, due_date, priority='Medium',
+             progress=0, status='Not Started', comments=''):
+    """Create a task and return it"""
+    record = {'name': name, 'category_id': category_id, 'start_date': start_date, 'due_date': due_date,
+              'priority': priority, 'progress': progress, 'status': status, 'comments': comments}
+    return add_tasks(store, [record])[0]
+
+
+def add_tasks(store, records):
+    """Create tasks from dicts of add_task's arguments with a single save.
+
+    Every record is checked before anything is added. Returns the new tasks.
+    """
+    _check_loaded(store)
+    checked = [validate_task(store, **record) for record in records]
+    task_ids = store.task_ids.reserve(len(checked))
+    tasks = [new_task(task_id, **fields) for task_id, fields in zip(task_ids, checked)]
+
+    for task in tasks:
+        store.tasks.append(task)
+        store.task_index.add(task)
+        store.search_index.add(task)
+    store.save(tasks=tasks)
+    for task in tasks:
+        store.changes.notify(events.TASK_ADDED, task)
+    return tasks
+
+
+def update_task(store, task, **changes):
+    """Change some fields of a task (any of new_task's fields) and return it"""
+    return update_tasks(store, [task], **changes)[0]
+
+
+def update_tasks(store, tasks, **changes):
+    """Make the same changes to several tasks with a single save; returns the tasks.
+
+    Changing the status also keeps the completion date in step: tasks that
+    become completed without one are stamped with today's date, and tasks
+    that leave Completed lose theirs.
+    """
+    _check_loaded(store)
+    changes = _check_changes(store, changes)
+    completing = changes.get('status') == 'Completed'
+    today = datetime.now().strftime(DATE_FORMAT)
+    previous_category_ids = [task['category_id'] for task in tasks]
+    for task in tasks:
+        task.update(changes)
+        if 'status' in changes:
+            if completing and not task['date_completed']:
+                task['date_completed'] = today
+            elif not completing and task['date_completed'] is not None:
+                task['date_completed'] = None
+        store.task_index.update(task)
+        store.search_index.update(task)
+    store.save(tasks=tasks)
+    for task, previous_category_id in zip(tasks, previous_category_ids):
+        store.changes.notify(events.TASK_UPDATED, task, previous_category_id=previous_category_id)
+    return tasks
+
+
+def complete_task(store, task):
+    """Mark a task completed today, with 100% progress"""
+    return complete_tasks(store, [task])[0]
+
+
+def complete_tasks(store, tasks):
+    """Mark several tasks completed today, with 100% progress"""
+    return update_tasks(store, tasks, status='Completed', progress=100,
+                        date_completed=datetime.now().strftime(DATE_FORMAT))
+
+
+# ----------------------------------------------------------------------
+# Tasks for the Day
+# ----------------------------------------------------------------------
+def add_to_today(store, task):
+    """Plan a task for today; return False if it already was"""
+    _check_loaded(store)
+    if not store.today.add(task['id']):
+        return False
+    store.save(today=True)
+    store.changes.notify(events.TODAY_CHANGED, task)
+    return True
+
+
+def remove_from_today(store, task):
+    """Take a task off today's plan; return False if it was not on it"""
+    _check_loaded(store)
+    if not store.today.remove(task['id']):
+        return False
+    store.save(today=True)
+    store.changes.notify(events.TODAY_CHANGED, task)
+    return True
+
+
+def clear_today(store):
+    """Empty today's plan"""
+    _check_loaded(store)
+    store.today.clear()
+    store.save(today=True)
+    store.changes.notify(events.TODAY_CHANGED)
@@ -0,0 +1,30 @@
+"""Task date handling.
+
+Dates are saved as 'YYYY-MM-DD' strings. Tasks keep them as date ordinals
+(see ``Task.start_day``), which is what code doing date arithmetic, such
+as the timeline, works with.
+"""
+
+from datetime import date, datetime
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def validate_date(value, field='Date'):
+    """Return ``value`` as a 'YYYY-MM-DD' string, or raise ValueError"""
+    value = (value or '').strip()
+    try:
+        if len(value) == 10 and value[4] == value[7] == '-' and value.replace('-', '').isdigit():
+            # Already in canonical form: skip the (slow) strptime
+            return date(int(value[0:4]), int(value[5:7]), int(value[8:10])).isoformat()
+        return datetime.strptime(value, DATE_FORMAT).strftime(DATE_FORMAT)
+    except ValueError:
+        raise ValueError(f"{field} must be a valid date in YYYY-MM-DD format (got '{value}')")
+
+
+def to_ordinal(value):
+    """Return the date ordinal of a 'YYYY-MM-DD' string, or None if it is malformed"""
+    try:
+        return date(int(value[0:4]), int(value[5:7]), int(value[8:10])).toordinal()
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,66 @@
+"""Change notifications.
+
+Anything that changes tasks or categories reports it through a
+ChangeNotifier, and views subscribe to patch just the widgets a change
+touches instead of rebuilding everything.
+
+Containers that cache results computed from the tasks (see
+``todo_core.task_query``) also stamp every change with next_version(), so
+a cached result is still good as long as the stamps it was computed from
+have not moved.
+"""
+
+from itertools import count
+
+TASK_ADDED = 'task_added'
+TASK_UPDATED = 'task_updated'
+CATEGORY_CHANGED = 'category_changed'
+TODAY_CHANGED = 'today_changed'
+
+_versions = count(1)
+
+
+def next_version():
+    """Return a number larger than any returned before in this process"""
+    return next(_versions)
+
+
+class Change:
+    """A single change: what happened, to which task and/or category.
+
+    ``previous_category_id`` is set for task changes that may have moved the
+    task out of another category. ``task`` is None for changes that affect
+    every task at once (such as clearing today's list).
+    """
+
+    __slots__ = ('kind', 'task', 'category_id', 'previous_category_id')
+
+    def __init__(self, kind, task=None, category_id=None, previous_category_id=None):
+        self.kind = kind
+        self.task = task
+        self.category_id = category_id if category_id is not None or task is None else task['category_id']
+        self.previous_category_id = previous_category_id if previous_category_id is not None else self.category_id
+
+    def __repr__(self):
+        task_id = self.task['id'] if self.task is not None else None
+        return f"Change({self.kind!r}, task={task_id!r}, category={self.category_id!r})"
+
+
+class ChangeNotifier:
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        """Call ``callback(change)`` for every change from now on"""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def notify(self, kind, task=None, category_id=None, previous_category_id=None):
+        """Report a change to every subscriber"""
+        change = Change(kind, task, category_id, previous_category_id)
+        for callback in list(self._subscribers):
+            callback(change)
+        return change
@@ -0,0 +1,98 @@
+"""Task id allocation.
+
+Task ids are decimal strings handed out from a high-water mark that only
+ever moves forward. The mark is saved with the data (``meta['next_task_id']``)
+so ids stay unique even after tasks are removed or archived, and it is never
+allowed to fall behind the largest id already in use. The mark is only safe
+with one process writing the data, which the data file lock ensures (see
+``todo_core.locking``); within a process the allocator is thread safe.
+
+Run this module directly to re-key duplicate task ids in a data file:
+
+    python -m todo_core.ids todo_data.json
+"""
+
+import sys
+import threading
+
+META_KEY = 'next_task_id'
+
+
+class IdAllocator:
+    def __init__(self, next_id=1):
+        self._next_id = next_id
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    @classmethod
+    def for_tasks(cls, tasks, meta=None):
+        """Create an allocator that continues after the saved mark and every existing id"""
+        return cls.for_ids((task['id'] for task in tasks), meta)
+
+    @classmethod
+    def for_ids(cls, task_ids, meta=None):
+        """Like for_tasks, from bare ids (such as those of tasks left on disk)"""
+        next_id = int((meta or {}).get(META_KEY, 1))
+        for task_id in task_ids:
+            if isinstance(task_id, str) and task_id.isdigit():
+                next_id = max(next_id, int(task_id) + 1)
+        return cls(next_id)
+
+    @property
+    def next_id(self):
+        return self._next_id
+
+    def allocate(self):
+        """Return a new, never used task id"""
+        return self.reserve(1)[0]
+
+    def reserve(self, count):
+        """Return a block of ``count`` new task ids (for bulk imports)"""
+        with self._lock:
+            start = self._next_id
+            self._next_id += count
+            self.dirty = True
+        return [str(task_id) for task_id in range(start, start + count)]
+
+    def meta(self):
+        """Return the meta values to save, marking the allocator clean"""
+        self.dirty = False
+        return {META_KEY: self._next_id}
+
+
+def rekey_duplicates(tasks, allocator):
+    """Give every repeated task id after its first use a fresh id.
+
+    Returns the re-keyed task dicts.
+    """
+    seen = set()
+    rekeyed = []
+    for task in tasks:
+        if task['id'] in seen:
+            task['id'] = allocator.allocate()
+            rekeyed.append(task)
+        seen.add(task['id'])
+    return rekeyed
+
+
+def migrate_duplicate_ids(path):
+    """Re-key duplicate task ids in a saved data file and return how many changed"""
+    from .locking import DataLock
+    from .storage import open_storage
+
+    with DataLock(path):
+        storage = open_storage(path)
+        categories, tasks = storage.load()
+        allocator = IdAllocator.for_tasks(tasks, storage.meta)
+        rekeyed = rekey_duplicates(tasks, allocator)
+        if rekeyed:
+            storage.write_snapshot(categories, tasks, allocator.meta())
+        storage.wait()
+    return len(rekeyed)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python -m todo_core.ids <todo_data.json>")
+        sys.exit(2)
+    print(f"Re-keyed {migrate_duplicate_ids(sys.argv[1])} duplicate task ids in {sys.argv[1]}")
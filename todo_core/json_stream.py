@@ -0,0 +1,111 @@
+"""Incremental reading of snapshot files.
+
+``json.load`` needs the whole file as one string and then the whole parsed
+document before anything can be used, so a large history costs several
+times its size in memory before the first task appears. iter_snapshot
+reads the ``{"categories": ..., "tasks": [...], "meta": ...}`` layout a
+chunk at a time instead and hands out each task as soon as it is parsed;
+only the current chunk and the values handed out stay in memory.
+"""
+
+import json
+import re
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """A window onto a text file that values are decoded from in place"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read the next chunk; return False at the end of the file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been consumed so the buffer stays about one chunk long
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character ('' at the end)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos} of the current chunk")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next JSON value, reading more of the file until it is complete"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            if end == len(self.buffer) and not self.eof and not isinstance(value, (dict, list, str)):
+                # A number or literal cut off by the chunk boundary
+                if self.fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_snapshot(f, chunk_size=CHUNK_SIZE):
+    """Yield (key, value) for each top-level entry of an open snapshot file.
+
+    The ``tasks`` list is not returned whole: each of its entries is yielded
+    as ``('task', task)`` in file order. Other keys (``categories``,
+    ``meta``) are yielded with their complete values. Raises ValueError if
+    the file is not valid JSON of that shape.
+    """
+    reader = _Reader(f, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError("Expected a key in the snapshot")
+        reader.expect(':')
+        if key == 'tasks':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.pos += 1
+            else:
+                keys = {}
+                while True:
+                    task = reader.value()
+                    if isinstance(task, dict):
+                        # json.load shares key strings across the document;
+                        # separate decodes do not, so share them here
+                        task = {keys.setdefault(k, k): v for k, v in task.items()}
+                    yield 'task', task
+                    if reader.peek() == ']':
+                        reader.pos += 1
+                        break
+                    reader.expect(',')
+        else:
+            yield key, reader.value()
+        if reader.peek() == '}':
+            return
+        reader.expect(',')
@@ -0,0 +1,97 @@
+"""Exclusive use of a data file by one process.
+
+Task ids are handed out from a high-water mark saved with the data (see
+``todo_core.ids``), so two processes saving to the same file would each
+hand out the same ids, and replaying the journal would let the later task
+silently replace the earlier one. A TodoStore therefore holds a lock on
+``<data file>.lock`` for as long as it is open; another process that opens
+the same data (the CLI while the application is running, or a second
+window) gets DataLockedError instead. Stores in one process share the lock.
+
+The lock is an operating system file lock (flock, or msvcrt on Windows),
+so it is released when the process exits, even after a crash. The lock
+file itself is left in place.
+"""
+
+import os
+import threading
+
+from .storage import StorageError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class DataLockedError(StorageError):
+    """Raised when another process has the data file open"""
+
+
+_held = {}   # lock file path -> [open lock file, number of holders in this process]
+_held_lock = threading.Lock()
+
+
+def _lock(f):
+    """Lock an open file without waiting; raises OSError if another process holds it"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class DataLock:
+    def __init__(self, data_path):
+        self.data_path = data_path
+        self.path = os.path.abspath(data_path) + '.lock'
+        self.held = False
+
+    def acquire(self):
+        """Take the lock; raises DataLockedError if another process has it"""
+        if self.held:
+            return
+        with _held_lock:
+            entry = _held.get(self.path)
+            if entry is None:
+                f = open(self.path, 'a+')
+                try:
+                    _lock(f)
+                except OSError:
+                    f.close()
+                    raise DataLockedError(
+                        f"{self.data_path} is open in another program (the application or "
+                        f"todo_core.cli). Close it there first, so that both do not hand out "
+                        f"the same task ids.")
+                entry = _held[self.path] = [f, 0]
+            entry[1] += 1
+            self.held = True
+
+    def release(self):
+        """Give up the lock (the file is unlocked once no store of this process holds it)"""
+        if not self.held:
+            return
+        with _held_lock:
+            self.held = False
+            entry = _held[self.path]
+            entry[1] -= 1
+            if not entry[1]:
+                del _held[self.path]
+                _unlock(entry[0])
+                entry[0].close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
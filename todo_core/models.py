@@ -0,0 +1,284 @@
+"""Task and category records.
+
+Categories are plain dicts. Tasks are Task objects: a task is held by
+every index and view, and there can be a hundred thousand of them, so they
+use ``__slots__``, store status and priority as small integer codes and
+dates as ordinals, and convert to and from the saved dict layout without
+losing anything. They also behave like that dict (``task['name']``,
+``task.get(...)``, ``task.update(...)``, ``dict(task)``), so code that is
+not on a hot path can keep treating them as one.
+"""
+
+from datetime import date
+
+STATUSES = ('Not Started', 'In Progress', 'Completed', 'On Hold')
+PRIORITIES = ('High', 'Medium', 'Low')
+
+TASK_FIELDS = ('id', 'name', 'category_id', 'priority', 'start_date', 'due_date',
+               'progress', 'status', 'comments', 'date_completed')
+
+DEFAULT_COLOR = '#4CAF50'
+
+
+class Codes:
+    """Small integer codes for the values of a field.
+
+    The known values get the first codes, in order; any other value met
+    while loading is given the next free code, so it survives a round trip.
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+        self._codes = {value: code for code, value in enumerate(self.values)}
+
+    def lookup(self, value):
+        """Return the code of a value, or None if no task has had it"""
+        return self._codes.get(value)
+
+    def code(self, value):
+        """Return the code of a value, giving it a new one if needed"""
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+STATUS_CODES = Codes(STATUSES)
+PRIORITY_CODES = Codes(PRIORITIES)
+COMPLETED = STATUS_CODES.code('Completed')
+
+_ordinals = {}   # 'YYYY-MM-DD' -> ordinal (None if the string is not a canonical date)
+_category_ids = {}
+_days = {}       # ordinal -> 'YYYY-MM-DD'
+
+
+def _ordinal(value):
+    """Return the ordinal of a canonical 'YYYY-MM-DD' string, else None"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return _ordinals[value]
+    except KeyError:
+        pass
+    ordinal = None
+    if len(value) == 10:
+        try:
+            day = date(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+        except ValueError:
+            pass
+        else:
+            if day.isoformat() == value:
+                ordinal = day.toordinal()
+                _days[ordinal] = value
+    _ordinals[value] = ordinal
+    return ordinal
+
+
+def _day(ordinal):
+    """Return the 'YYYY-MM-DD' string of an ordinal"""
+    try:
+        return _days[ordinal]
+    except KeyError:
+        value = _days[ordinal] = date.fromordinal(ordinal).isoformat()
+        return value
+
+
+class Task:
+    """One task.
+
+    Besides the saved fields, ``status_code``/``priority_code`` index
+    STATUS_CODES/PRIORITY_CODES and ``start_day``/``due_day``/
+    ``completed_day`` are date ordinals (None if the date is empty or
+    malformed); hot paths read these directly.
+
+    Fields that the saved dict lacked (older versions did not write
+    ``date_completed``, for one) read as None but are left out of
+    ``to_dict()`` until they are given a value.
+    """
+
+    __slots__ = ('id', 'name', 'category_id', 'priority_code', 'start_day', 'due_day', 'progress',
+                 'status_code', 'comments', 'completed_day',
+                 '_start_raw', '_due_raw', '_completed_raw', '_extra', '_missing')
+
+    def __init__(self, id, name, category_id, priority, start_date, due_date, progress,
+                 status, comments, date_completed=None):
+        self.id = id
+        self.name = name
+        self.category_id = category_id
+        self.priority_code = PRIORITY_CODES.code(priority)
+        self.start_date = start_date
+        self.due_date = due_date
+        self.progress = progress
+        self.status_code = STATUS_CODES.code(status)
+        self.comments = comments
+        self.date_completed = date_completed
+        self._extra = None
+        self._missing = None  # saved fields the loaded dict did not have
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a task from its saved dict; fields the dict lacks are None (and not saved)"""
+        get = data.get
+        category_id = get('category_id')
+        if isinstance(category_id, str):
+            # A few category ids are repeated by every task: share one copy
+            category_id = _category_ids.setdefault(category_id, category_id)
+        task = cls(get('id'), get('name'), category_id, get('priority'), get('start_date'),
+                   get('due_date'), get('progress'), get('status'), get('comments'),
+                   get('date_completed'))
+        if not _FIELD_SET.issuperset(data):
+            # Keep fields written by other tools or later versions
+            task._extra = {key: value for key, value in data.items() if key not in _FIELD_SET} or None
+        if not _FIELD_SET.issubset(data):
+            task._missing = _FIELD_SET.difference(data)
+        return task
+
+    def _fields(self):
+        """Return the saved fields this task has: all but the missing ones still without a value"""
+        if not self._missing:
+            return TASK_FIELDS
+        return tuple(field for field in TASK_FIELDS
+                     if field not in self._missing or getattr(self, field) is not None)
+
+    def to_dict(self):
+        """Return the task in its saved dict layout"""
+        if self._missing:
+            data = {field: getattr(self, field) for field in self._fields()}
+            if self._extra:
+                data.update(self._extra)
+            return data
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'category_id': self.category_id,
+            'priority': self.priority,
+            'start_date': self.start_date,
+            'due_date': self.due_date,
+            'progress': self.progress,
+            'status': self.status,
+            'comments': self.comments,
+            'date_completed': self.date_completed
+        }
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def copy(self):
+        task = Task.__new__(Task)
+        for slot in Task.__slots__:
+            setattr(task, slot, getattr(self, slot))
+        if self._extra:
+            task._extra = dict(self._extra)
+        return task
+
+    # Dates are kept as ordinals; a value that is not a canonical date
+    # (left by older versions or edited by hand) is kept as it was instead
+    @property
+    def start_date(self):
+        return self._start_raw if self.start_day is None else _day(self.start_day)
+
+    @start_date.setter
+    def start_date(self, value):
+        self.start_day = _ordinal(value)
+        self._start_raw = value if self.start_day is None else None
+
+    @property
+    def due_date(self):
+        return self._due_raw if self.due_day is None else _day(self.due_day)
+
+    @due_date.setter
+    def due_date(self, value):
+        self.due_day = _ordinal(value)
+        self._due_raw = value if self.due_day is None else None
+
+    @property
+    def date_completed(self):
+        return self._completed_raw if self.completed_day is None else _day(self.completed_day)
+
+    @date_completed.setter
+    def date_completed(self, value):
+        self.completed_day = _ordinal(value)
+        self._completed_raw = value if self.completed_day is None else None
+
+    @property
+    def status(self):
+        return STATUS_CODES.values[self.status_code]
+
+    @status.setter
+    def status(self, value):
+        self.status_code = STATUS_CODES.code(value)
+
+    @property
+    def priority(self):
+        return PRIORITY_CODES.values[self.priority_code]
+
+    @priority.setter
+    def priority(self, value):
+        self.priority_code = PRIORITY_CODES.code(value)
+
+    # Dict-style access, in the saved layout
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+            if self._missing and key in self._missing:
+                self._missing = self._missing - {key}
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return not self._missing or key in self._fields()
+        return bool(self._extra) and key in self._extra
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._fields()) + len(self._extra or ())
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self._fields() + tuple(self._extra or ())
+
+    def items(self):
+        return self.to_dict().items()
+
+    def update(self, changes=(), **more):
+        for key, value in dict(changes, **more).items():
+            self[key] = value
+
+    def __repr__(self):
+        return f"Task(id={self.id!r}, name={self.name!r})"
+
+
+_FIELD_SET = frozenset(TASK_FIELDS)
+
+
+def new_task(task_id, name, category_id, start_date, due_date, priority='Medium',
+             progress=0, status='Not Started', comments='', date_completed=None):
+    """Return a Task with every field set"""
+    return Task(task_id, name, category_id, priority, start_date, due_date, progress,
+                status, comments, date_completed)
+
+
+def new_category(name, color=DEFAULT_COLOR):
+    """Return a category dict"""
+    return {
+        'name': name,
+        'color': color
+    }
@@ -0,0 +1,44 @@
+"""Read-only questions about a TodoStore."""
+
+
+def today_tasks(store):
+    """Return today's planned tasks that still exist, in plan order"""
+    return store.today.resolve(store.task_index)
+
+
+def task_count(store, category_id=None, status=None):
+    """Return how many tasks match a category and/or status.
+
+    Completed tasks that were left on disk when loading are counted too.
+    """
+    count = store.task_index.count(category_id, status)
+    if status in (None, 'Completed'):
+        if category_id is None:
+            count += sum(store.deferred.values())
+        else:
+            count += store.deferred.get(category_id, 0)
+    return count
+
+
+def history_count(store, category_id=None):
+    """Return how many completed tasks (of a category, or all) are not loaded.
+
+    These are the tasks left on disk when loading and the archived tasks
+    that have not been paged in.
+    """
+    if category_id is None:
+        deferred = sum(store.deferred.values())
+    else:
+        deferred = store.deferred.get(category_id, 0)
+    return deferred + store.archive.unloaded(category_id)
+
+
+def search_tasks(store, text, limit=50):
+    """Return up to ``limit`` tasks whose name or comments match ``text``, best match first.
+
+    Each word of ``text`` has to start a word of the task's name or
+    comments (see ``todo_core.search``). Completed tasks left on disk or in
+    the archive are only searched once they are loaded.
+    """
+    return [store.task_index.get(task_id) for task_id in store.search_index.search(text, limit)]
+
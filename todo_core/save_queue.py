@@ -0,0 +1,191 @@
+"""Write-behind saving.
+
+SaveQueue collects changes from the UI and writes them to a Storage on a
+worker thread, so the main loop never waits for the disk. Changes that
+arrive within ``delay`` seconds of each other are coalesced into one write
+(but nothing waits longer than ``max_delay``), and a task changed several
+times in that window is written once, in its latest state.
+"""
+
+import atexit
+import threading
+import time
+
+from . import trace
+from .models import Task
+
+
+def _copy(task):
+    """Return a task as a dict the worker can encode without racing the UI"""
+    return task.to_dict() if isinstance(task, Task) else dict(task)
+
+
+class SaveQueue:
+    def __init__(self, storage, delay=0.3, max_delay=2.0):
+        self.storage = storage
+        self.delay = delay
+        self.max_delay = max_delay
+        self.error = None  # last write error, cleared by the next successful write
+
+        self._cond = threading.Condition()
+        self._categories = {}    # category id -> copy of the category
+        self._tasks = {}         # task id -> copy of the task
+        self._meta = {}
+        self._snapshot = None    # (categories, tasks) to rewrite in full
+        self._first_change = None
+        self._last_change = None
+        self._retry_at = 0
+        self._writing = 0        # changes in the batch being written right now
+        self._failures = 0
+        self._flush_requested = False
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name='save-queue', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def pending(self):
+        """Number of changes not on disk yet, including a write in progress"""
+        with self._cond:
+            return self._queued() + self._writing
+
+    def put(self, categories=None, tasks=None, meta=None):
+        """Queue changed categories ({id: category}), task dicts and meta values"""
+        with self._cond:
+            self._check_open()
+            for cat_id, category in (categories or {}).items():
+                self._categories[cat_id] = dict(category)
+            for task in tasks or []:
+                self._tasks[task['id']] = _copy(task)
+            self._meta.update(meta or {})
+            self._touch()
+
+    def put_snapshot(self, categories, tasks, meta=None):
+        """Queue a full rewrite; it replaces the changes still waiting"""
+        with self._cond:
+            self._check_open()
+            self._snapshot = ({cat_id: dict(category) for cat_id, category in categories.items()},
+                              [_copy(task) for task in tasks])
+            self._categories = {}
+            self._tasks = {}
+            self._meta.update(meta or {})
+            self._touch()
+
+    def flush(self, timeout=None):
+        """Write everything queued now and wait for it.
+
+        Returns True once nothing is pending, or False if a write failed or
+        ``timeout`` seconds passed first.
+        """
+        with self._cond:
+            failures = self._failures
+            self._flush_requested = True
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: not self._queued() and not self._writing
+                                or self._failures != failures, timeout)
+            return not self._queued() and not self._writing
+
+    def close(self, timeout=10):
+        """Flush and stop the worker; return True if everything was written"""
+        with self._cond:
+            if self._closed:
+                return not self._queued()
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self.storage.wait()
+        atexit.unregister(self.close)
+        return flushed
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("SaveQueue is closed")
+
+    def _queued(self):
+        return (len(self._categories) + len(self._tasks) + len(self._meta)
+                + (self._snapshot is not None))
+
+    def _touch(self):
+        now = time.monotonic()
+        if self._first_change is None:
+            self._first_change = now
+        self._last_change = now
+        self._cond.notify_all()
+
+    def _next_batch(self):
+        """Wait until a batch is due, take it and return it (None to stop)"""
+        with self._cond:
+            while True:
+                if not self._queued():
+                    if self._closed:
+                        return None
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                due = max(self._retry_at,
+                          min(self._last_change + self.delay, self._first_change + self.max_delay))
+                if self._flush_requested or self._closed or now >= due:
+                    break
+                self._cond.wait(due - now)
+
+            batch = (self._categories, self._tasks, self._meta, self._snapshot)
+            self._writing = self._queued()
+            self._categories, self._tasks, self._meta, self._snapshot = {}, {}, {}, None
+            self._first_change = self._last_change = None
+            self._flush_requested = False
+            return batch
+
+    def _write(self, batch):
+        categories, tasks, meta, snapshot = batch
+        with trace.span('write batch', tasks=len(tasks), categories=len(categories),
+                        snapshot=len(snapshot[1]) if snapshot is not None else 0):
+            if snapshot is not None:
+                self.storage.write_snapshot(snapshot[0], snapshot[1], meta)
+                meta = None
+            if categories or tasks or meta:
+                self.storage.append(categories=categories, tasks=list(tasks.values()), meta=meta)
+
+    def _requeue(self, batch):
+        """Put a failed batch back under any newer changes.
+
+        A newer snapshot already holds every task and category the failed
+        batch changed, in a later state, so then only its meta is kept.
+        """
+        categories, tasks, meta, snapshot = batch
+        meta.update(self._meta)
+        self._meta = meta
+        if self._snapshot is None:
+            categories.update(self._categories)
+            tasks.update(self._tasks)
+            self._categories, self._tasks = categories, tasks
+            self._snapshot = snapshot
+        now = time.monotonic()
+        self._first_change = self._last_change = now
+        self._retry_at = now + self.max_delay
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._write(batch)
+            except Exception as error:  # keep the changes and retry; the UI shows the error
+                with self._cond:
+                    self.error = error
+                    self._failures += 1
+                    if not self._closed:
+                        self._requeue(batch)
+            else:
+                with self._cond:
+                    self.error = None
+            finally:
+                with self._cond:
+                    self._writing = 0
+                    self._cond.notify_all()
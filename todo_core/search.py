@@ -0,0 +1,269 @@
+"""Full-text search over task names and comments.
+
+SearchIndex is an inverted index: every word of a task's name and of its
+comments maps to the set of tasks that contain it, and the words are also
+kept in sorted order so all words starting with a prefix are found with a
+binary search. A query matches the tasks that contain, for each of its
+words, a word starting with it.
+
+Results are ranked by score. For each query word a task scores for its
+best match in the name plus its best match in the comments; a name match
+is worth more than a comments match and a whole word more than a prefix.
+Tasks are numbered in the order they were indexed and the sets hold those
+numbers, so a single-word query is ranked a score tier at a time with set
+operations and stops as soon as it has enough results. The tasks matching
+one- and two-letter prefixes (the first keystrokes of a search) are kept
+up to date for the few prefixes searched most recently.
+
+Like TaskIndex it shares the task objects with the main list; after
+changing a task's name or comments in place, call ``update(task)``.
+"""
+
+import re
+from bisect import bisect_left
+from heapq import nlargest, nsmallest
+from itertools import islice
+
+# A whole word / a prefix of a word in the name, then the same in the comments.
+# Tiers in _Match.tiers() are in the order of these scores' sums.
+NAME_WORD, NAME_PREFIX, COMMENTS_WORD, COMMENTS_PREFIX = 6, 3, 2, 1
+
+SHORT_PREFIX = 2
+CACHED_PREFIXES = 16
+
+_WORD = re.compile(r'\w+')
+_NONE = frozenset()
+
+
+def words(text):
+    """Return the distinct lower-case words of a string, in order"""
+    if not text:
+        return ()
+    if not isinstance(text, str):
+        text = str(text)
+    return tuple(dict.fromkeys(_WORD.findall(text.casefold())))
+
+
+class _Match:
+    """The tasks matching one query word, split by how well they match.
+
+    The sets are only computed when a tier needs them.
+    """
+
+    def __init__(self, index, prefix):
+        self.index = index
+        self.prefix = prefix
+        self.name_words = index.in_name.get(prefix, _NONE)
+        self.comments_words = index.in_comments.get(prefix, _NONE)
+        self._name_prefixes = self._comments_prefixes = None
+
+    @property
+    def name_prefixes(self):
+        if self._name_prefixes is None:
+            self._name_prefixes = self.index.with_prefix(self.index.in_name, self.prefix)
+        return self._name_prefixes
+
+    @property
+    def comments_prefixes(self):
+        if self._comments_prefixes is None:
+            self._comments_prefixes = self.index.with_prefix(self.index.in_comments, self.prefix)
+        return self._comments_prefixes
+
+    def tasks(self):
+        return self.name_prefixes | self.comments_prefixes
+
+    def score(self, number):
+        score = 0
+        if number in self.name_prefixes:
+            score = NAME_WORD if number in self.name_words else NAME_PREFIX
+        if number in self.comments_prefixes:
+            score += COMMENTS_WORD if number in self.comments_words else COMMENTS_PREFIX
+        return score
+
+    def tiers(self):
+        """Yield the matching tasks as sets of equal score, best first"""
+        name_words, comments_words = self.name_words, self.comments_words
+        if name_words:
+            yield name_words & comments_words
+            yield (name_words & self.comments_prefixes) - comments_words
+            yield name_words - self.comments_prefixes
+        name_prefixes = self.name_prefixes
+        if name_prefixes:
+            yield (comments_words & name_prefixes) - name_words
+            yield ((name_prefixes - name_words) & self.comments_prefixes) - comments_words
+            yield (name_prefixes - name_words) - self.comments_prefixes
+        if self.comments_prefixes:
+            yield comments_words - name_prefixes
+            yield (self.comments_prefixes - comments_words) - name_prefixes
+
+
+class SearchIndex:
+    """Word -> tasks maps over the names and comments of a set of tasks.
+
+    Indexing every word of a large list takes a while, so adding a task
+    only queues it; queued tasks are indexed by the next search, or a batch
+    at a time with index_pending() to spread the work over idle time.
+    """
+
+    def __init__(self, tasks=()):
+        self.in_name = {}        # word -> numbers of the tasks with it in their name
+        self.in_comments = {}    # word -> numbers of the tasks with it in their comments
+        self._numbers = {}       # task id -> number (order it was indexed in)
+        self._filed = {}         # number -> (task id, name, comments, name words, comments words)
+        self._next_number = 0
+        self._pending = {}       # task id -> task, queued to be indexed
+        self._vocabulary = None  # every indexed word, sorted; built on first search
+        self._prefixes = {}      # (postings id, short prefix) -> numbers with a word starting with it
+        for task in tasks:
+            self._pending[task.id] = task
+
+    def __len__(self):
+        return len(self._numbers) + len(self._pending)
+
+    def __contains__(self, task_id):
+        return task_id in self._numbers or task_id in self._pending
+
+    @property
+    def pending(self):
+        """How many tasks are queued to be indexed"""
+        return len(self._pending)
+
+    def add(self, task):
+        """Queue a new task to be indexed"""
+        self.remove(task.id)
+        self._pending[task.id] = task
+
+    def update(self, task):
+        """Refile a task after its name or comments were changed in place"""
+        number = self._numbers.get(task.id)
+        if number is None:
+            self._pending[task.id] = task
+            return
+        filed = self._filed[number]
+        if filed[1] != task.name or filed[2] != task.comments:
+            self._unfile(number)
+            self._file(number, task)
+
+    def remove(self, task_id):
+        """Drop a task from the index"""
+        self._pending.pop(task_id, None)
+        number = self._numbers.pop(task_id, None)
+        if number is not None:
+            self._unfile(number)
+
+    def index_pending(self, limit=None):
+        """Index up to ``limit`` queued tasks (all by default); return how many are still queued"""
+        for task in list(islice(self._pending.values(), limit)):
+            del self._pending[task.id]
+            number = self._numbers[task.id] = self._next_number
+            self._next_number += 1
+            self._file(number, task)
+        return len(self._pending)
+
+    def search(self, text, limit=50):
+        """Return the ids of up to ``limit`` tasks matching ``text``, best match first.
+
+        Every word of ``text`` has to match (as a prefix of a word of the
+        task's name or comments). Tasks that score the same keep the order
+        they were indexed in.
+        """
+        query = words(text)
+        if not query:
+            return []
+        if self._pending:
+            self.index_pending()
+        matches = [_Match(self, prefix) for prefix in query]
+        if len(matches) == 1:
+            numbers = self._best(matches[0], limit)
+        else:
+            candidates = set.intersection(*(match.tasks() for match in matches))
+            scores = {number: sum(match.score(number) for match in matches) for number in candidates}
+            numbers = nlargest(limit, scores, key=lambda number: (scores[number], -number))
+        return [self._filed[number][0] for number in numbers]
+
+    @staticmethod
+    def _best(match, limit):
+        """Return the ``limit`` best matches of a single query word"""
+        found = []
+        for tier in match.tiers():
+            if len(found) + len(tier) >= limit:
+                found.extend(nsmallest(limit - len(found), tier))
+                break
+            found.extend(sorted(tier))
+        return found
+
+    def matching_words(self, prefix):
+        """Return the indexed words that start with ``prefix``"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.in_name.keys() | self.in_comments.keys())
+        vocabulary = self._vocabulary
+        start = end = bisect_left(vocabulary, prefix)
+        while end < len(vocabulary) and vocabulary[end].startswith(prefix):
+            end += 1
+        return vocabulary[start:end]
+
+    def with_prefix(self, postings, prefix):
+        """Return the tasks with a word starting with ``prefix`` in one of the postings.
+
+        The set is shared with the index (or a cache) and must not be changed.
+        """
+        found = [postings[word] for word in self.matching_words(prefix) if word in postings]
+        if len(found) <= 1:
+            return found[0] if found else _NONE
+        if len(prefix) > SHORT_PREFIX:
+            return set().union(*found)
+        key = (id(postings), prefix)
+        numbers = self._prefixes.pop(key, None)
+        if numbers is None:
+            numbers = set().union(*found)
+            if len(self._prefixes) >= CACHED_PREFIXES:
+                del self._prefixes[next(iter(self._prefixes))]
+        self._prefixes[key] = numbers  # (re)inserted last, so the oldest is dropped first
+        return numbers
+
+    def _short_prefixes(self, postings, found):
+        """Yield the cached sets for the short prefixes of some words"""
+        if self._prefixes:
+            key = id(postings)
+            for prefix in {word[:length] for word in found for length in range(1, SHORT_PREFIX + 1)}:
+                numbers = self._prefixes.get((key, prefix))
+                if numbers is not None:
+                    yield numbers
+
+    def _file(self, number, task):
+        name_words = words(task.name)
+        comments_words = words(task.comments)
+        self._filed[number] = (task.id, task.name, task.comments, name_words, comments_words)
+        for postings, found in ((self.in_name, name_words), (self.in_comments, comments_words)):
+            for word in found:
+                numbers = postings.get(word)
+                if numbers is None:
+                    numbers = postings[word] = set()
+                    self._added_word(word)
+                numbers.add(number)
+            for numbers in self._short_prefixes(postings, found):
+                numbers.add(number)
+
+    def _unfile(self, number):
+        _, _, _, name_words, comments_words = self._filed.pop(number)
+        for postings, found in ((self.in_name, name_words), (self.in_comments, comments_words)):
+            for word in found:
+                numbers = postings[word]
+                numbers.discard(number)
+                if not numbers:
+                    del postings[word]
+                    self._removed_word(word)
+            for numbers in self._short_prefixes(postings, found):
+                numbers.discard(number)
+
+    def _added_word(self, word):
+        vocabulary = self._vocabulary
+        if vocabulary is not None:
+            position = bisect_left(vocabulary, word)
+            if position == len(vocabulary) or vocabulary[position] != word:
+                vocabulary.insert(position, word)
+
+    def _removed_word(self, word):
+        vocabulary = self._vocabulary
+        if vocabulary is not None and word not in self.in_name and word not in self.in_comments:
+            del vocabulary[bisect_left(vocabulary, word)]
@@ -0,0 +1,284 @@
+"""SQLite storage backend.
+
+Tasks and categories are kept in tables, so a change is an update of its
+rows instead of a file rewrite. Tasks are indexed by category and status,
+status, priority and due date, so iter_tasks() reads only the rows it
+returns: the completed tasks left on disk when loading (per category, when
+the user asks for a category's history) and the selections the CLI
+updates and exports. Fields of a task that are
+not in TASK_FIELDS (written by other tools or later versions) are kept as
+JSON in the ``extra`` column.
+
+The connection is shared by the UI thread and the save queue's worker, so
+every use of it holds the storage's lock.
+
+Run this module directly to migrate an existing JSON data file:
+
+    python -m todo_core.sqlite_storage todo_data.json todo_data.db
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from .ids import IdAllocator, rekey_duplicates
+from .models import TASK_FIELDS
+from .storage import JournalStorage, Storage, StorageError
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS categories (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    color TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    category_id TEXT,
+    priority TEXT,
+    start_date TEXT,
+    due_date TEXT,
+    progress INTEGER NOT NULL DEFAULT 0,
+    status TEXT,
+    comments TEXT,
+    date_completed TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_category_status ON tasks (category_id, status);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+_FIELD_SET = frozenset(TASK_FIELDS)
+_COLUMNS = ', '.join(TASK_FIELDS + ('extra',))
+_INSERT_TASK = f'INSERT INTO tasks ({_COLUMNS}) VALUES ({", ".join("?" * (len(TASK_FIELDS) + 1))})'
+
+
+class SqliteStorage(Storage):
+    def __init__(self, path='todo_data.db'):
+        self.path = path
+        self.meta = {}
+        self._conn = None
+        self._lock = threading.RLock()  # held for every use of the connection
+
+    @property
+    def conn(self):
+        with self._lock:
+            if self._conn is None:
+                try:
+                    # Writes come from the save queue's worker thread after loading
+                    self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                    self._conn.execute('PRAGMA journal_mode=WAL')
+                    self._conn.execute('PRAGMA synchronous=FULL')
+                    self._conn.executescript(SCHEMA)
+                    self._add_extra_column()
+                except sqlite3.DatabaseError as error:
+                    self.close()
+                    raise StorageError(f"{self.path} could not be opened: {error}")
+            return self._conn
+
+    def _add_extra_column(self):
+        """Add the ``extra`` column to databases created before it existed"""
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(tasks)')}
+        if 'extra' not in columns:
+            self._conn.execute('ALTER TABLE tasks ADD COLUMN extra TEXT')
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Storage interface
+    # ------------------------------------------------------------------
+    def load(self):
+        """Return (categories, tasks) read from the database"""
+        try:
+            with self._lock:
+                categories = self._read_categories()
+                self._read_meta()
+        except sqlite3.DatabaseError as error:
+            raise StorageError(f"{self.path} could not be read: {error}")
+        return categories, list(self.iter_tasks())
+
+    def iter_load(self):
+        """Yield the categories, then the tasks a page of rows at a time, then meta"""
+        try:
+            with self._lock:
+                categories = self._read_categories()
+                self._read_meta()
+        except sqlite3.DatabaseError as error:
+            raise StorageError(f"{self.path} could not be read: {error}")
+        yield 'categories', categories
+        for task in self.iter_tasks():
+            yield 'task', task
+        yield 'meta', self.meta
+
+    def iter_tasks(self, status=None, category_id=None, priority=None, due_from=None, due_to=None,
+                   page_size=1000):
+        """Yield the saved tasks that pass the filters (see Storage.iter_tasks), in saved order.
+
+        Each page of rows is a separate query, so no statement stays open
+        while the caller works through the rows (and saves on the same
+        connection).
+        """
+        sql, params = self._select_tasks(status, category_id, priority, due_from, due_to)
+        last_seq = 0
+        while True:
+            try:
+                with self._lock:
+                    rows = self.conn.execute(sql, [last_seq, *params, page_size]).fetchall()
+            except sqlite3.DatabaseError as error:
+                raise StorageError(f"{self.path} could not be read: {error}")
+            if not rows:
+                return
+            last_seq = rows[-1][0]
+            for row in rows:
+                yield self._task(row[1:])
+
+    def append(self, categories=None, tasks=None, meta=None):
+        """Upsert the given changed categories ({id: category}), task dicts and meta values"""
+        with self._lock, self.conn:
+            for cat_id, category in (categories or {}).items():
+                self._upsert_category(cat_id, category)
+            for task in tasks or []:
+                self._upsert_task(task)
+            self._save_meta(meta)
+
+    def write_snapshot(self, categories, tasks, meta=None):
+        """Replace every row with the given categories and tasks"""
+        with self._lock, self.conn:
+            self._save_meta(meta)
+            self.conn.execute('DELETE FROM categories')
+            self.conn.execute('DELETE FROM tasks')
+            self.conn.executemany(
+                'INSERT INTO categories (id, name, color) VALUES (?, ?, ?)',
+                [(cat_id, cat['name'], cat['color']) for cat_id, cat in categories.items()])
+            self.conn.executemany(_INSERT_TASK, [self._task_row(task) for task in tasks])
+
+    def reset(self):
+        """Move the database aside so the application can start empty"""
+        with self._lock:
+            self.close()
+            kept = []
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            for path in (self.path, self.path + '-wal', self.path + '-shm'):
+                if os.path.exists(path):
+                    quarantined = f"{path}.corrupt-{stamp}"
+                    os.replace(path, quarantined)
+                    kept.append(quarantined)
+            return kept
+
+    def _select_tasks(self, status=None, category_id=None, priority=None, due_from=None, due_to=None):
+        """Return the query for a page of iter_tasks and its filter parameters.
+
+        The parameters go between the last seq read and the page size.
+        """
+        conditions = ['seq > ?']
+        params = []
+        for column, value in (('category_id', category_id), ('status', status), ('priority', priority)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if due_from is not None:
+            conditions.append('due_date >= ?')
+            params.append(due_from)
+        if due_to is not None:
+            conditions.append('due_date <= ?')
+            params.append(due_to)
+        if due_from is not None or due_to is not None:
+            conditions.append("due_date != ''")
+        sql = f'SELECT seq, {_COLUMNS} FROM tasks WHERE {" AND ".join(conditions)} ORDER BY seq LIMIT ?'
+        return sql, params
+
+    def _read_categories(self):
+        return {cat_id: {'name': name, 'color': color}
+                for cat_id, name, color in self.conn.execute(
+                    'SELECT id, name, color FROM categories ORDER BY seq')}
+
+    def _read_meta(self):
+        self.meta = {key: json.loads(value)
+                     for key, value in self.conn.execute('SELECT key, value FROM meta')}
+
+    def _save_meta(self, meta):
+        if not meta:
+            return
+        self.meta.update(meta)
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+            [(key, json.dumps(value)) for key, value in meta.items()])
+
+    def _task_row(self, task):
+        extra = {key: value for key, value in task.items() if key not in _FIELD_SET}
+        return tuple(task.get(field) for field in TASK_FIELDS) + (json.dumps(extra) if extra else None,)
+
+    def _task(self, row):
+        """Return the task dict of a row of TASK_FIELDS and ``extra``"""
+        task = dict(zip(TASK_FIELDS, row))
+        if row[-1]:
+            task.update(json.loads(row[-1]))
+        return task
+
+    def _upsert_category(self, cat_id, category):
+        cursor = self.conn.execute(
+            'UPDATE categories SET name = ?, color = ? WHERE id = ?',
+            (category['name'], category['color'], cat_id))
+        if cursor.rowcount == 0:
+            self.conn.execute(
+                'INSERT INTO categories (id, name, color) VALUES (?, ?, ?)',
+                (cat_id, category['name'], category['color']))
+
+    def _upsert_task(self, task):
+        row = self._task_row(task)
+        assignments = ', '.join(f'{field} = ?' for field in TASK_FIELDS[1:] + ('extra',))
+        cursor = self.conn.execute(
+            f'UPDATE tasks SET {assignments} WHERE id = ?', row[1:] + row[:1])
+        if cursor.rowcount == 0:
+            self.conn.execute(_INSERT_TASK, row)
+
+
+def migrate_json_to_sqlite(json_path, db_path):
+    """Copy a JSON data file (and its journal) into a new SQLite database.
+
+    Duplicate task ids are re-keyed on the way. Returns (number of
+    categories, number of tasks) migrated.
+    """
+    if os.path.exists(db_path):
+        raise StorageError(f"{db_path} already exists; refusing to overwrite it")
+
+    source = JournalStorage(json_path)
+    categories, tasks = source.load()
+    source.wait()
+    allocator = IdAllocator.for_tasks(tasks, source.meta)
+    rekey_duplicates(tasks, allocator)
+    meta = dict(source.meta, **allocator.meta())
+
+    storage = SqliteStorage(db_path)
+    try:
+        storage.write_snapshot(categories, tasks, meta)
+    finally:
+        storage.close()
+    return len(categories), len(tasks)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python -m todo_core.sqlite_storage <todo_data.json> <todo_data.db>")
+        sys.exit(2)
+    try:
+        category_count, task_count = migrate_json_to_sqlite(sys.argv[1], sys.argv[2])
+    except StorageError as error:
+        print(f"Migration failed: {error}")
+        sys.exit(1)
+    print(f"Migrated {category_count} categories and {task_count} tasks to {sys.argv[2]}")
@@ -0,0 +1,527 @@
+"""Persistence for categories and tasks.
+
+The data lives in two files:
+
+- the snapshot (``todo_data.json``), which keeps the original
+  ``{"categories": {...}, "tasks": [...]}`` layout, and
+- an append-only journal (``todo_data.json.journal``) with one JSON record
+  per line for every category or task that changed since the snapshot.
+
+Saving a change only appends a line to the journal. Once the journal grows
+past ``compact_every`` records it is rotated and folded into a fresh
+snapshot on a background thread, so the UI never waits on a full rewrite.
+Loading replays snapshot + rotated journal + journal, in that order.
+
+Every write is crash safe: journal appends are fsynced, and snapshots are
+written to a temporary file, fsynced and renamed over the old one, which
+is kept as ``todo_data.json.bak``. The journals a new snapshot folded in
+are only moved once it is in place, and they are kept as the backup's
+journal (``todo_data.json.bak.journal``) until the next snapshot replaces
+the backup, so the backup plus its journal still give the latest state.
+After a crash at any point the data can be rebuilt from whichever snapshot
+generation survived plus the journals.
+"""
+
+import json
+import os
+import threading
+import time
+
+from . import trace
+from .json_stream import iter_snapshot
+
+
+def _json_default(value):
+    """Encode objects that know their saved layout (Task) as that layout"""
+    to_dict = getattr(value, 'to_dict', None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return to_dict()
+
+
+class StorageError(Exception):
+    """Raised when the saved data exists but cannot be read or recovered"""
+
+
+def _task_filter(status=None, category_id=None, priority=None, due_from=None, due_to=None):
+    """Return a function telling whether a task dict passes iter_tasks' filters"""
+    def matches(task):
+        if status is not None and task.get('status') != status:
+            return False
+        if category_id is not None and task.get('category_id') != category_id:
+            return False
+        if priority is not None and task.get('priority') != priority:
+            return False
+        if due_from is not None or due_to is not None:
+            due = task.get('due_date')
+            if not due or (due_from is not None and due < due_from) or (due_to is not None and due > due_to):
+                return False
+        return True
+    return matches
+
+
+class Storage:
+    """Interface shared by the storage backends.
+
+    Categories are passed around as ``{id: {'name', 'color'}}`` and tasks as
+    the task dicts used throughout the application. ``meta`` holds small
+    bookkeeping values (such as the next task id) that are saved alongside.
+    """
+
+    recovery_note = None
+    meta = None
+
+    def load(self):
+        """Return (categories, tasks); saved meta values are left in ``self.meta``"""
+        raise NotImplementedError
+
+    def iter_load(self):
+        """Yield the saved data a piece at a time, for loading large files.
+
+        Yields ``('categories', {id: category})``, then ``('task', task)``
+        for every task in saved order, then ``('meta', meta)``. Backends
+        that cannot stream fall back to load().
+        """
+        categories, tasks = self.load()
+        yield 'categories', categories
+        for task in tasks:
+            yield 'task', task
+        yield 'meta', self.meta
+
+    def load_categories(self):
+        """Return the saved categories, reading no further into the data than needed"""
+        items = self.iter_load()
+        try:
+            for kind, value in items:
+                if kind == 'categories':
+                    return value
+        finally:
+            items.close()
+        return {}
+
+    def iter_tasks(self, status=None, category_id=None, priority=None, due_from=None, due_to=None):
+        """Yield the saved tasks that pass the given filters, in saved order, without reloading.
+
+        ``status``, ``category_id`` and ``priority`` must match exactly;
+        ``due_from`` and ``due_to`` are an inclusive range of 'YYYY-MM-DD'
+        due dates (tasks without one never match). Used to read tasks that
+        were left on disk when the data was loaded, and by the CLI to stream
+        a selection without loading everything.
+        """
+        raise NotImplementedError
+
+    def append(self, categories=None, tasks=None, meta=None):
+        """Persist only the given changed categories, tasks and meta values"""
+        raise NotImplementedError
+
+    def write_snapshot(self, categories, tasks, meta=None):
+        """Persist the complete data set, replacing what was saved before"""
+        raise NotImplementedError
+
+    def reset(self):
+        """Move the saved data aside so the application can start empty"""
+        raise NotImplementedError
+
+    def wait(self):
+        """Block until background work started by the backend has finished"""
+
+
+def open_storage(path):
+    """Return the storage backend for a data file, chosen by its extension"""
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        from .sqlite_storage import SqliteStorage
+        return SqliteStorage(path)
+    return JournalStorage(path)
+
+
+class JournalStorage(Storage):
+    def __init__(self, path='todo_data.json', compact_every=500):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.rotated_path = path + '.journal.1'
+        self.backup_path = path + '.bak'
+        self.backup_journal_path = path + '.bak.journal'
+        self.tmp_path = path + '.tmp'
+        self.compact_every = compact_every
+        self.journal_records = 0
+        self.recovery_note = None
+        self.meta = {}
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def load(self):
+        """Return (categories, tasks) rebuilt from the snapshot and journals.
+
+        Raises StorageError if the snapshot is damaged and no earlier
+        generation can be read either.
+        """
+        self.recovery_note = None
+        data, from_backup = self._recover_snapshot()
+        self._repair_journal(self.journal_path)
+        positions = {task['id']: i for i, task in enumerate(data['tasks'])}
+
+        self.journal_records = 0
+        for journal in self._journals(from_backup):
+            for record in self._read_journal(journal):
+                self._apply(record, data, positions)
+                if journal == self.journal_path:
+                    self.journal_records += 1
+
+        self.meta = data['meta']
+        if os.path.exists(self.rotated_path) or self.journal_records >= self.compact_every:
+            self.compact_in_background()
+        return data['categories'], data['tasks']
+
+    def iter_load(self):
+        """Stream the snapshot, with the journals applied, one task at a time.
+
+        The journals are small and are read up front; tasks they changed
+        replace the snapshot's copy as it goes by, and tasks they added
+        follow the snapshot's. Raises StorageError if the snapshot turns out
+        to be damaged part way through, so the caller can fall back to
+        load(), which knows how to recover from the backup.
+        """
+        self.recovery_note = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self._repair_journal(self.journal_path)
+        with self._lock:
+            f, from_backup = self._open_current_snapshot()
+            journaled, positions, self.journal_records = self._read_journals(from_backup)
+        meta = yield from self._merge(f, journaled, positions)
+        self.meta = meta
+        if os.path.exists(self.rotated_path) or self.journal_records >= self.compact_every:
+            self.compact_in_background()
+        yield 'meta', meta
+
+    def iter_tasks(self, status=None, category_id=None, priority=None, due_from=None, due_to=None):
+        """Yield the saved tasks that pass the filters (see Storage.iter_tasks) as they are on disk"""
+        matches = _task_filter(status, category_id, priority, due_from, due_to)
+        with self._lock:
+            # Read the journals and open the snapshot together, so a
+            # compaction cannot fold records in between the two
+            f, from_backup = self._open_current_snapshot()
+            journaled, positions, _ = self._read_journals(from_backup)
+        for kind, value in self._merge(f, journaled, positions):
+            if kind == 'task' and matches(value):
+                yield value
+
+    def _journals(self, from_backup=False):
+        """Return the journals to replay, in order, over the snapshot or (``from_backup``) the backup"""
+        journals = (self.rotated_path, self.journal_path)
+        if from_backup:
+            return (self.backup_journal_path,) + journals
+        return journals
+
+    def _read_journals(self, from_backup=False):
+        """Return the journaled changes, their task positions and the live journal's length"""
+        journaled = {'categories': {}, 'tasks': [], 'meta': {}}
+        positions = {}
+        records = 0
+        for journal in self._journals(from_backup):
+            for record in self._read_journal(journal):
+                self._apply(record, journaled, positions)
+                if journal == self.journal_path:
+                    records += 1
+        return journaled, positions, records
+
+    def _open_current_snapshot(self):
+        """Open the snapshot (or, if it is missing, the backup).
+
+        Returns the file (None if there is neither) and whether it is the backup.
+        """
+        from_backup = not os.path.exists(self.path)
+        path = self.backup_path if from_backup else self.path
+        try:
+            return open(path, 'r'), from_backup
+        except FileNotFoundError:
+            return None, from_backup
+        except OSError as error:
+            raise StorageError(f"{path} could not be opened: {error}")
+
+    def _merge(self, f, journaled, positions):
+        """Yield the categories and tasks of an open snapshot with the journaled changes on top.
+
+        Closes the file and returns the merged meta values.
+        """
+        meta = {}
+        categories_sent = False
+        if f is not None:
+            with f:
+                try:
+                    for key, value in iter_snapshot(f):
+                        if key == 'task':
+                            index = positions.pop(value['id'], None)
+                            yield 'task', value if index is None else journaled['tasks'][index]
+                        elif key == 'categories':
+                            value.update(journaled['categories'])
+                            categories_sent = True
+                            yield 'categories', value
+                        elif key == 'meta':
+                            meta = value
+                except (ValueError, KeyError, TypeError, OSError) as error:
+                    raise StorageError(f"{f.name} could not be read: {error}")
+        if not categories_sent:
+            yield 'categories', journaled['categories']
+        for index in positions.values():
+            yield 'task', journaled['tasks'][index]
+        meta.update(journaled['meta'])
+        return meta
+
+    def _read_snapshot(self, path):
+        """Read a snapshot file, returning empty data if it does not exist"""
+        data = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+        return {
+            'categories': data.get('categories', {}),
+            'tasks': data.get('tasks', []),
+            'meta': data.get('meta', {})
+        }
+
+    def _read_current_snapshot(self):
+        """Read the snapshot, falling back to the backup when it is missing.
+
+        A crash between the two renames of a snapshot write, or a damaged
+        snapshot that was quarantined, leaves only the backup behind.
+        Returns the data and whether it came from the backup.
+        """
+        if os.path.exists(self.path):
+            return self._read_snapshot(self.path), False
+        return self._read_snapshot(self.backup_path), True
+
+    def _recover_snapshot(self):
+        """Read the newest readable snapshot generation.
+
+        Returns the data and whether it came from the backup (whose journal
+        then has to be replayed before the others).
+        """
+        if os.path.exists(self.tmp_path):
+            # Left over from a snapshot write that never reached the rename
+            os.remove(self.tmp_path)
+
+        if not os.path.exists(self.path):
+            try:
+                return self._read_current_snapshot()
+            except (ValueError, OSError) as error:
+                raise StorageError(f"The backup {self.backup_path} is damaged: {error}")
+
+        try:
+            return self._read_snapshot(self.path), False
+        except (ValueError, OSError) as error:
+            damaged = error
+
+        if not os.path.exists(self.backup_path):
+            raise StorageError(f"{self.path} is damaged and there is no backup to recover from: {damaged}")
+        try:
+            data = self._read_snapshot(self.backup_path)
+        except (ValueError, OSError) as error:
+            raise StorageError(f"{self.path} and its backup {self.backup_path} are both damaged: {error}")
+
+        # Keep the damaged file around instead of overwriting it
+        quarantined = self.quarantine()
+        self.recovery_note = (f"{self.path} was damaged and has been restored from the previous "
+                              f"saved generation and its journal. The damaged file was kept as "
+                              f"{quarantined}; the most recent changes may be missing.")
+        return data, True
+
+    def _repair_journal(self, path):
+        """Cut a torn, half-written final record off the end of a journal"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb+') as f:
+            data = f.read()
+            if not data or data.endswith(b'\n'):
+                return
+            f.truncate(data.rfind(b'\n') + 1)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def quarantine(self, path=None):
+        """Move a damaged file (the snapshot by default) aside and return its new name"""
+        path = path or self.path
+        quarantined = f"{path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+        os.replace(path, quarantined)
+        return quarantined
+
+    def reset(self):
+        """Move every data file aside so the application can start empty"""
+        self.wait()
+        kept = []
+        with self._lock:
+            for path in (self.path, self.backup_path, self.backup_journal_path,
+                         self.rotated_path, self.journal_path):
+                if os.path.exists(path):
+                    kept.append(self.quarantine(path))
+            self.journal_records = 0
+        return kept
+
+    def _read_journal(self, path):
+        """Yield the records of a journal file, skipping a torn final line"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A crash mid-append leaves a partial record behind
+                    continue
+
+    def _apply(self, record, data, positions):
+        """Replay a single journal record onto the loaded data"""
+        kind = record.get('type')
+        if kind == 'category':
+            data['categories'][record['id']] = record['data']
+        elif kind == 'task':
+            tasks = data['tasks']
+            task = record['data']
+            index = positions.get(task['id'])
+            if index is None:
+                positions[task['id']] = len(tasks)
+                tasks.append(task)
+            else:
+                tasks[index] = task
+        elif kind == 'meta':
+            data['meta'].update(record['data'])
+
+    # ------------------------------------------------------------------
+    # Saving
+    # ------------------------------------------------------------------
+    def append(self, categories=None, tasks=None, meta=None):
+        """Append changed categories ({id: category}), task dicts and meta values to the journal"""
+        with trace.span('encode journal records'):
+            lines = []
+            for cat_id, category in (categories or {}).items():
+                lines.append(self._encode({'type': 'category', 'id': cat_id, 'data': category}))
+            for task in tasks or []:
+                lines.append(self._encode({'type': 'task', 'id': task['id'], 'data': task}))
+            if meta:
+                self.meta.update(meta)
+                lines.append(self._encode({'type': 'meta', 'data': meta}))
+        if not lines:
+            return
+
+        with self._lock, trace.span('write journal', records=len(lines)):
+            with open(self.journal_path, 'a') as f:
+                f.write(''.join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            self.journal_records += len(lines)
+
+        if self.journal_records >= self.compact_every:
+            self.compact_in_background()
+
+    def write_snapshot(self, categories, tasks, meta=None):
+        """Write a complete snapshot and keep the journals it supersedes with the backup"""
+        self.wait()
+        if meta:
+            self.meta.update(meta)
+        with self._lock:
+            self._write_snapshot_file({'categories': categories, 'tasks': tasks, 'meta': self.meta})
+            self._keep_with_backup((self.rotated_path, self.journal_path))
+            self.journal_records = 0
+
+    def _encode(self, record):
+        return json.dumps(record, separators=(',', ':'), default=_json_default) + '\n'
+
+    def _write_snapshot_file(self, data):
+        """Write the snapshot next to the old one and swap it into place.
+
+        The previous snapshot becomes the backup generation, and the journal
+        kept with the one it replaces is dropped. Callers move the journals
+        the new snapshot folded in only after this returns.
+        """
+        with open(self.tmp_path, 'w') as f:
+            with trace.span('encode snapshot', tasks=len(data['tasks'])):
+                json.dump(data, f, indent=2, default=_json_default)
+            with trace.span('sync snapshot'):
+                f.flush()
+                os.fsync(f.fileno())
+        if os.path.exists(self.path):
+            if os.path.exists(self.backup_journal_path):
+                os.remove(self.backup_journal_path)
+            os.replace(self.path, self.backup_path)
+        os.replace(self.tmp_path, self.path)
+        self._fsync_directory()
+
+    def _keep_with_backup(self, journals):
+        """Move journals a new snapshot folded in onto the end of the backup's journal.
+
+        The backup plus that journal add up to the new snapshot, so a damaged
+        snapshot can be recovered without losing the changes it folded in.
+        A crash part way through leaves the journals in place, and replaying
+        them again over the new snapshot changes nothing.
+        """
+        journals = [path for path in journals if os.path.exists(path)]
+        if not journals:
+            return
+        with open(self.backup_journal_path, 'a') as out:
+            for path in journals:
+                with open(path, 'r') as f:
+                    records = f.read()
+                if records and not records.endswith('\n'):
+                    records += '\n'  # keep a torn final record on a line of its own
+                out.write(records)
+            out.flush()
+            os.fsync(out.fileno())
+        for path in journals:
+            os.remove(path)
+
+    def _fsync_directory(self):
+        """Make the renames durable (not supported on Windows)"""
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+    def compact_in_background(self):
+        """Rotate the journal and fold it into the snapshot on a worker thread"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        with self._lock:
+            # A rotated journal left behind by an interrupted compaction is
+            # folded in first; the live journal keeps collecting records
+            if not os.path.exists(self.rotated_path):
+                if not os.path.exists(self.journal_path):
+                    return
+                os.replace(self.journal_path, self.rotated_path)
+                self.journal_records = 0
+
+        self._compactor = threading.Thread(target=self._compact, daemon=True)
+        self._compactor.start()
+
+    def _compact(self):
+        """Merge the snapshot with the rotated journal (runs off the UI thread)"""
+        data, from_backup = self._read_current_snapshot()
+        positions = {task['id']: i for i, task in enumerate(data['tasks'])}
+        journals = (self.backup_journal_path, self.rotated_path) if from_backup else (self.rotated_path,)
+        for journal in journals:
+            for record in self._read_journal(journal):
+                self._apply(record, data, positions)
+
+        with self._lock:
+            self._write_snapshot_file(data)
+            self._keep_with_backup((self.rotated_path,))
+
+    def wait(self):
+        """Block until a running background compaction has finished"""
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
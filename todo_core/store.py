@@ -0,0 +1,318 @@
+"""The task store.
+
+TodoStore owns the loaded categories, tasks and today's plan together with
+the indexes built over them, and saves changes to a Storage backend. It has
+no GUI dependencies, so scripts and the Tk application share it; changes
+are made through the functions in ``todo_core.commands``.
+"""
+
+from itertools import chain
+
+from . import trace
+from .archive import Archive
+from .category_index import CategoryIndex
+from .events import ChangeNotifier
+from .ids import IdAllocator, rekey_duplicates
+from .locking import DataLock
+from .models import COMPLETED, Task
+from .save_queue import SaveQueue
+from .search import SearchIndex
+from .storage import StorageError, open_storage
+from .task_index import TaskIndex
+from .task_query import QueryCache
+from .today import DayPlan
+
+
+class TodoStore:
+    """Tasks, categories and today's plan, kept in sync with a Storage.
+
+    With ``background`` (the GUI) writes go through a SaveQueue on a worker
+    thread; otherwise each save is written before it returns. With
+    ``archive_after`` tasks completed more than that many days ago are moved
+    to the archive (see ``todo_core.archive``) whenever the data is loaded.
+
+    The data file is locked against other processes until close() (see
+    ``todo_core.locking``); DataLockedError is raised if one has it open.
+    """
+
+    def __init__(self, path='todo_data.json', background=False, archive_after=None):
+        self.path = path
+        self.lock = DataLock(path)
+        self.lock.acquire()
+        self.saves = None
+        try:
+            self.storage = open_storage(path)
+            self.saves = SaveQueue(self.storage) if background else None
+            self.archive = Archive(path, archive_after, background)
+        except BaseException:
+            # There is no store for the caller to close, so give the lock back now
+            if self.saves is not None:
+                self.saves.close()
+            self.lock.release()
+            raise
+        self.changes = ChangeNotifier()
+        self.query_cache = QueryCache()  # results of TaskQuery.run
+        self.categories = {}
+        self.tasks = []
+        self.loading = False
+        self._clear_deferred()
+        self._build({})
+
+    def load(self):
+        """Load the saved data; raises StorageError if it cannot be read"""
+        with trace.span('read data file'):
+            self.categories, records = self.storage.load()
+        with trace.span('index tasks', tasks=len(records)):
+            kept, archivable = [], []
+            due = self.archive.due
+            for record in records:
+                task = Task.from_dict(record)
+                (archivable if due(task) else kept).append(task)
+            del records
+            self.tasks = kept
+            self._clear_deferred()
+            self._build(self.storage.meta, archivable)
+
+    def load_in_batches(self, batch_size=2000, defer_completed=False):
+        """Start loading the saved data a batch of tasks at a time.
+
+        The data and indexes are emptied now and filled as the returned
+        iterator is advanced: each step adds up to ``batch_size`` tasks and
+        yields how many are loaded so far, so a caller can show the
+        categories and the first tasks while the rest are still being
+        read. Commands that need the complete data refuse to run until the
+        iterator is exhausted (``loading`` is False again).
+
+        With ``defer_completed`` completed tasks are left on disk, counted
+        per category in ``deferred``, until load_deferred() reads them.
+        Raises StorageError like load().
+        """
+        self.categories = {}
+        self.tasks = []
+        self._clear_deferred()
+        self.task_index = TaskIndex()
+        self.category_index = CategoryIndex(self.categories)
+        self.search_index = SearchIndex()  # filled once loading is finished
+        self.today = DayPlan()
+        self.task_ids = IdAllocator()
+        self.loading = True
+        return self._load_batches(batch_size, defer_completed)
+
+    def _load_batches(self, batch_size, defer_completed):
+        try:
+            meta = {}
+            archivable = []
+            pending = 0
+            try:
+                for kind, value in self.storage.iter_load():
+                    if kind == 'task':
+                        task = Task.from_dict(value)
+                        if self.archive.due(task):
+                            archivable.append(task)
+                            continue
+                        if defer_completed and task.status_code == COMPLETED:
+                            self._defer(task)
+                            continue
+                        self._add_loaded(task)
+                        pending += 1
+                        if pending == batch_size:
+                            pending = 0
+                            yield len(self.tasks)
+                    elif kind == 'categories':
+                        self.categories.update(value)
+                        for cat_id, category in value.items():
+                            self.category_index.set(cat_id, category)
+                    elif kind == 'meta':
+                        meta = value
+            except StorageError:
+                # Damaged part way through: load() knows how to recover
+                self.load()
+            else:
+                if self._deferred_clash:
+                    # Duplicate ids across loaded and deferred tasks can only
+                    # be re-keyed with everything in memory
+                    self.load()
+                else:
+                    self._finish(meta, archivable)
+        finally:
+            self.loading = False
+        yield len(self.tasks)
+
+    def _add_loaded(self, task):
+        if task['id'] in self._deferred_ids:
+            self._deferred_clash = True
+        self.tasks.append(task)
+        self.task_index.add(task)
+
+    def _defer(self, task):
+        if task.id in self._deferred_ids or task.id in self.task_index:
+            self._deferred_clash = True
+        self._deferred_ids.add(task.id)
+        self.deferred[task.category_id] = self.deferred.get(task.category_id, 0) + 1
+
+    def _clear_deferred(self):
+        self.deferred = {}          # category id -> number of completed tasks left on disk
+        self._deferred_ids = set()
+        self._deferred_clash = False
+
+    def load_deferred(self, task_ids=None, category_id=None):
+        """Read completed tasks that loading left on disk and return them.
+
+        Reads the ones with the given ids, or those of one category, or all
+        of them. They are added to the data and indexes like any other task;
+        nothing is notified.
+        """
+        wanted = self._deferred_ids if task_ids is None else self._deferred_ids.intersection(task_ids)
+        if not wanted or (category_id is not None and category_id not in self.deferred):
+            return []
+        loaded = []
+        for record in self.storage.iter_tasks(status='Completed', category_id=category_id):
+            if record['id'] in wanted and record['id'] not in self.task_index:
+                task = Task.from_dict(record)
+                self.tasks.append(task)
+                self.task_index.add(task)
+                self.search_index.add(task)
+                loaded.append(task)
+        for task in loaded:
+            self._deferred_ids.discard(task['id'])
+            count = self.deferred[task['category_id']] - 1
+            if count:
+                self.deferred[task['category_id']] = count
+            else:
+                del self.deferred[task['category_id']]
+        return loaded
+
+    def load_archived(self, category_id=None):
+        """Page in archived tasks (of one category, or all) and return them.
+
+        They join the data and indexes like any other task, but changes to
+        them are still saved to the archive. Nothing is notified.
+        """
+        if not self.archive.unloaded(category_id):
+            return []
+        loaded = []
+        for record in self.archive.iter_tasks(category_id):
+            task_id = record['id']
+            if task_id in self.task_index or task_id in self._deferred_ids:
+                # Reopened since it was archived; the working copy wins
+                continue
+            task = Task.from_dict(record)
+            self.tasks.append(task)
+            self.task_index.add(task)
+            self.search_index.add(task)
+            self.archive.paged_in(task)
+            loaded.append(task)
+        self.archive.loaded.add(category_id)
+        return loaded
+
+    def reset(self):
+        """Move unreadable data aside and start empty"""
+        self.storage.reset()
+        self.categories = {}
+        self.tasks = []
+        self._clear_deferred()
+        self._build({})
+
+    def _build(self, meta, archivable=()):
+        self.task_index = TaskIndex(self.tasks)
+        self.category_index = CategoryIndex(self.categories)
+        self._finish(meta, archivable)
+
+    def _finish(self, meta, archivable=()):
+        """Set up today's plan and the id allocator once every task is indexed.
+
+        ``archivable`` are the loaded tasks that are due for the archive;
+        they are moved there now, except for any planned for today.
+        """
+        self.today = DayPlan(meta)  # ids of the tasks planned for today
+        self.archive.read_meta(meta)
+        archiving = []
+        for task in archivable:
+            if task.id in self.today:
+                self._add_loaded(task)
+            else:
+                archiving.append(task)
+        self.task_ids = IdAllocator.for_ids(
+            chain(self.task_index.by_id, self._deferred_ids, (task.id for task in archiving)), meta)
+        rekeyed = rekey_duplicates(self.tasks, self.task_ids)  # older versions could repeat ids
+        if archiving:
+            self.archive.add(archiving)
+        if rekeyed or archiving:
+            self.save()
+        if rekeyed:
+            self.task_index = TaskIndex(self.tasks)
+        self.search_index = SearchIndex(self.tasks)  # queued; indexed on first search
+        # Planned tasks are shown on Tasks for the Day even if they are completed
+        self.load_deferred([task_id for task_id in self.today if task_id in self._deferred_ids])
+
+    def save(self, tasks=None, categories=None, today=False):
+        """Save data changes.
+
+        Only the given task dicts and category ids are appended to the
+        journal (``today`` saves just today's plan); with no arguments a
+        full snapshot is written instead. The task id high-water mark and
+        today's plan are saved whenever they changed.
+        """
+        meta = {}
+        if tasks and self.archive.ids:
+            tasks = self._save_archived(tasks)
+        if self.today.dirty:
+            meta.update(self.today.meta())
+        if self.archive.dirty:
+            meta.update(self.archive.meta())
+        if tasks is None and categories is None and not today:
+            # A snapshot replaces everything on disk, including deferred tasks
+            self.load_deferred()
+            meta.update(self.task_ids.meta())
+            write = self.saves.put_snapshot if self.saves is not None else self.storage.write_snapshot
+            tasks = self.working_tasks()
+            with trace.span('save_data', tasks=len(tasks), snapshot=True):
+                write(self.categories, tasks, meta)
+            return
+        if self.task_ids.dirty:
+            meta.update(self.task_ids.meta())
+        append = self.saves.put if self.saves is not None else self.storage.append
+        with trace.span('save_data', tasks=len(tasks or ()), snapshot=False):
+            append(
+                categories={cat_id: self.categories[cat_id] for cat_id in categories or []},
+                tasks=tasks,
+                meta=meta or None
+            )
+
+    def _save_archived(self, tasks):
+        """Save the paged-in archived tasks among ``tasks`` to the archive; return the rest"""
+        archived = [task for task in tasks if task.id in self.archive.ids]
+        if not archived:
+            return tasks
+        kept = [task for task in archived if self.archive.keep(task)]
+        if kept:
+            self.archive.save(kept)
+        kept_ids = {task.id for task in kept}
+        return [task for task in tasks if task.id not in kept_ids]
+
+    def working_tasks(self):
+        """Return the tasks that belong in the working data (not paged in from the archive)"""
+        if not self.archive.ids:
+            return self.tasks
+        return [task for task in self.tasks if task.id not in self.archive.ids]
+
+    def flush(self, timeout=None):
+        """Wait until queued writes are on disk; return False if they are not"""
+        if self.saves is not None and not self.saves.flush(timeout):
+            return False
+        return self.archive.flush(timeout)
+
+    def close(self, timeout=10):
+        """Write everything still pending and stop background work.
+
+        Waits up to ``timeout`` seconds for queued writes and returns False
+        if they are not all on disk by then; pass 0 to stop without waiting.
+        """
+        if self.saves is not None:
+            closed = self.saves.close(timeout)
+        else:
+            self.storage.wait()
+            closed = True
+        closed = self.archive.close(timeout) and closed
+        self.lock.release()
+        return closed
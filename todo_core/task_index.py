@@ -0,0 +1,149 @@
+"""In-memory lookup tables over the task list.
+
+TaskIndex keeps id -> task, category_id -> tasks and status -> tasks maps so
+views can count and look up tasks without scanning the whole list. The task
+dicts themselves are shared with the main list; after changing a task in
+place, call ``update(task)`` so it is refiled if its category or status
+changed.
+
+Every add, update and remove stamps the index (``version``) and the
+categories involved (``category_version``), so cached query results can
+tell whether they are stale.
+"""
+
+from heapq import merge
+
+from .events import next_version
+
+
+class TaskIndex:
+    def __init__(self, tasks=()):
+        self.by_id = {}
+        self.by_category = {}
+        self.by_status = {}
+        self._filed_under = {}   # id -> (category_id, status) the task is filed under
+        self._order = {}         # id -> insertion sequence, to keep list order in buckets
+        self._unsorted = set()   # (kind, key) buckets that received a task out of order
+        self._bucket_last = {}   # (kind, key) -> highest sequence filed in that bucket
+        self._next_order = 0
+        self.version = self._base_version = next_version()
+        self._category_versions = {}
+        for task in tasks:
+            self.add(task)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, task_id):
+        return task_id in self.by_id
+
+    def get(self, task_id):
+        """Return the task with this id, or None"""
+        return self.by_id.get(task_id)
+
+    def add(self, task):
+        """Index a new task"""
+        task_id = task.id
+        if task_id in self.by_id:
+            self.remove(task_id)
+        self.by_id[task_id] = task
+        self._order[task_id] = self._next_order
+        self._next_order += 1
+        self._file(task)
+        self._stamp(task.category_id)
+
+    def update(self, task):
+        """Refile a task after its category or status was changed in place"""
+        task_id = task.id
+        if task_id not in self.by_id:
+            self.add(task)
+            return
+        self.by_id[task_id] = task
+        filed_under = self._filed_under[task_id]
+        if filed_under != (task.category_id, task.status):
+            self._unfile(task_id)
+            self._file(task)
+        self._stamp(task.category_id, filed_under[0])
+
+    def remove(self, task_id):
+        """Drop a task from the index"""
+        if task_id not in self.by_id:
+            return
+        self._stamp(self._filed_under[task_id][0])
+        self._unfile(task_id)
+        del self.by_id[task_id]
+        del self._order[task_id]
+
+    def count(self, category_id=None, status=None):
+        """Return the number of tasks in a category and/or with a status"""
+        if category_id is None and status is None:
+            return len(self.by_id)
+        if status is None:
+            return len(self.by_category.get(category_id, ()))
+        if category_id is None:
+            return len(self.by_status.get(status, ()))
+        return sum(1 for task in self.by_category.get(category_id, {}).values()
+                   if task.status == status)
+
+    def category_version(self, category_id):
+        """Return the stamp of the last change to a category's tasks"""
+        return self._category_versions.get(category_id, self._base_version)
+
+    def in_category(self, category_id):
+        """Return the tasks of a category, in list order"""
+        return self._bucket_tasks('category', category_id)
+
+    def with_status(self, status):
+        """Return the tasks with a status, in list order"""
+        return self._bucket_tasks('status', status)
+
+    def with_statuses(self, statuses):
+        """Return the tasks with any of several statuses, in list order"""
+        if len(statuses) == 1:
+            return self.with_status(next(iter(statuses)))
+        order = self._order
+        return list(merge(*(self.with_status(status) for status in statuses),
+                          key=lambda task: order[task.id]))
+
+    def _stamp(self, *category_ids):
+        self.version = version = next_version()
+        for category_id in category_ids:
+            self._category_versions[category_id] = version
+
+    def _buckets(self, kind):
+        return self.by_category if kind == 'category' else self.by_status
+
+    def _bucket_tasks(self, kind, key):
+        bucket = self._buckets(kind).get(key)
+        if not bucket:
+            return []
+        if (kind, key) in self._unsorted:
+            ordered = sorted(bucket.items(), key=lambda item: self._order[item[0]])
+            bucket.clear()
+            bucket.update(ordered)
+            self._unsorted.discard((kind, key))
+        return list(bucket.values())
+
+    def _file(self, task):
+        task_id = task.id
+        order = self._order[task_id]
+        keys = (task.category_id, task.status)
+        self._filed_under[task_id] = keys
+        for kind, key in zip(('category', 'status'), keys):
+            bucket = self._buckets(kind).setdefault(key, {})
+            if order < self._bucket_last.get((kind, key), -1):
+                self._unsorted.add((kind, key))
+            else:
+                self._bucket_last[(kind, key)] = order
+            bucket[task_id] = task
+
+    def _unfile(self, task_id):
+        keys = self._filed_under.pop(task_id)
+        for kind, key in zip(('category', 'status'), keys):
+            buckets = self._buckets(kind)
+            bucket = buckets[key]
+            del bucket[task_id]
+            if not bucket:
+                del buckets[key]
+                self._unsorted.discard((kind, key))
+                self._bucket_last.pop((kind, key), None)
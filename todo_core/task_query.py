@@ -0,0 +1,272 @@
+"""Filtered and sorted views of the tasks.
+
+A TaskQuery describes which tasks a view shows (a category, today's plan
+or every task, narrowed by status, priority, due date range, progress and
+whether they are overdue) and in which order. Queries are immutable and
+compose: ``where()`` and ``order_by()`` return a refined copy, so a view
+can keep the filters the user chose and add its own scope:
+
+    query = TaskQuery(status=('Not Started', 'In Progress')).order_by('due_date', '-priority')
+    tasks = query.where(category_id='3').run(store)
+
+Running a query starts from an index where one fits (the category or
+today's plan, else the status buckets) and checks the remaining filters
+against each candidate's codes and date ordinals. Results are kept in the
+store's QueryCache together with the version stamps of what they were
+computed from (see ``TaskIndex.version``), so showing the same view again
+costs nothing until a task in its scope changes.
+"""
+
+from datetime import date
+
+from .dates import to_ordinal
+from .models import COMPLETED, PRIORITY_CODES, STATUS_CODES
+
+# Sort keys; dates and names are compared by their ordinal / folded form
+SORT_KEYS = {
+    'name': lambda task: str(task.name).casefold(),
+    'priority': lambda task: task.priority_code,
+    'status': lambda task: task.status_code,
+    'start_date': lambda task: task.start_day,
+    'due_date': lambda task: task.due_day,
+    'date_completed': lambda task: task.completed_day,
+    'progress': lambda task: task.progress,
+}
+_MISSING_LAST = {'start_date', 'due_date', 'date_completed'}  # tasks without the date sort last
+
+_FILTERS = ('category_id', 'today', 'status', 'priority', 'due_from', 'due_to',
+            'min_progress', 'max_progress', 'overdue')
+
+
+def _values(value):
+    """Return a filter value as a tuple of accepted values (None for no filter)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return (value,)
+    return tuple(dict.fromkeys(value))
+
+
+def _day(value, name):
+    if value is None:
+        return None
+    ordinal = to_ordinal(value)
+    if ordinal is None:
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format (got '{value}')")
+    return ordinal
+
+
+class TaskQuery:
+    """Which tasks to show and in what order; see the module docstring.
+
+    Filters (all optional; every given filter has to match):
+
+    - ``category_id``: tasks of one category
+    - ``today``: tasks planned for today, in plan order
+    - ``status``, ``priority``: a value or a collection of accepted values
+    - ``due_from``, ``due_to``: inclusive 'YYYY-MM-DD' range; tasks without
+      a valid due date never match
+    - ``min_progress``, ``max_progress``: inclusive progress range
+    - ``overdue``: True for tasks due before today and not completed,
+      False for every other task
+
+    ``sort`` is a sequence of SORT_KEYS names, each prefixed with '-' for
+    descending order; tasks that compare equal keep their list order.
+    """
+
+    def __init__(self, sort=(), **filters):
+        unknown = set(filters).difference(_FILTERS)
+        if unknown:
+            raise TypeError(f"Unknown task filter: {', '.join(sorted(unknown))}")
+        for key in sort:
+            if key.lstrip('-') not in SORT_KEYS:
+                raise ValueError(f"Cannot sort tasks by '{key}'")
+        self.filters = {name: filters.get(name) for name in _FILTERS}
+        for name in ('status', 'priority'):
+            self.filters[name] = _values(self.filters[name])
+        self.filters['today'] = bool(self.filters['today'])
+        self.sort = tuple(sort)
+        self._first_day = _day(self.filters['due_from'], "The first due date")
+        self._last_day = _day(self.filters['due_to'], "The last due date")
+        self._key = (tuple(self.filters.values()), self.sort)
+
+    def __eq__(self, other):
+        return isinstance(other, TaskQuery) and self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __repr__(self):
+        given = {name: value for name, value in self.filters.items() if value not in (None, False)}
+        return f"TaskQuery(sort={self.sort!r}, **{given!r})"
+
+    @property
+    def plain(self):
+        """True if the query only picks a scope, in list order, without narrowing it"""
+        return not self.sort and all(self.filters[name] is None for name in _FILTERS[2:])
+
+    def where(self, **filters):
+        """Return a copy of the query with some filters added or replaced"""
+        return TaskQuery(self.sort, **dict(self.filters, **filters))
+
+    def order_by(self, *keys):
+        """Return a copy of the query sorted by the given keys instead"""
+        return TaskQuery(keys, **self.filters)
+
+    def run(self, store):
+        """Return the matching tasks, sorted, from the store's cache if still valid"""
+        stamp = self._stamp(store)
+        tasks = store.query_cache.get(self, stamp)
+        if tasks is None:
+            tasks = self.sort_tasks(self._filter(store))
+            store.query_cache.put(self, stamp, tasks)
+        return list(tasks)
+
+    def _stamp(self, store):
+        """Return what the results depend on: the version stamps of the scope, and the day"""
+        index = store.task_index
+        if self.filters['today']:
+            # Planned tasks can be in any category
+            stamp = (index.version, store.today.version)
+        elif self.filters['category_id'] is not None:
+            stamp = index.category_version(self.filters['category_id'])
+        else:
+            stamp = index.version
+        return stamp, date.today().toordinal()
+
+    def _filter(self, store):
+        filters = self.filters
+        index = store.task_index
+        check_status = True
+
+        # Start from the smallest index that covers the scope
+        if filters['today']:
+            tasks = store.today.resolve(index)
+            if filters['category_id'] is not None:
+                tasks = [task for task in tasks if task.category_id == filters['category_id']]
+        elif filters['category_id'] is not None:
+            tasks = index.in_category(filters['category_id'])
+        elif filters['status'] is not None:
+            tasks = index.with_statuses(filters['status'])
+            check_status = False  # the buckets only hold matching tasks
+        else:
+            tasks = store.tasks
+
+        # Then check the remaining filters, cheapest first
+        checks = self._checks(check_status)
+        if checks is None:
+            return []
+        for check in checks:
+            tasks = [task for task in tasks if check(task)]
+        return tasks
+
+    def _checks(self, check_status=True):
+        """Return tests for the filters other than the scope, or None if no task can match"""
+        filters = self.filters
+        checks = []
+        if check_status and filters['status'] is not None:
+            status_codes = {STATUS_CODES.lookup(status) for status in filters['status']} - {None}
+            if not status_codes:
+                return None
+            checks.append(lambda task: task.status_code in status_codes)
+        if filters['priority'] is not None:
+            priority_codes = {PRIORITY_CODES.lookup(priority) for priority in filters['priority']} - {None}
+            if not priority_codes:
+                return None
+            checks.append(lambda task: task.priority_code in priority_codes)
+        first_day, last_day = self._first_day, self._last_day
+        if first_day is not None or last_day is not None:
+            checks.append(lambda task: task.due_day is not None)
+            if first_day is not None:
+                checks.append(lambda task: task.due_day >= first_day)
+            if last_day is not None:
+                checks.append(lambda task: task.due_day <= last_day)
+        low, high = filters['min_progress'], filters['max_progress']
+        if low is not None:
+            checks.append(lambda task: task.progress >= low)
+        if high is not None:
+            checks.append(lambda task: task.progress <= high)
+        if filters['overdue'] is not None:
+            today = date.today().toordinal()
+            wanted = bool(filters['overdue'])
+            checks.append(lambda task: (task.status_code != COMPLETED and task.due_day is not None
+                                        and task.due_day < today) == wanted)
+        return checks
+
+    def matcher(self):
+        """Return a function telling whether a single task passes the filters.
+
+        For tasks that are not in a store, such as those streamed from disk;
+        ``today`` is not checked, as that needs the store's plan.
+        """
+        category_id = self.filters['category_id']
+        checks = self._checks()
+        if checks is None:
+            return lambda task: False
+        if category_id is not None:
+            checks.insert(0, lambda task: task.category_id == category_id)
+        return lambda task: all(check(task) for check in checks)
+
+    def storage_filters(self):
+        """Return Storage.iter_tasks filters that read (at least) the matching saved tasks"""
+        filters = self.filters
+
+        def single(values):
+            return values[0] if values is not None and len(values) == 1 else None
+
+        return {
+            'category_id': filters['category_id'],
+            'status': single(filters['status']),
+            'priority': single(filters['priority']),
+            'due_from': date.fromordinal(self._first_day).isoformat() if self._first_day else None,
+            'due_to': date.fromordinal(self._last_day).isoformat() if self._last_day else None,
+        }
+
+    def sort_tasks(self, tasks):
+        """Return tasks in the query's order (a new list, unless there is nothing to sort)"""
+        if not self.sort:
+            return tasks
+        tasks = list(tasks)
+        # Stable sorts from the last key to the first give a multi-key order
+        for key in reversed(self.sort):
+            descending = key.startswith('-')
+            name = key.lstrip('-')
+            value = SORT_KEYS[name]
+            if name in _MISSING_LAST:
+                # (has value, value) reversed, or (no value, value): either way missing ones go last
+                def sort_key(task, value=value, descending=descending):
+                    day = value(task)
+                    return (day is not None, day or 0) if descending else (day is None, day or 0)
+                tasks.sort(key=sort_key, reverse=descending)
+            else:
+                tasks.sort(key=value, reverse=descending)
+        return tasks
+
+
+class QueryCache:
+    """The latest results of recently run queries, with the stamps they were computed from"""
+
+    def __init__(self, size=64):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}   # query -> (stamp, tasks); oldest first
+
+    def get(self, query, stamp):
+        """Return the cached tasks of a query if they were computed at ``stamp``, else None"""
+        entry = self._entries.pop(query, None)
+        if entry is None or entry[0] != stamp:
+            self.misses += 1
+            return None
+        self._entries[query] = entry  # most recently used last
+        self.hits += 1
+        return entry[1]
+
+    def put(self, query, stamp, tasks):
+        self._entries.pop(query, None)
+        if len(self._entries) >= self.size:
+            del self._entries[next(iter(self._entries))]
+        self._entries[query] = (stamp, tuple(tasks))
+
+    def clear(self):
+        self._entries = {}
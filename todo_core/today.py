@@ -0,0 +1,107 @@
+"""Tasks for the Day.
+
+A day's plan is an ordered set of task ids that is resolved against the
+task index whenever it is shown, so it never holds stale copies of tasks.
+Plans are saved with the data as meta values keyed by day
+(``meta['today:2024-05-01']``), which keeps earlier days as history.
+"""
+
+from datetime import date
+
+from .events import next_version
+
+META_PREFIX = 'today:'
+
+
+class DayPlan:
+    """Today's plan, following the date.
+
+    The first use after midnight starts an empty plan for the new day (the
+    previous day's plan stays saved under its own key, and is still saved
+    if it changed just before midnight), so a session left running
+    overnight never reads or writes yesterday's plan. Pass ``day`` to pin
+    the plan to one day.
+    """
+
+    def __init__(self, meta=None, day=None):
+        self._pinned = day is not None
+        self.day = day or date.today().isoformat()
+        self._ids = dict.fromkeys((meta or {}).get(self.key, []))  # ordered set
+        self._unsaved = {}  # meta values of an earlier day's plan changed before the date did
+        self.dirty = False
+        self._version = next_version()  # stamped on every change
+
+    @property
+    def key(self):
+        return META_PREFIX + self.day
+
+    @property
+    def version(self):
+        self._current()
+        return self._version
+
+    def _current(self):
+        """Start the new day's plan if the date has changed since the last use"""
+        if self._pinned:
+            return
+        today = date.today().isoformat()
+        if today != self.day:
+            if self.dirty:
+                self._unsaved[self.key] = list(self._ids)
+            self.day = today
+            self._ids = {}
+            self._version = next_version()
+
+    def __contains__(self, task_id):
+        self._current()
+        return task_id in self._ids
+
+    def __len__(self):
+        self._current()
+        return len(self._ids)
+
+    def __iter__(self):
+        self._current()
+        return iter(self._ids)
+
+    def add(self, task_id):
+        """Add a task id to the end of the plan; return False if it was already there"""
+        self._current()
+        if task_id in self._ids:
+            return False
+        self._ids[task_id] = None
+        self._changed()
+        return True
+
+    def remove(self, task_id):
+        """Remove a task id; return False if it was not planned"""
+        self._current()
+        if task_id not in self._ids:
+            return False
+        del self._ids[task_id]
+        self._changed()
+        return True
+
+    def clear(self):
+        self._current()
+        self._ids = {}
+        self._changed()
+
+    def _changed(self):
+        self.dirty = True
+        self._version = next_version()
+
+    def resolve(self, task_index):
+        """Return the planned tasks that still exist, in plan order"""
+        self._current()
+        tasks = (task_index.get(task_id) for task_id in self._ids)
+        return [task for task in tasks if task is not None]
+
+    def meta(self):
+        """Return the meta values to save, marking the plan clean"""
+        self._current()
+        values = dict(self._unsaved)
+        values[self.key] = list(self._ids)
+        self._unsaved = {}
+        self.dirty = False
+        return values
@@ -0,0 +1,103 @@
+"""Opt-in timing of the hot paths, saved as a trace file.
+
+Tracing is off unless enable() is called (the application does so for
+``--trace FILE`` or when the TODO_TRACE environment variable names a file).
+While it is off, span() hands out a shared do-nothing context manager, so
+the instrumented code pays for little more than a function call.
+
+The trace is written in the Chrome trace event format, which opens in
+chrome://tracing, Perfetto (ui.perfetto.dev) and speedscope. Every span is
+a complete event on the thread it ran on, with its arguments (task counts,
+and in the application the widgets created and destroyed and the canvas
+items drawn), so nested spans show where a slow update or save spent its
+time: reading and encoding JSON, syncing to disk, building widgets or
+drawing on the timeline canvas.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+ENV_VAR = 'TODO_TRACE'
+
+_NO_SPAN = nullcontext()
+_tracer = None
+
+
+class Tracer:
+    """Collects timed spans and per-name totals until written to ``path``"""
+
+    def __init__(self, path):
+        self.path = path
+        self.events = []
+        self.totals = {}   # span name -> [calls, total seconds, slowest, arguments of the last]
+        self._origin = time.perf_counter()
+        self._threads = {}  # thread id -> name
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, category='core', **args):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter(), category, args)
+
+    def record(self, name, started, finished, category='core', args=None):
+        """Add a span that ran from ``started`` to ``finished`` (perf_counter seconds)"""
+        thread = threading.current_thread()
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(), 'tid': thread.ident,
+                 'ts': (started - self._origin) * 1e6, 'dur': (finished - started) * 1e6,
+                 'args': args or {}}
+        elapsed = finished - started
+        with self._lock:
+            self.events.append(event)
+            self._threads[thread.ident] = thread.name
+            total = self.totals.get(name)
+            if total is None:
+                self.totals[name] = [1, elapsed, elapsed, event['args']]
+            else:
+                total[0] += 1
+                total[1] += elapsed
+                total[2] = max(total[2], elapsed)
+                total[3] = event['args']
+
+    def summary(self):
+        """Return (name, calls, total, slowest, last arguments) per span name, most time first"""
+        with self._lock:
+            rows = [(name, *total) for name, total in self.totals.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def write(self, path=None):
+        """Write the trace collected so far"""
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self._threads)
+        names = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': ident,
+                  'args': {'name': name}} for ident, name in threads.items()]
+        with open(path or self.path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': names + events, 'displayTimeUnit': 'ms'}, f)
+
+
+def enable(path):
+    """Start tracing, writing the trace to ``path`` at exit; return the Tracer"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path)
+        atexit.register(_tracer.write)
+    return _tracer
+
+
+def active():
+    """Return the running Tracer, or None if tracing is off"""
+    return _tracer
+
+
+def span(name, category='core', **args):
+    """Return a context manager that times its block as a span (if tracing is on)"""
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.span(name, category, **args)
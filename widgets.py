@@ -0,0 +1,318 @@
+import tkinter as tk
+from tkinter import ttk
+
+from instrumentation import traced
+from styles import PRIORITY_COLORS, PROGRESS_COLORS, STATUS_BOX_COLORS, UNKNOWN_COLOR, font, progress_color
+
+ROW_HEIGHT = 140   # Fixed row height (including the gap) so rows can be positioned by index
+ROW_GAP = 10
+COMMENT_CHARS = 120
+
+
+class TaskRow:
+    """The widgets that display one task.
+
+    A row is built once and then pointed at any task with ``show(task)``,
+    which reconfigures the existing widgets instead of creating new ones.
+    The row remembers what each widget shows and only sends Tk the options
+    that changed, so re-pointing a row at a similar task costs few calls.
+    Its colors come from the app's current theme palette.
+    """
+
+    def __init__(self, parent, app):
+        self.app = app
+        self.task = None
+        self.window = None  # canvas item when the row lives in a VirtualTaskList
+        self._shown = {}    # widget attribute name -> options last applied to it
+
+        self.frame = tk.Frame(parent, relief='solid', bd=1, padx=15, pady=10)
+
+        # Task header
+        self.header_frame = tk.Frame(self.frame)
+        self.header_frame.pack(fill='x')
+
+        self.name_label = tk.Label(self.header_frame, font=font('task_name'))
+        self.name_label.pack(side='left')
+
+        self.priority_label = tk.Label(self.header_frame, font=font('button'), fg='white',
+                                       padx=8, pady=2, relief='solid', bd=1)
+        self.priority_label.pack(side='right', padx=(5, 0))
+
+        self.status_label = tk.Label(self.header_frame, font=font('button'), fg='white',
+                                     padx=8, pady=2, relief='solid', bd=1)
+        self.status_label.pack(side='right', padx=(5, 0))
+
+        self.progress_label = tk.Label(self.header_frame, font=font('button'), fg='white',
+                                       padx=8, pady=2, relief='solid', bd=1)
+        self.progress_label.pack(side='right', padx=(5, 0))
+
+        # Task details
+        self.details_frame = tk.Frame(self.frame)
+        self.details_frame.pack(fill='x', pady=(5, 0))
+
+        self.dates_label = tk.Label(self.details_frame, font=font('detail'))
+        self.dates_label.pack(side='left')
+
+        # Comments (one line, so every row has the same height)
+        self.comment_label = tk.Label(self.frame, font=font('detail'),
+                                      anchor='w', justify='left')
+        self.comment_label.pack(fill='x', pady=(5, 0))
+
+        # Buttons
+        self.buttons_frame = tk.Frame(self.frame)
+        self.buttons_frame.pack(anchor='e', pady=(5, 0))
+
+        self.today_btn = tk.Button(self.buttons_frame, font=font('detail'), fg='white', bd=0,
+                                   padx=10, pady=2, cursor='hand2', command=self.toggle_today)
+        self.today_btn.pack(side='right', padx=(5, 0))
+
+        self.complete_btn = tk.Button(self.buttons_frame, text="Complete Task", font=font('detail'),
+                                      command=lambda: self.app.complete_task(self.task), bg='#4CAF50',
+                                      fg='white', bd=0, padx=10, pady=2, cursor='hand2')
+        self.complete_btn.pack(side='right', padx=(5, 0))
+
+        self.edit_btn = tk.Button(self.buttons_frame, text="Edit", font=font('detail'),
+                                  command=lambda: self.app.edit_task(self.task), bg='#FF9800',
+                                  fg='white', bd=0, padx=10, pady=2, cursor='hand2')
+        self.edit_btn.pack(side='right')
+
+    def _set(self, name, **options):
+        """Configure one of the row's widgets, skipping options it already shows"""
+        shown = self._shown.setdefault(name, {})
+        changed = {option: value for option, value in options.items() if shown.get(option) != value}
+        if changed:
+            getattr(self, name).configure(**changed)
+            shown.update(changed)
+
+    def show(self, task):
+        """Point the row at a task and update every widget to match it"""
+        self.task = task
+        status = task.status
+        priority = task.priority
+        palette = self.app.theme.palette
+        bg_color = palette['rows'].get(status, palette['row'])
+        text_color = palette['text']
+        muted_color = palette['muted']
+
+        for name in ('frame', 'header_frame', 'details_frame', 'buttons_frame'):
+            self._set(name, bg=bg_color)
+
+        self._set('name_label', text=task.name, bg=bg_color, fg=text_color)
+        self._set('priority_label', text=priority, bg=PRIORITY_COLORS.get(priority, UNKNOWN_COLOR))
+        self._set('status_label', text=status, bg=STATUS_BOX_COLORS.get(status, UNKNOWN_COLOR))
+        progress = task.progress
+        self._set('progress_label', text=f"{progress}%",
+                  bg=PROGRESS_COLORS[progress] if 0 <= progress <= 100 else progress_color(progress))
+
+        dates_text = f"Start: {task.start_date} | Due: {task.due_date}"
+        if task.date_completed:
+            dates_text += f" | Completed: {task.date_completed}"
+        self._set('dates_label', text=dates_text, bg=bg_color, fg=muted_color)
+
+        comments = task.comments or ''
+        comments = comments.replace('\n', ' ')
+        if len(comments) > COMMENT_CHARS:
+            comments = comments[:COMMENT_CHARS - 1] + '…'
+        self._set('comment_label', text=f"Comments: {comments}" if comments else '',
+                  bg=bg_color, fg=muted_color)
+
+        # Add to Today / Remove from Today button
+        if task.id in self.app.today_tasks:
+            self._set('today_btn', text="Doing Today", bg='#87CEEB')  # Light blue
+        else:
+            self._set('today_btn', text="Add to Today", bg='#2196F3')
+
+        # Complete Task button (only shown if not completed)
+        completed = status == 'Completed'
+        if self._shown.get('complete_btn', {}).get('hidden') != completed:
+            if completed:
+                self.complete_btn.pack_forget()
+            else:
+                self.complete_btn.pack(side='right', padx=(5, 0), before=self.edit_btn)
+            self._shown.setdefault('complete_btn', {})['hidden'] = completed
+
+    def toggle_today(self):
+        if self.task.id in self.app.today_tasks:
+            self.app.remove_from_today(self.task)
+        else:
+            self.app.add_to_today(self.task)
+
+
+class CategoryTile:
+    """A category's tile on the Main tab's grid.
+
+    Like TaskRow, a tile is kept and re-pointed at another category with
+    ``show()`` when the grid is rebuilt, instead of being recreated.
+    """
+
+    def __init__(self, parent, on_click):
+        self.category_id = None
+        self.frame = tk.Frame(parent, relief='solid', bd=1, padx=20, pady=15)
+        self.name_label = tk.Label(self.frame, font=font('tile'), fg='white')
+        self.name_label.pack()
+        self.count_label = tk.Label(self.frame, font=font('button'), fg='white')
+        self.count_label.pack()
+        for widget in (self.frame, self.name_label, self.count_label):
+            widget.bind('<Button-1>', lambda e: on_click(self.category_id))
+
+    def show(self, category_id, category, count):
+        self.category_id = category_id
+        color = category['color']
+        self.frame.configure(bg=color)
+        self.name_label.configure(text=category['name'], bg=color)
+        self.count_label.configure(text=f"{count} tasks", bg=color)
+
+    def set_count(self, count):
+        self.count_label.configure(text=f"{count} tasks")
+
+
+class VirtualTaskList:
+    """A scrolling task list that only builds rows for what is on screen.
+
+    Rows for the visible part of the list (plus ``overscan`` rows above and
+    below) are kept in a pool and re-pointed at other tasks as the list
+    scrolls, so the number of widgets does not grow with the number of tasks.
+    A ``bg`` of None follows the theme's window color.
+    """
+
+    def __init__(self, parent, app, bg, empty_text, overscan=3):
+        self.app = app
+        self.bg = bg
+        bg = bg or app.theme.palette['window']
+        self.overscan = overscan
+        self.tasks = []
+        self.rows = []           # pool of TaskRow
+        self.shown = {}          # list index -> pooled row currently showing it
+        self._render_pending = False
+
+        self.container = tk.Frame(parent, bg=bg)
+        self.canvas = tk.Canvas(self.container, bg=bg, highlightthickness=0,
+                                yscrollincrement=ROW_HEIGHT // 4)
+        self.scrollbar = ttk.Scrollbar(self.container, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.empty_label = tk.Label(self.canvas, text=empty_text, font=font('message'), bg=bg,
+                                    fg=app.theme.palette['muted'])
+        self.empty_item = self.canvas.create_window(0, 50, window=self.empty_label, anchor='n')
+
+        self.canvas.bind('<Configure>', self._on_resize)
+
+        # The wheel scrolls this list while the pointer is over any part of it:
+        # the list's widgets (and its rows, as they are built) share a bind tag
+        self.wheel_tag = f'TaskListWheel{id(self)}'
+        self.canvas.bind_class(self.wheel_tag, '<MouseWheel>', self._on_mousewheel)
+        for widget in (self.container, self.canvas, self.scrollbar, self.empty_label):
+            self._tag_for_wheel(widget)
+
+    def pack(self, **kwargs):
+        self.container.pack(**kwargs)
+
+    def pack_forget(self):
+        self.container.pack_forget()
+
+    def reset(self, bg, empty_text):
+        """Prepare the list for showing another view: new colors, message, and back to the top"""
+        self.bg = bg
+        self._color()
+        self.empty_label.configure(text=empty_text)
+        self.canvas.yview_moveto(0)
+
+    def apply_theme(self):
+        """Recolor the list and the rows on screen for the current palette"""
+        self._color()
+        self.refresh_all()
+
+    def _color(self):
+        palette = self.app.theme.palette
+        bg = self.bg or palette['window']
+        for widget in (self.container, self.canvas):
+            widget.configure(bg=bg)
+        self.empty_label.configure(bg=bg, fg=palette['muted'])
+
+    def set_tasks(self, tasks):
+        """Show a new list of tasks, keeping the scroll position where possible"""
+        self.tasks = list(tasks)
+        self.shown = {}
+        self.canvas.configure(scrollregion=(0, 0, 0, len(self.tasks) * ROW_HEIGHT))
+        self._place_empty_label()
+        self.render()
+
+    def refresh(self, task_id):
+        """Update the row showing a task, if it is on screen"""
+        for index, row in self.shown.items():
+            if self.tasks[index].id == task_id:
+                row.show(self.tasks[index])
+
+    def refresh_all(self):
+        """Update every row on screen"""
+        for index, row in self.shown.items():
+            row.show(self.tasks[index])
+
+    @traced
+    def render(self):
+        """Place pooled rows over the visible slice of the list"""
+        self._render_pending = False
+        height = max(self.canvas.winfo_height(), ROW_HEIGHT)
+        top = self.canvas.canvasy(0)
+        first = max(0, int(top // ROW_HEIGHT) - self.overscan)
+        last = min(len(self.tasks), int((top + height) // ROW_HEIGHT) + 1 + self.overscan)
+        wanted = range(first, last)
+
+        # Keep rows that are still in range and reuse the others for new indexes
+        self.shown = {index: row for index, row in self.shown.items() if index in wanted}
+        in_use = {id(row) for row in self.shown.values()}
+        free = [row for row in self.rows if id(row) not in in_use]
+        width = max(self.canvas.winfo_width(), 1)
+
+        for index in wanted:
+            if index in self.shown:
+                continue
+            if free:
+                row = free.pop()
+            else:
+                row = TaskRow(self.canvas, self.app)
+                self._tag_for_wheel(row.frame)
+                row.window = self.canvas.create_window(0, 0, window=row.frame, anchor='nw',
+                                                       width=width - 2 * ROW_GAP,
+                                                       height=ROW_HEIGHT - ROW_GAP)
+                self.rows.append(row)
+            self.canvas.coords(row.window, ROW_GAP, index * ROW_HEIGHT + ROW_GAP // 2)
+            row.show(self.tasks[index])
+            self.shown[index] = row
+
+        # Park pooled rows that are not needed right now out of sight
+        for row in free:
+            self.canvas.coords(row.window, -10 * width, -10 * ROW_HEIGHT)
+
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.canvas.after_idle(self.render)
+
+    def _on_mousewheel(self, event):
+        self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+
+    def _tag_for_wheel(self, widget):
+        """Add the list's wheel tag to a widget and everything inside it"""
+        widget.bindtags((self.wheel_tag,) + widget.bindtags())
+        for child in widget.winfo_children():
+            self._tag_for_wheel(child)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_render()
+
+    def _place_empty_label(self):
+        if self.tasks:
+            self.canvas.coords(self.empty_item, -10000, -10000)
+        else:
+            self.canvas.coords(self.empty_item, self.canvas.winfo_width() // 2, 50)
+
+    def _on_resize(self, event):
+        self._place_empty_label()
+        for row in self.rows:
+            self.canvas.itemconfigure(row.window, width=event.width - 2 * ROW_GAP)
+        self._schedule_render()